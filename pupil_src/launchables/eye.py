@@ -87,16 +87,19 @@ def eye(
     Emits data:
         ``pupil.<eye id>``: Pupil data for eye with id ``<eye id>``
         ``frame.eye.<eye id>``: Eye frames with id ``<eye id>``
+        ``shm.frame.eye.<eye id>``: Eye frames in shared memory, see shared_frames
     """
 
     # We deferr the imports becasue of multiprocessing.
     # Otherwise the world process each process also loads the other imports.
     import zmq
     import zmq_tools
+    from shared_frames import Shared_Frame_Publisher
 
     zmq_ctx = zmq.Context()
     ipc_socket = zmq_tools.Msg_Dispatcher(zmq_ctx, ipc_push_url)
     pupil_socket = zmq_tools.Msg_Streamer(zmq_ctx, ipc_pub_url, pub_socket_hwm)
+    frame_publisher = Shared_Frame_Publisher(zmq_ctx, ipc_pub_url, pupil_socket)
     notify_sub = zmq_tools.Msg_Receiver(zmq_ctx, ipc_sub_url, topics=("notify",))
 
     # logging setup
@@ -562,7 +565,7 @@ def eye(
                             )
                     else:
                         frame_publish_format_recent_warning = False
-                        pupil_socket.send(
+                        frame_publisher.send(
                             {
                                 "topic": "frame.eye.{}".format(eye_id),
                                 "width": frame.width,
@@ -571,7 +574,8 @@ def eye(
                                 "timestamp": frame.timestamp,
                                 "format": frame_publish_format,
                                 "__raw_data__": [data],
-                            }
+                            },
+                            owner=frame,
                         )
 
                 t = frame.timestamp
@@ -687,6 +691,7 @@ def eye(
         glfw.glfwDestroyWindow(main_window)
         g_pool.gui.terminate()
         glfw.glfwTerminate()
+        frame_publisher.cleanup()
         logger.info("Process shutting down.")
 
 
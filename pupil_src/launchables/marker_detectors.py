@@ -12,7 +12,9 @@ See COPYING and COPYING.LESSER for license details.
 from types import SimpleNamespace
 
 
-def circle_detector(ipc_push_url, pair_url, source_path, batch_size=20):
+def circle_detector(
+    ipc_push_url, pair_url, source_path, batch_size=20, frame_consumer=None
+):
 
     # ipc setup
     import zmq
@@ -36,22 +38,38 @@ def circle_detector(ipc_push_url, pair_url, source_path, batch_size=20):
     from time import sleep
     from video_capture import File_Source, EndofVideoError
     from circle_detector import CircleTracker
+    from frame_server import Frame_Consumer
+
+    def decoded_frames(src):
+        while True:
+            try:
+                yield src.get_frame()
+            except EndofVideoError:
+                return
 
     try:
-        # TODO: we need fill_gaps=True for correct frame indices to paint the circle
-        # markers on the world stream. But actually we don't want to process gap frames
-        # with the marker detector. We should make an option to only receive non-gap
-        # frames, but with gap-like indices?
-        src = File_Source(SimpleNamespace(), source_path, timing=None, fill_gaps=True)
+        if frame_consumer is None:
+            # TODO: we need fill_gaps=True for correct frame indices to paint the
+            # circle markers on the world stream. But actually we don't want to
+            # process gap frames with the marker detector. We should make an option to
+            # only receive non-gap frames, but with gap-like indices?
+            src = File_Source(
+                SimpleNamespace(), source_path, timing=None, fill_gaps=True
+            )
+            frame_count = src.get_frame_count()
+            frames = decoded_frames(src)
+        else:
+            # decoded once for all offline analyses, gaps are filled as well
+            consumer = Frame_Consumer(frame_consumer)
+            frame_count = consumer.frame_count
+            frames = iter(consumer)
 
-        frame = src.get_frame()
         logger.info("Starting calibration marker detection...")
-        frame_count = src.get_frame_count()
 
         queue = []
         circle_tracker = CircleTracker()
 
-        while True:
+        for num_processed, frame in enumerate(frames, start=1):
             while process_pipe.new_data:
                 topic, n = process_pipe.recv()
                 if topic == "terminate":
@@ -59,10 +77,12 @@ def circle_detector(ipc_push_url, pair_url, source_path, batch_size=20):
                         {"topic": "exception", "reason": "User terminated."}
                     )
                     logger.debug("Process terminated")
+                    frames.close()
                     sleep(1.0)
                     return
 
-            progress = 100.0 * frame.index / frame_count
+            # frames of the frame server do not start at index 0
+            progress = 100.0 * num_processed / frame_count
 
             markers = [
                 m
@@ -88,9 +108,6 @@ def circle_detector(ipc_push_url, pair_url, source_path, batch_size=20):
                 del queue[:batch_size]
                 process_pipe.send({"topic": "progress", "data": data})
 
-            frame = src.get_frame()
-
-    except EndofVideoError:
         process_pipe.send({"topic": "progress", "data": queue})
         process_pipe.send({"topic": "finished"})
         logger.debug("Process finished")
@@ -87,6 +87,8 @@ def player(
         from methods import normalize, denormalize, delta_t, get_system_info
         import player_methods as pm
         from pupil_recording import PupilRecording
+        from pldata_loader import PLData_Loader
+        from frame_server import Frame_Server
         from csv_utils import write_key_value_file
 
         # Plug-ins
@@ -125,6 +127,7 @@ def player(
         )
         from video_capture import File_Source
         from video_overlay.plugins import Video_Overlay, Eye_Overlay
+        from video_proxy import Video_Proxy
 
         from pupil_recording import (
             assert_valid_recording_type,
@@ -179,6 +182,7 @@ def player(
             iMotions_Exporter,
             Eye_Video_Exporter,
             Offline_Head_Pose_Tracker,
+            Video_Proxy,
         ] + runtime_plugins
 
         plugins = system_plugins + user_plugins
@@ -249,6 +253,13 @@ def player(
         recording = PupilRecording(rec_dir)
         meta_info = recording.meta_info
 
+        # start reading recorded data while the video and UI are being set up
+        pldata_loader = PLData_Loader(
+            rec_dir, preload_topics=("notify", "annotation", "annotation_player")
+        )
+        pldata_loader.submit_pupil_positions()
+        pldata_loader.submit_gaze_positions()
+
         # log info about Pupil Platform and Platform in player.log
         logger.info("Application Version: {}".format(app_version))
         logger.info("System Info: {}".format(get_system_info()))
@@ -277,6 +288,12 @@ def player(
             buffered_decoding=True,
             fill_gaps=True,
         )
+        # decodes the world video once for all offline analyses
+        g_pool.frame_server = Frame_Server(
+            g_pool.capture.source_path,
+            g_pool.capture.frame_size,
+            g_pool.capture.get_frame_count(),
+        )
 
         # load session persistent settings
         session_settings = Persistent_Dict(
@@ -318,6 +335,7 @@ def player(
         g_pool.user_dir = user_dir
         g_pool.rec_dir = rec_dir
         g_pool.meta_info = meta_info
+        g_pool.pldata_loader = pldata_loader
         g_pool.min_data_confidence = session_settings.get(
             "min_data_confidence", MIN_DATA_CONFIDENCE_DEFAULT
         )
@@ -679,6 +697,8 @@ def player(
         for p in g_pool.plugins:
             p.alive = False
         g_pool.plugins.clean()
+        g_pool.pldata_loader.shutdown(wait=False)
+        g_pool.frame_server.shutdown()
 
         g_pool.gui.terminate()
         glfw.glfwDestroyWindow(main_window)
@@ -257,20 +257,22 @@ def service(
         while g_pool.service_should_run and not process_was_interrupted:
             socks = dict(poller.poll())
             if pupil_sub.socket in socks:
-                topic, pupil_datum = pupil_sub.recv()
-
                 events = {}
-                events["pupil"] = [pupil_datum]
-
-                if g_pool.active_gaze_mapping_plugin:
-                    new_gaze_data = g_pool.active_gaze_mapping_plugin.map_pupil_to_gaze(
-                        [pupil_datum]
+                events["pupil"] = [
+                    pupil_datum.deserialize()
+                    for topic, pupil_datum in pupil_sub.recv_batch()
+                ]
+
+                gazer = g_pool.active_gaze_mapping_plugin
+                if gazer:
+                    # map in order of arrival, like one by one
+                    events["gaze"] = list(
+                        gazer.map_pupil_to_gaze(
+                            events["pupil"], sort_by_creation_time=False
+                        )
                     )
-                    events["gaze"] = []
-
-                    for gaze_datum in new_gaze_data:
+                    for gaze_datum in events["gaze"]:
                         gaze_pub.send(gaze_datum)
-                        events["gaze"].append(gaze_datum)
 
 
                 for plugin in g_pool.plugins:
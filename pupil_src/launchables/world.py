@@ -62,10 +62,12 @@ def world(
     # networking
     import zmq
     import zmq_tools
+    from shared_frames import Shared_Frame_Publisher
 
     # zmq ipc setup
     zmq_ctx = zmq.Context()
     ipc_pub = zmq_tools.Msg_Dispatcher(zmq_ctx, ipc_push_url)
+    frame_publisher = Shared_Frame_Publisher(zmq_ctx, ipc_pub_url, ipc_pub)
     notify_sub = zmq_tools.Msg_Receiver(zmq_ctx, ipc_sub_url, topics=("notify",))
 
     # log setup
@@ -662,17 +664,18 @@ def world(
             events.pop("annotation", None)
 
             # send new events to ipc:
-            if "frame" in events:
-                del events["frame"]  # send explicitly with frame publisher
+            frame = events.pop("frame", None)
+            # image buffers are large, send them without copying, and via shared
+            # memory to local readers that request it
+            for d in events.pop("frame.world", ()):
+                frame_publisher.send(d, owner=frame)
             if "depth_frame" in events:
                 del events["depth_frame"]
             if "audio_packets" in events:
                 del events["audio_packets"]
             del events["dt"]  # no need to send this
-            for data in events.values():
-                assert isinstance(data, (list, tuple))
-                for d in data:
-                    ipc_pub.send(d)
+            assert all(isinstance(data, (list, tuple)) for data in events.values())
+            ipc_pub.send_many(d for data in events.values() for d in data)
 
             glfw.glfwMakeContextCurrent(main_window)
             # render visual feedback from loaded plugins
@@ -760,6 +763,7 @@ def world(
         stop_eye_process(0)
         stop_eye_process(1)
 
+        frame_publisher.cleanup()
         logger.info("Process shutting down.")
         ipc_pub.notify({"subject": "world_process.stopped"})
         sleep(1.0)
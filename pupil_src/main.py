@@ -121,7 +121,9 @@ def launcher():
 
         while True:
             m = pull.recv_multipart()
-            pub.send_multipart(m)
+            # subscribers expect single messages
+            for msg in zmq_tools.unroll_batch(m):
+                pub.send_multipart(msg)
 
     # The delay proxy handles delayed notififications.
     def delay_proxy(ipc_pub_url, ipc_sub_url):
@@ -371,6 +373,7 @@ def launcher():
                         target=circle_detector,
                         name="circle_detector",
                         args=(ipc_push_url, n["pair_url"], n["source_path"]),
+                        kwargs={"frame_consumer": n.get("frame_consumer")},
                     ).start()
                 elif "notify.meta.should_doc" in topic:
                     cmd_push.notify(
@@ -237,7 +237,7 @@ class Annotation_Player(AnnotationPlugin, Analysis_Plugin_Base):
         self.last_frame_index = -1
 
     def load_annotations(self, file_name):
-        annotation_pldata = fm.load_pldata_file(self.g_pool.rec_dir, file_name)
+        annotation_pldata = self.g_pool.pldata_loader.load(file_name)
         annotations = pm.Mutable_Bisector(
             annotation_pldata.data, annotation_pldata.timestamps
         )
@@ -250,6 +250,8 @@ class Annotation_Player(AnnotationPlugin, Analysis_Plugin_Base):
         with fm.PLData_Writer(self.g_pool.rec_dir, "annotation_player") as writer:
             for ts, annotation in zip(self.annotations.timestamps, self.annotations):
                 writer.append_serialized(ts, "annotation", annotation.serialized)
+        # the preloaded data is outdated if the plugin is opened again
+        self.g_pool.pldata_loader.invalidate("annotation_player")
 
     def customize_menu(self):
         self.menu.label = "View and Edit Annotations"
@@ -108,6 +108,7 @@ class AV_Writer(abc.ABC):
         """
 
         self.timestamps = []
+        self.bytes_written = 0
         self.start_time = start_time_synced
         self.last_video_pts = float("-inf")
 
@@ -194,6 +195,7 @@ class AV_Writer(abc.ABC):
                     logger.warning("Single frame yielded more than one packet")
                 video_packed_encoded = True
             self.container.mux(packet)
+            self.bytes_written += packet.size
 
         if not video_packed_encoded:
             logger.warning(f"Encoding frame {input_frame.index} failed!")
@@ -11,12 +11,20 @@ See COPYING and COPYING.LESSER for license details.
 
 import collections
 import collections.abc
+import contextlib
 import copy
 import logging
+import mmap
 import os
 import pickle
+import re
+import shutil
+import threading
+import time
 import traceback as tb
 import types
+import weakref
+import zipfile
 from glob import iglob
 from pathlib import Path
 
@@ -154,38 +162,427 @@ def load_pldata_file(directory, topic):
     return PLData(data, data_ts, topics)
 
 
-class PLData_Writer(object):
-    """docstring for PLData_Writer"""
+PLDATA_INDEX_SUFFIX = ".pldata.idx"
+PLDATA_INDEX_DTYPE = np.dtype([("offset", "<u8"), ("length", "<u8")])
+
+
+def load_pldata_index(directory, topic):
+    """Loads byte offset and length of each datum in a pldata file.
+
+    Builds the index if it is missing or outdated, e.g. for older recordings.
+    """
+    index_path = os.path.join(directory, topic + PLDATA_INDEX_SUFFIX)
+    msgpack_path = os.path.join(directory, topic + ".pldata")
+    try:
+        if os.path.getmtime(index_path) >= os.path.getmtime(msgpack_path):
+            index = np.fromfile(index_path, dtype=PLDATA_INDEX_DTYPE)
+            file_size = os.path.getsize(msgpack_path)
+            if len(index) == 0 and file_size == 0:
+                return index
+            if len(index) and index[-1]["offset"] + index[-1]["length"] == file_size:
+                return index
+        logger.debug(f"Ignoring outdated pldata index '{index_path}'")
+    except FileNotFoundError:
+        pass
+    return build_pldata_index(directory, topic)
+
+
+def build_pldata_index(directory, topic):
+    """Creates the offset index for an existing pldata file without deserializing it."""
+    offsets = collections.deque()
+    msgpack_path = os.path.join(directory, topic + ".pldata")
+    with open(msgpack_path, "rb") as fh:
+        unpacker = msgpack.Unpacker(fh, raw=False, use_list=False)
+        start = 0
+        while True:
+            try:
+                unpacker.skip()
+            except msgpack.OutOfData:
+                break
+            stop = unpacker.tell()
+            offsets.append((start, stop - start))
+            start = stop
+    index = np.array(offsets, dtype=PLDATA_INDEX_DTYPE)
+    index_path = os.path.join(directory, topic + PLDATA_INDEX_SUFFIX)
+    try:
+        index.tofile(index_path)
+    except OSError:
+        logger.debug(f"Could not save pldata index '{index_path}'")
+    return index
+
+
+class Lazy_PLData_Sequence(object):
+    """Read-only sequence of pldata data that is read from disk on access.
+
+    The pldata file is memory-mapped. Items are only read and wrapped into
+    `Serialized_Dict`s when they are accessed. Integer indexing returns a single
+    datum, slices and index arrays return a numpy object array like `Bisector.data`.
+    Use `subset()` to select items without reading them.
+    """
+
+    def __init__(self, msgpack_path, index, buffer=None, topics=False):
+        self._msgpack_path = msgpack_path
+        self._index = index
+        self._topics = topics  # yield topics instead of data
+        if buffer is None and len(index):
+            with open(msgpack_path, "rb") as fh:
+                buffer = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        self._buffer = buffer
+
+    @property
+    def topics(self) -> "Lazy_PLData_Sequence":
+        return type(self)(self._msgpack_path, self._index, self._buffer, topics=True)
+
+    def subset(self, key) -> "Lazy_PLData_Sequence":
+        return type(self)(
+            self._msgpack_path, self._index[key], self._buffer, self._topics
+        )
 
-    def __init__(self, directory, name):
+    @classmethod
+    def concatenate(cls, sequences) -> "Lazy_PLData_Sequence":
+        """Concatenates sequences that are read from the same pldata file."""
+        first, *others = sequences
+        if any(seq._msgpack_path != first._msgpack_path for seq in others):
+            raise ValueError("Can only concatenate data from the same pldata file")
+        index = np.concatenate([seq._index for seq in sequences])
+        return cls(first._msgpack_path, index, first._buffer, first._topics)
+
+    def _item(self, offset, length):
+        if self._topics:
+            return self._topic(offset, length)
+        topic, payload = msgpack.unpackb(
+            self._buffer[offset : offset + length], raw=False, use_list=False
+        )
+        return Serialized_Dict(msgpack_bytes=payload)
+
+    def _topic(self, offset, length):
+        # Fast path for `[fixstr/str8 topic, payload]` items: read the topic only,
+        # without copying the payload
+        buffer = self._buffer
+        if buffer[offset] == 0x92:  # fixarray of length 2
+            header = buffer[offset + 1]
+            if 0xA0 <= header <= 0xBF:  # fixstr
+                start, stop = offset + 2, offset + 2 + (header & 0x1F)
+                return buffer[start:stop].decode()
+            elif header == 0xD9:  # str8
+                start = offset + 3
+                return buffer[start : start + buffer[offset + 2]].decode()
+        topic, _ = msgpack.unpackb(
+            buffer[offset : offset + length], raw=False, use_list=False
+        )
+        return topic
+
+    def __len__(self):
+        return len(self._index)
+
+    def __getitem__(self, key):
+        if isinstance(key, (int, np.integer)):
+            offset, length = self._index[key]
+            return self._item(offset, length)
+        items = np.empty(len(self._index[key]), dtype=object)
+        items[:] = list(self.subset(key))
+        return items
+
+    def __iter__(self):
+        offsets = self._index["offset"].tolist()
+        lengths = self._index["length"].tolist()
+        for offset, length in zip(offsets, lengths):
+            yield self._item(offset, length)
+
+    def copy(self):
+        # read-only, no need to copy
+        return self
+
+    def __getstate__(self):
+        return self._msgpack_path, self._index, self._topics
+
+    def __setstate__(self, state):
+        self.__init__(*state[:2], topics=state[2])
+
+
+def load_pldata_file_lazy(directory, topic):
+    """Like `load_pldata_file()` but data and topics are read from disk on access."""
+    ts_file = os.path.join(directory, topic + "_timestamps.npy")
+    msgpack_file = os.path.join(directory, topic + ".pldata")
+    try:
+        data_ts = np.load(ts_file)
+        index = load_pldata_index(directory, topic)
+    except FileNotFoundError:
+        return PLData([], [], [])
+    data = Lazy_PLData_Sequence(msgpack_file, index)
+    return PLData(data, data_ts, data.topics)
+
+
+PLDATA_COLUMNS_SUFFIX = ".columns.npz"
+# Key of the total number of data in the pldata file; topics never start with "__"
+_PLDATA_COLUMNS_COUNT_KEY = "__count__"
+
+# Numeric fields that are stored in the columnar sidecar, by topic prefix. Missing
+# values are stored as NaN (float fields) or -1 (integer fields).
+_PLDATA_COLUMN_FIELDS = {
+    "pupil": (
+        ("timestamp", np.float64, ()),
+        ("confidence", np.float64, ()),
+        ("norm_pos", np.float64, (2,)),
+        ("diameter", np.float64, ()),
+        ("diameter_3d", np.float64, ()),
+        ("model_id", np.int64, ()),
+        ("model_confidence", np.float64, ()),
+        ("id", np.int64, ()),
+    ),
+    "gaze": (
+        ("timestamp", np.float64, ()),
+        ("confidence", np.float64, ()),
+        ("norm_pos", np.float64, (2,)),
+        ("gaze_point_3d", np.float64, (3,)),
+    ),
+}
+
+
+def pldata_columns_dtype(topic):
+    """Returns the structured dtype of the columnar sidecar for `topic`.
+
+    Returns None for topics without numeric columns. The `index` field refers to the
+    position of the datum in its pldata file.
+    """
+    fields = _PLDATA_COLUMN_FIELDS.get(topic.split(".", 1)[0])
+    if fields is None:
+        return None
+    return np.dtype([("index", np.int64)] + list(fields))
+
+
+def _pldata_columns_row(index, dtype, datum):
+    row = [index]
+    for name in dtype.names[1:]:
+        field_dtype = dtype.fields[name][0]
+        try:
+            value = datum[name]
+        except KeyError:
+            value = None
+        if value is None:
+            missing = -1 if field_dtype.base.kind == "i" else np.nan
+            value = np.full(field_dtype.shape, missing)[()]
+        row.append(value)
+    return tuple(row)
+
+
+class _PLData_Columns_Builder(object):
+    """Collects the numeric columns of pldata while it is being written or read.
+
+    Rows are converted to compact numpy chunks every `chunk_size` rows per topic.
+    """
+
+    def __init__(self, chunk_size=1000):
+        self.chunk_size = chunk_size
+        self.rows_by_topic = collections.defaultdict(list)
+        self.chunks_by_topic = collections.defaultdict(list)
+        self.valid = True
+
+    def append(self, index, topic, datum=None, datum_serialized=None):
+        dtype = pldata_columns_dtype(topic)
+        if dtype is None or not self.valid:
+            return
+        if datum is None:
+            datum = msgpack.unpackb(datum_serialized, raw=False, use_list=False)
+        rows = self.rows_by_topic[topic]
+        rows.append(_pldata_columns_row(index, dtype, datum))
+        if len(rows) >= self.chunk_size:
+            self._convert_rows(topic)
+
+    def _convert_rows(self, topic):
+        if not self.valid:
+            return
+        rows = self.rows_by_topic[topic]
+        try:
+            chunk = np.array(rows, dtype=pldata_columns_dtype(topic))
+        except (TypeError, ValueError):
+            logger.warning(f"Data with topic '{topic}' has unexpected types.")
+            logger.debug(tb.format_exc())
+            self.valid = False
+            self.rows_by_topic.clear()
+            self.chunks_by_topic.clear()
+            return
+        self.chunks_by_topic[topic].append(chunk)
+        rows.clear()
+
+    def save(self, directory, name, num_data):
+        columns_path = os.path.join(directory, name + PLDATA_COLUMNS_SUFFIX)
+        for topic in list(self.rows_by_topic.keys()):
+            self._convert_rows(topic)
+        columns_by_topic = {
+            topic: np.concatenate(chunks)
+            for topic, chunks in self.chunks_by_topic.items()
+        }
+
+        if not columns_by_topic:
+            # never leave a sidecar of a previous recording with the same name behind
+            if os.path.exists(columns_path):
+                os.remove(columns_path)
+            return
+        tmp_path = columns_path + ".writing"
+        columns_by_topic[_PLDATA_COLUMNS_COUNT_KEY] = np.array(num_data)
+        with open(tmp_path, "wb") as fh:
+            np.savez(fh, **columns_by_topic)
+        os.replace(tmp_path, columns_path)
+
+
+def load_pldata_columns(directory, topic):
+    """Loads the columnar sidecar of a pldata file, ordered like the pldata file.
+
+    Returns a structured numpy array with one row per datum, or None if the sidecar
+    is missing, outdated, or does not cover every datum of the pldata file.
+    """
+    columns_path = os.path.join(directory, topic + PLDATA_COLUMNS_SUFFIX)
+    msgpack_path = os.path.join(directory, topic + ".pldata")
+    try:
+        if os.path.getmtime(columns_path) < os.path.getmtime(msgpack_path):
+            logger.debug(f"Ignoring outdated columns file '{columns_path}'")
+            return None
+        with np.load(columns_path) as columns_file:
+            num_data = int(columns_file[_PLDATA_COLUMNS_COUNT_KEY])
+            columns_by_topic = [
+                columns_file[key]
+                for key in columns_file.files
+                if key != _PLDATA_COLUMNS_COUNT_KEY
+            ]
+    except FileNotFoundError:
+        return None
+    except (OSError, KeyError, ValueError, zipfile.BadZipFile):
+        logger.debug(f"Could not read columns file '{columns_path}'")
+        logger.debug(tb.format_exc())
+        return None
+
+    if len({columns.dtype for columns in columns_by_topic}) != 1:
+        return None
+    columns = np.concatenate(columns_by_topic)
+    columns = columns[np.argsort(columns["index"], kind="stable")]
+    if not np.array_equal(columns["index"], np.arange(num_data)):
+        return None
+    return columns
+
+
+def build_pldata_columns(directory, topic):
+    """Creates the columnar sidecar for an existing pldata file."""
+    builder = _PLData_Columns_Builder()
+    msgpack_path = os.path.join(directory, topic + ".pldata")
+    num_data = 0
+    with open(msgpack_path, "rb") as fh:
+        unpacker = msgpack.Unpacker(fh, raw=False, use_list=False)
+        for datum_topic, payload in unpacker:
+            builder.append(num_data, datum_topic, datum_serialized=payload)
+            num_data += 1
+    builder.save(directory, topic, num_data)
+
+
+PLDATA_TIMESTAMPS_RAW_SUFFIX = "_timestamps.raw"
+PLDATA_TIMESTAMPS_RAW_DTYPE = np.dtype("<f8")
+
+
+class PLData_Writer(object):
+    """Writes data to a pldata file and its timestamps, index and columns files
+
+    Timestamps and index are written to disk in chunks while writing. The raw
+    timestamps are converted to `<name>_timestamps.npy` on `close()`. If the writer
+    is never closed, e.g. due to a crash, `recover_pldata_timestamps()` restores the
+    timestamps from the pldata file.
+
+    Buffered data is written at least every `chunk_size` data or `flush_interval_s`
+    seconds and synced to the disk every `fsync_interval_s` seconds (never if None).
+    """
+
+    def __init__(
+        self,
+        directory,
+        name,
+        chunk_size=1000,
+        flush_interval_s=1.0,
+        fsync_interval_s=10.0,
+    ):
         super().__init__()
         self.directory = directory
         self.name = name
-        self.ts_queue = collections.deque()
+        self.chunk_size = chunk_size
+        self.flush_interval_s = flush_interval_s
+        self.fsync_interval_s = fsync_interval_s
+        self.num_data = 0
+        self.offset = 0
+        self.ts_chunk = []
+        self.index_chunk = []
+        self.columns_builder = _PLData_Columns_Builder()
+        self.last_flush = self.last_fsync = time.monotonic()
+
         file_name = name + ".pldata"
         self.file_handle = open(os.path.join(directory, file_name), "wb")
+        self.ts_raw_path = os.path.join(directory, name + PLDATA_TIMESTAMPS_RAW_SUFFIX)
+        self.ts_raw_handle = open(self.ts_raw_path, "wb")
+        index_path = os.path.join(directory, name + PLDATA_INDEX_SUFFIX)
+        self.index_handle = open(index_path, "wb")
 
     def append(self, datum):
         datum_serialized = msgpack.packb(datum, use_bin_type=True)
-        self.append_serialized(datum["timestamp"], datum["topic"], datum_serialized)
+        self.columns_builder.append(self.num_data, datum["topic"], datum=datum)
+        self._append(datum["timestamp"], datum["topic"], datum_serialized)
 
     def append_serialized(self, timestamp, topic, datum_serialized):
-        self.ts_queue.append(timestamp)
+        self.columns_builder.append(
+            self.num_data, topic, datum_serialized=datum_serialized
+        )
+        self._append(timestamp, topic, datum_serialized)
+
+    def _append(self, timestamp, topic, datum_serialized):
         pair = msgpack.packb((topic, datum_serialized), use_bin_type=True)
         self.file_handle.write(pair)
+        self.ts_chunk.append(timestamp)
+        self.index_chunk.append((self.offset, len(pair)))
+        self.offset += len(pair)
+        self.num_data += 1
+
+        if (
+            len(self.ts_chunk) >= self.chunk_size
+            or time.monotonic() - self.last_flush >= self.flush_interval_s
+        ):
+            self.flush()
 
     def extend(self, data):
         for datum in data:
             self.append(datum)
 
+    def flush(self):
+        # Flush pldata first, such that timestamps and index on disk never refer to
+        # data that has not been written yet.
+        self.file_handle.flush()
+        timestamps = np.array(self.ts_chunk, dtype=PLDATA_TIMESTAMPS_RAW_DTYPE)
+        self.ts_raw_handle.write(timestamps.tobytes())
+        self.ts_raw_handle.flush()
+        index = np.array(self.index_chunk, dtype=PLDATA_INDEX_DTYPE)
+        self.index_handle.write(index.tobytes())
+        self.index_handle.flush()
+        self.ts_chunk.clear()
+        self.index_chunk.clear()
+
+        now = self.last_flush = time.monotonic()
+        if (
+            self.fsync_interval_s is not None
+            and now - self.last_fsync >= self.fsync_interval_s
+        ):
+            for fh in (self.file_handle, self.ts_raw_handle, self.index_handle):
+                os.fsync(fh.fileno())
+            self.last_fsync = now
+
     def close(self):
-        self.file_handle.close()
-        self.file_handle = None
+        self.flush()
+        for fh in (self.file_handle, self.ts_raw_handle, self.index_handle):
+            fh.close()
+        self.file_handle = self.ts_raw_handle = self.index_handle = None
 
         ts_file = self.name + "_timestamps.npy"
         ts_path = os.path.join(self.directory, ts_file)
-        np.save(ts_path, self.ts_queue)
-        self.ts_queue = None
+        timestamps = np.fromfile(self.ts_raw_path, dtype=PLDATA_TIMESTAMPS_RAW_DTYPE)
+        np.save(ts_path, timestamps)
+        os.remove(self.ts_raw_path)
+
+        self.columns_builder.save(self.directory, self.name, self.num_data)
+        self.columns_builder = None
 
     def __enter__(self):
         return self
@@ -194,6 +591,241 @@ class PLData_Writer(object):
         self.close()
 
 
+# Upper bound for a single datum while searching the next intact datum after corrupt
+# data, such that a corrupt length field does not make us read the rest of the file
+_MAX_RESYNC_DATUM_SIZE = 16 * 1024 * 1024
+
+
+def recover_pldata_timestamps(directory, topic):
+    """Restores the timestamps of a pldata file whose writer was not closed.
+
+    Does nothing unless the raw timestamps of the writer are left over. Otherwise,
+    the timestamps are read from the data by streaming the pldata file. An
+    incompletely written datum or a zero-filled block at the end of the file, e.g.
+    after a power loss, is removed. Corrupt data in between is skipped and removed,
+    the data following it is kept.
+
+    Returns True if the timestamps were recovered.
+    """
+    ts_raw_path = os.path.join(directory, topic + PLDATA_TIMESTAMPS_RAW_SUFFIX)
+    if not os.path.exists(ts_raw_path):
+        return False
+
+    logger.warning(f"Recovering timestamps of incomplete file '{topic}.pldata'")
+    try:
+        _recover_pldata_timestamps(directory, topic)
+        os.remove(ts_raw_path)
+    except OSError as err:
+        logger.warning(f"Could not recover timestamps of '{topic}.pldata': {err}")
+        return False
+    return True
+
+
+def _recover_pldata_timestamps(directory, topic):
+    msgpack_path = os.path.join(directory, topic + ".pldata")
+    records = list(_scan_pldata_records(msgpack_path, topic))
+    index = np.array([record[:2] for record in records], dtype=PLDATA_INDEX_DTYPE)
+    timestamps = np.array(
+        [record[2] for record in records], dtype=PLDATA_TIMESTAMPS_RAW_DTYPE
+    )
+    end = int(index["offset"][-1] + index["length"][-1]) if len(index) else 0
+
+    if index["length"].sum() < end:
+        logger.warning(f"Removing corrupt data from '{topic}.pldata'")
+        tmp_path = msgpack_path + ".recovering"
+        with open(msgpack_path, "rb") as source, open(tmp_path, "wb") as target:
+            for offset, length in index:
+                source.seek(offset)
+                target.write(source.read(length))
+        os.replace(tmp_path, msgpack_path)
+        index["offset"] = np.cumsum(index["length"]) - index["length"]
+    elif os.path.getsize(msgpack_path) > end:
+        logger.warning(f"Removing incomplete data at the end of '{topic}.pldata'")
+        os.truncate(msgpack_path, end)
+
+    np.save(os.path.join(directory, topic + "_timestamps.npy"), timestamps)
+    index.tofile(os.path.join(directory, topic + PLDATA_INDEX_SUFFIX))
+
+
+def _scan_pldata_records(msgpack_path, topic):
+    """Yields offset, length and timestamp of each intact datum in a pldata file.
+
+    Corrupt data is skipped by searching the start of the next intact datum.
+    """
+    with open(msgpack_path, "rb") as fh:
+        size = os.fstat(fh.fileno()).st_size
+        if size == 0:
+            return
+        with mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            data_end = _zero_filled_tail_start(buffer, size)
+            corrupt_start = None
+            offset = 0
+            while offset < data_end:
+                buffer.seek(offset)
+                unpacker = msgpack.Unpacker(buffer, raw=False, use_list=False)
+                unpacker_start = offset
+                try:
+                    while offset < data_end:
+                        record = unpacker.unpack()
+                        stop = unpacker_start + unpacker.tell()
+                        timestamp = _pldata_record_timestamp(record)
+                        if timestamp is None:
+                            if corrupt_start is None:
+                                corrupt_start = offset
+                        else:
+                            if corrupt_start is not None:
+                                logger.warning(
+                                    f"Skipping {offset - corrupt_start} bytes of "
+                                    f"corrupt data in '{topic}.pldata'"
+                                )
+                                corrupt_start = None
+                            yield offset, stop - offset, timestamp
+                        offset = stop
+                except (msgpack.UnpackException, ValueError):
+                    # incomplete or unreadable datum
+                    if corrupt_start is None:
+                        corrupt_start = offset
+                    offset = _find_pldata_record(buffer, offset + 1, data_end)
+
+
+def _zero_filled_tail_start(buffer, size, chunk_size=1024 * 1024):
+    end = size
+    while end > 0:
+        start = max(end - chunk_size, 0)
+        non_zero = len(buffer[start:end].rstrip(b"\x00"))
+        if non_zero:
+            return start + non_zero
+        end = start
+    return 0
+
+
+def _find_pldata_record(buffer, start, stop):
+    """Returns the offset of the next intact datum in `buffer`, or `stop` if none."""
+    # every datum is a msgpack array of topic and payload, which starts with 0x92
+    offset = buffer.find(b"\x92", start, stop)
+    while offset != -1:
+        buffer.seek(offset)
+        unpacker = msgpack.Unpacker(
+            buffer,
+            raw=False,
+            use_list=False,
+            max_buffer_size=_MAX_RESYNC_DATUM_SIZE,
+        )
+        try:
+            if _pldata_record_timestamp(unpacker.unpack()) is not None:
+                return offset
+        except (msgpack.UnpackException, ValueError):
+            pass
+        offset = buffer.find(b"\x92", offset + 1, stop)
+    return stop
+
+
+def _pldata_record_timestamp(record):
+    """Returns the timestamp of a (topic, payload) record, or None if it is corrupt."""
+    try:
+        topic, payload = record
+        datum = msgpack.unpackb(payload, raw=False, use_list=False)
+        if not isinstance(topic, str):
+            return None
+        return float(datum["timestamp"])
+    except (msgpack.UnpackException, ValueError, TypeError, KeyError):
+        return None
+
+
+# further parts of a segmented pldata file are named `<name>.partNNN`, a suffix that
+# topic names do not use
+_PLDATA_PART_PATTERN = re.compile(r"^(?P<name>.+)\.part(?P<idx>\d{3,})$")
+
+
+def pldata_part_name(name, part_idx):
+    """Name of part `part_idx` of a segmented pldata file.
+
+    The first part has no suffix, further parts get a reserved, numbered suffix,
+    e.g. `gaze`, `gaze.part001`, `gaze.part002`.
+    """
+    return name if part_idx == 0 else f"{name}.part{part_idx:03d}"
+
+
+def find_pldata_parts(directory):
+    """Returns the names of segmented pldata files with their sorted further parts.
+
+    Only files named by `pldata_part_name()` are parts. Files like `sensor_100` are
+    topics of their own.
+    """
+    parts_by_name = collections.defaultdict(list)
+    for path in Path(directory).glob("*.part*.pldata"):
+        match = _PLDATA_PART_PATTERN.match(path.stem)
+        if match is not None:
+            part = int(match.group("idx")), path.stem
+            parts_by_name[match.group("name")].append(part)
+    return {
+        name: [part_name for _, part_name in sorted(parts)]
+        for name, parts in parts_by_name.items()
+    }
+
+
+def merge_pldata_parts(directory, name, part_names):
+    """Appends further parts of a segmented pldata file to `<name>.pldata`.
+
+    Data, timestamps and index are concatenated and the parts are removed. The
+    timestamps of all parts must be complete, see `recover_pldata_timestamps()`.
+    Parts that were merged already, but not removed, e.g. due to a crash, are not
+    merged twice.
+    """
+    msgpack_path = os.path.join(directory, name + ".pldata")
+    ts_path = os.path.join(directory, name + "_timestamps.npy")
+    index_path = os.path.join(directory, name + PLDATA_INDEX_SUFFIX)
+    parts_ts = [
+        np.load(os.path.join(directory, part + "_timestamps.npy"))
+        for part in part_names
+    ]
+    if os.path.exists(msgpack_path):
+        timestamps = [np.load(ts_path)]
+        index = [load_pldata_index(directory, name)]
+        offset = os.path.getsize(msgpack_path)
+    else:
+        timestamps, index, offset = [], [], 0
+
+    appended_ts = np.concatenate(parts_ts)
+    if timestamps and 0 < len(appended_ts) <= len(timestamps[0]):
+        already_merged = np.array_equal(
+            timestamps[0][-len(appended_ts) :], appended_ts
+        )
+    else:
+        already_merged = False
+
+    if already_merged:
+        logger.debug(f"Parts of '{name}.pldata' were merged already")
+    else:
+        tmp_path = msgpack_path + ".merging"
+        with open(tmp_path, "wb") as merged:
+            if offset:
+                with open(msgpack_path, "rb") as fh:
+                    shutil.copyfileobj(fh, merged)
+            for part, part_ts in zip(part_names, parts_ts):
+                part_index = load_pldata_index(directory, part).copy()
+                part_index["offset"] += offset
+                with open(os.path.join(directory, part + ".pldata"), "rb") as fh:
+                    shutil.copyfileobj(fh, merged)
+                offset = merged.tell()
+                timestamps.append(part_ts)
+                index.append(part_index)
+
+        os.replace(tmp_path, msgpack_path)
+        np.save(ts_path, np.concatenate(timestamps))
+        np.concatenate(index).astype(PLDATA_INDEX_DTYPE).tofile(index_path)
+
+    for part in [name] + list(part_names):
+        columns_path = os.path.join(directory, part + PLDATA_COLUMNS_SUFFIX)
+        if os.path.exists(columns_path):
+            os.remove(columns_path)  # outdated, rebuilt on demand
+    for part in part_names:
+        for suffix in (".pldata", "_timestamps.npy", PLDATA_INDEX_SUFFIX):
+            part_path = os.path.join(directory, part + suffix)
+            if os.path.exists(part_path):
+                os.remove(part_path)
+
+
 def next_export_sub_dir(root_export_dir):
     # match any sub directories or files a three digit pattern
     pattern = os.path.join(root_export_dir, "[0-9][0-9][0-9]")
@@ -207,15 +839,109 @@ def next_export_sub_dir(root_export_dir):
     return os.path.join(root_export_dir, next_sub_dir)
 
 
-class _Empty(object):
-    def purge_cache(self):
-        pass
+class Deserialization_Cache(object):
+    """LRU set of deserialized `Serialized_Dict`s, bounded by serialized bytes.
+
+    Whenever the budget `max_bytes` is exceeded, the least recently used entries
+    are purged, i.e. they drop their deserialized data but stay usable.
+    All operations are O(1).
+    """
+
+    DEFAULT_MAX_BYTES = 2 * 1024 * 1024
+
+    def __init__(self, name, max_bytes=DEFAULT_MAX_BYTES):
+        self.name = name
+        self.max_bytes = max_bytes
+        self.num_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = collections.OrderedDict()  # Serialized_Dict -> size
+        self._lock = threading.Lock()
+
+    def hit(self, item):
+        with self._lock:
+            self.hits += 1
+            try:
+                self._entries.move_to_end(item)
+            except KeyError:
+                # deserialized while another cache was active
+                self._insert(item)
+
+    def miss(self, item):
+        with self._lock:
+            self.misses += 1
+            if item in self._entries:
+                self._entries.move_to_end(item)
+            else:
+                self._insert(item)
+
+    def _insert(self, item):
+        size = len(item._ser_data)
+        self._entries[item] = size
+        self.num_bytes += size
+        # always keep the most recent entry, even if it exceeds the budget
+        while self.num_bytes > self.max_bytes and len(self._entries) > 1:
+            evicted, evicted_size = self._entries.popitem(last=False)
+            self.num_bytes -= evicted_size
+            self.evictions += 1
+            evicted.purge_cache()
+
+    def clear(self):
+        with self._lock:
+            for item in self._entries:
+                item.purge_cache()
+            self._entries.clear()
+            self.num_bytes = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                "name": self.name,
+                "entries": len(self._entries),
+                "bytes": self.num_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+_deserialization_caches = weakref.WeakSet()
+_named_deserialization_caches = {}
+_deserialization_caches_lock = threading.Lock()
+_thread_cache_state = threading.local()
+
+
+def _register_deserialization_cache(cache):
+    with _deserialization_caches_lock:
+        _deserialization_caches.add(cache)
+    return cache
+
+
+def _current_deserialization_cache():
+    try:
+        return _thread_cache_state.stack[-1]
+    except AttributeError:
+        # first use in this thread: start with a cache owned by the thread
+        name = "thread:" + threading.current_thread().name
+        cache = _register_deserialization_cache(Deserialization_Cache(name))
+        _thread_cache_state.stack = [cache]
+        return cache
+
+
+@contextlib.contextmanager
+def _use_deserialization_cache(cache):
+    _current_deserialization_cache()  # make sure the thread stack exists
+    _thread_cache_state.stack.append(cache)
+    try:
+        yield
+    finally:
+        _thread_cache_state.stack.remove(cache)
 
 
 class Serialized_Dict(object):
     __slots__ = ["_ser_data", "_data"]
-    cache_len = 100
-    _cache_ref = [_Empty()] * cache_len
     MSGPACK_EXT_CODE = 13
 
     def __init__(self, python_dict=None, msgpack_bytes=None):
@@ -232,16 +958,50 @@ class Serialized_Dict(object):
         self._data = None
 
     def _deser(self):
-        if not self._data:
-            self._data = msgpack.unpackb(
+        # Return the data instead of reading `self._data` afterwards, since the
+        # cache might purge it in the meantime, e.g. from another thread.
+        data = self._data
+        if data is None:
+            data = msgpack.unpackb(
                 self._ser_data,
                 raw=False,
                 use_list=False,
                 object_hook=self.unpacking_object_hook,
                 ext_hook=self.unpacking_ext_hook,
             )
-            self._cache_ref.pop(0).purge_cache()
-            self._cache_ref.append(self)
+            self._data = data
+            _current_deserialization_cache().miss(self)
+        else:
+            _current_deserialization_cache().hit(self)
+        return data
+
+    @staticmethod
+    @contextlib.contextmanager
+    def cache_scope(name, max_bytes=None):
+        """Use a separate, named deserialization cache within this context.
+
+        Consumers with their own access pattern (e.g. a sliding window over all
+        data) should use their own scope, such that they neither thrash nor are
+        thrashed by other consumers. Scopes with the same name share their cache.
+        By default, every thread uses its own cache.
+        """
+        with _deserialization_caches_lock:
+            cache = _named_deserialization_caches.get(name)
+            if cache is None:
+                cache = Deserialization_Cache(name)
+                _named_deserialization_caches[name] = cache
+                _deserialization_caches.add(cache)
+        if max_bytes is not None:
+            cache.max_bytes = max_bytes
+        with _use_deserialization_cache(cache):
+            yield cache
+
+    @staticmethod
+    def cache_stats():
+        """Statistics of all deserialization caches, see `Deserialization_Cache`."""
+        with _deserialization_caches_lock:
+            caches = list(_deserialization_caches)
+        return [cache.stats() for cache in caches]
 
     def __getstate__(self):
         return self._ser_data
@@ -278,12 +1038,10 @@ class Serialized_Dict(object):
         raise NotImplementedError()
 
     def __getitem__(self, key):
-        self._deser()
-        return self._data[key]
+        return self._deser()[key]
 
     def __repr__(self):
-        self._deser()
-        return "Serialized_Dict({})".format(repr(self._data))
+        return "Serialized_Dict({})".format(repr(self._deser()))
 
     @property
     def len(self):
@@ -292,8 +1050,7 @@ class Serialized_Dict(object):
         If __len__ is defined numpy will recognize this as nested structure and
         start deserializing everything instead of using this object as it is.
         """
-        self._deser()
-        return len(self._data)
+        return len(self._deser())
 
     def __delitem__(self, key):
         raise NotImplementedError()
@@ -308,45 +1065,37 @@ class Serialized_Dict(object):
         raise NotImplementedError()
 
     def copy(self):
-        self._deser()
-        return self._data.copy()
+        return self._deser().copy()
 
     def __deepcopy__(self, memo=None):
         return _recursive_deep_copy(self)
 
     def has_key(self, k):
-        self._deser()
-        return k in self._data
+        return k in self._deser()
 
     def update(self, *args, **kwargs):
         raise NotImplementedError()
 
     def keys(self):
-        self._deser()
-        return self._data.keys()
+        return self._deser().keys()
 
     def values(self):
-        self._deser()
-        return self._data.values()
+        return self._deser().values()
 
     def items(self):
-        self._deser()
-        return self._data.items()
+        return self._deser().items()
 
     def pop(self, *args):
         raise NotImplementedError()
 
     def __cmp__(self, dict_):
-        self._deser()
-        return self._data.__cmp__(dict_)
+        return self._deser().__cmp__(dict_)
 
     def __contains__(self, item):
-        self._deser()
-        return item in self._data
+        return item in self._deser()
 
     def __iter__(self):
-        self._deser()
-        return iter(self._data)
+        return iter(self._deser())
 
     def _deep_copy_serialized_dict(self):
         dict_copy = self._deep_copy_dict()
@@ -444,6 +1193,99 @@ def bench_load():
     print("loaded in %s" % (time.time() - start))
 
 
+def bench_deserialization_cache(
+    duration_s=10 * 60, gaze_rate_hz=400, num_seeks=50, seed=0
+):
+    """Compare the previous fixed-length FIFO cache with the LRU caches.
+
+    Replays the access patterns of scrubbing through a recording while
+    vis_polyline and vis_circle draw the gaze of each frame, interleaved with the
+    sliding window of the offline fixation detector.
+    """
+    import time
+
+    class _Legacy_FIFO_Cache(Deserialization_Cache):
+        # previous behavior: purge the oldest of 100 deserializations on a miss
+        def __init__(self):
+            super().__init__("legacy FIFO")
+            self._fifo = collections.deque([None] * 100)
+
+        def hit(self, item):
+            self.hits += 1
+
+        def miss(self, item):
+            self.misses += 1
+            purged = self._fifo.popleft()
+            if purged is not None:
+                purged.purge_cache()
+                self.evictions += 1
+            self._fifo.append(item)
+
+    rng = np.random.default_rng(seed)
+    num_gaze = duration_s * gaze_rate_hz
+    gaze_per_frame = gaze_rate_hz // 30
+    window_len = gaze_rate_hz  # 1 s max fixation duration
+
+    def make_gaze():
+        datum = {
+            "topic": "gaze.3d.01.",
+            "norm_pos": [0.5, 0.5],
+            "confidence": 0.9,
+            "timestamp": 0.0,
+            "gaze_point_3d": [0.0, 0.0, 500.0],
+            "base_data": [{"topic": "pupil", "diameter": 0.0, "norm_pos": [0, 0]}],
+        }
+        return [
+            Serialized_Dict(python_dict=dict(datum, timestamp=idx / gaze_rate_hz))
+            for idx in range(num_gaze)
+        ]
+
+    def replay(gaze, player_cache, fixation_cache):
+        fixation_start = 0
+        for _ in range(num_seeks):
+            frame = int(rng.integers(0, num_gaze // gaze_per_frame - 30))
+            for frame in range(frame, frame + 30):
+                # scrubbing: vis_polyline and vis_circle read the frame's gaze
+                frame_gaze = gaze[frame * gaze_per_frame : (frame + 1) * gaze_per_frame]
+                with _use_deserialization_cache(player_cache):
+                    for _visualizer in range(2):
+                        for datum in frame_gaze:
+                            datum["norm_pos"], datum["confidence"]
+                # fixation detector: scan its window, then move forward
+                window = gaze[fixation_start : fixation_start + window_len]
+                with _use_deserialization_cache(fixation_cache):
+                    window[-1]["timestamp"] - window[0]["timestamp"]
+                    for datum in window:
+                        datum["gaze_point_3d"]
+                fixation_start = (fixation_start + window_len // 8) % (
+                    num_gaze - window_len
+                )
+
+    legacy = _Legacy_FIFO_Cache()
+    shared = Deserialization_Cache("shared")
+    variants = [
+        ("legacy FIFO, 100 items", legacy, legacy),
+        ("LRU, shared 2 MB", shared, shared),
+        (
+            "LRU, per consumer 2 MB + 16 MB",
+            Deserialization_Cache("player"),
+            Deserialization_Cache("fixations", max_bytes=16 * 1024 * 1024),
+        ),
+    ]
+    for name, player_cache, fixation_cache in variants:
+        gaze = make_gaze()
+        start = time.perf_counter()
+        replay(gaze, player_cache, fixation_cache)
+        duration = time.perf_counter() - start
+        caches = {id(player_cache): player_cache, id(fixation_cache): fixation_cache}
+        hits = sum(cache.hits for cache in caches.values())
+        misses = sum(cache.misses for cache in caches.values())
+        print(
+            f"{name:32s} {duration:6.2f} s, {misses:8d} deserializations,"
+            f" hit rate {hits / max(1, hits + misses):.1%}"
+        )
+
+
 if __name__ == "__main__":
     import sys
 
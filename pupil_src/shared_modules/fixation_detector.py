@@ -159,6 +159,26 @@ def can_use_3d_gaze_mapping(gaze_data) -> bool:
 
 def detect_fixations(
     capture, gaze_data, max_dispersion, min_duration, max_duration, min_data_confidence
+):
+    # The sliding window visits its gaze data many times. Use a dedicated
+    # deserialization cache that can hold a complete window of `max_duration`.
+    with fm.Serialized_Dict.cache_scope(
+        "fixation_detector", max_bytes=16 * 1024 * 1024
+    ):
+        return (
+            yield from _detect_fixations(
+                capture,
+                gaze_data,
+                max_dispersion,
+                min_duration,
+                max_duration,
+                min_data_confidence,
+            )
+        )
+
+
+def _detect_fixations(
+    capture, gaze_data, max_dispersion, min_duration, max_duration, min_data_confidence
 ):
     yield "Detecting fixations...", ()
     gaze_data = (
@@ -0,0 +1,607 @@
+"""
+(*)~---------------------------------------------------------------------------
+Pupil - eye tracking platform
+Copyright (C) 2012-2020 Pupil Labs
+
+Distributed under the terms of the GNU
+Lesser General Public License (LGPL v3.0).
+See COPYING and COPYING.LESSER for license details.
+---------------------------------------------------------------------------~(*)
+"""
+
+import ctypes
+import logging
+import mmap
+import multiprocessing as mp
+import os
+import tempfile
+import time
+import typing as T
+
+import cv2
+import numpy as np
+import psutil
+
+try:
+    from multiprocessing import shared_memory
+except ImportError:  # Python < 3.8
+    shared_memory = None
+
+logger = logging.getLogger(__name__)
+
+# the ring holds as many frames as fit into this budget, within the slot limits
+DEFAULT_RING_BYTES = 32 * 1024 ** 2
+MIN_NUM_SLOTS = 4
+MAX_NUM_SLOTS = 60
+MAX_CONSUMERS = 16
+
+# consumers and servers that did not show a sign of life for this long are gone
+STALE_AFTER_SECONDS = 30.0
+# consumers check if the server process is still running after this long
+_CHECK_SERVER_AFTER_SECONDS = 1.0
+
+_POLL_INTERVAL_SECONDS = 0.001
+_IDLE_INTERVAL_SECONDS = 0.05
+
+_HEADER_DTYPE = np.dtype(
+    [
+        ("num_slots", np.int64),
+        ("width", np.int64),
+        ("height", np.int64),
+        ("frame_count", np.int64),
+        ("head", np.int64),  # next sequence number to be written
+        ("frames_written", np.int64),
+        ("closed", np.int64),
+        ("failed", np.int64),
+        ("server_pid", np.int64),
+        ("heartbeat", np.float64),
+    ]
+)
+_CONSUMER_DTYPE = np.dtype(
+    [
+        ("active", np.int64),
+        ("start", np.int64),
+        ("end", np.int64),
+        ("first_index", np.int64),
+        ("last_index", np.int64),
+        ("cursor", np.int64),  # oldest sequence number the consumer still uses
+        ("heartbeat", np.float64),
+    ]
+)
+_SLOT_DTYPE = np.dtype(
+    [
+        ("seq", np.int64),
+        ("index", np.int64),
+        ("timestamp", np.float64),
+        ("is_fake", np.int64),
+    ]
+)
+
+
+class Frame_Server_Error(Exception):
+    pass
+
+
+class Frame_Consumer_Handle(T.NamedTuple):
+    """Identifies a registered consumer. Can be passed to other processes."""
+
+    ring_name: str
+    consumer_id: int
+
+
+class Gray_Frame:
+    """Grayscale frame of the frame server.
+
+    `gray` is a view on the ring buffer. It stays valid until the frame after the
+    next one is requested from the consumer, copy it to keep it any longer.
+    """
+
+    def __init__(self, index, timestamp, gray, is_fake):
+        self.index = int(index)
+        self.timestamp = float(timestamp)
+        self.gray = gray
+        self.height, self.width = gray.shape
+        self.is_fake = bool(is_fake)
+
+    @property
+    def img(self):
+        return cv2.cvtColor(self.gray, cv2.COLOR_GRAY2BGR)
+
+    @property
+    def bgr(self):
+        return self.img
+
+
+class _Mapped_File:
+    """Memory mapped file with the interface of `shared_memory.SharedMemory`.
+
+    Used if shared memory is not available, i.e. before Python 3.8. Unlike shared
+    memory, the file is not removed if the process that created it crashes.
+    """
+
+    def __init__(self, name=None, create=False, size=0):
+        if create:
+            # tmpfs on Linux, the ring never touches the disk
+            directory = "/dev/shm" if os.path.isdir("/dev/shm") else None
+            fd, name = tempfile.mkstemp(prefix="pupil_frames_", dir=directory)
+            with os.fdopen(fd, "wb") as file:
+                file.truncate(size)
+        self.name = name
+        with open(name, "r+b") as file:
+            self._mmap = mmap.mmap(file.fileno(), 0)
+        self.buf = memoryview(self._mmap)
+
+    def close(self):
+        self.buf.release()
+        self._mmap.close()
+
+    def unlink(self):
+        os.remove(self.name)
+
+
+def _create_block(size):
+    """Creates a shared memory block of `size` bytes and reserves its pages.
+
+    On Linux, blocks are files in /dev/shm that are created sparse. If the tmpfs is
+    too small, e.g. 64 MB in Docker containers by default, writing to the block
+    would kill the writing process with SIGBUS. Reserving fails with an OSError.
+    """
+    if shared_memory is None:
+        block = _Mapped_File(create=True, size=size)
+        path = block.name
+    else:
+        # the resource tracker removes the block if Player crashes
+        block = shared_memory.SharedMemory(create=True, size=size)
+        path = os.path.join("/dev/shm", block.name.lstrip("/"))
+    if hasattr(os, "posix_fallocate") and os.path.exists(path):
+        try:
+            fd = os.open(path, os.O_RDWR)
+            try:
+                os.posix_fallocate(fd, 0, size)
+            finally:
+                os.close(fd)
+        except OSError:
+            _close_block(block)
+            block.unlink()
+            raise
+    return block
+
+
+def _attach_block(name):
+    if shared_memory is None:
+        return _Mapped_File(name)
+    return shared_memory.SharedMemory(name=name)
+
+
+# blocks that could not be closed yet, because frames still reference them
+_unclosed_blocks = []
+
+
+def _close_block(block):
+    _unclosed_blocks.append(block)
+    for pending in list(_unclosed_blocks):
+        try:
+            pending.close()
+        except BufferError:
+            # views must not outlive the mapping, try again on the next close
+            continue
+        _unclosed_blocks.remove(pending)
+
+
+def _is_running(pid):
+    try:
+        # the server is a zombie until Player reaps it
+        return psutil.Process(pid).status() != psutil.STATUS_ZOMBIE
+    except psutil.NoSuchProcess:
+        return False
+
+
+class _Frame_Ring:
+    """Ring buffer of grayscale frames in a shared memory block.
+
+    The server writes frames with increasing sequence numbers, the frame index of
+    sequence number `seq` is `seq % frame_count`. Every field has a single writer:
+    the server writes the frames and the head, consumers write their cursor and
+    heartbeat, the process owning the Frame_Server registers consumers.
+    """
+
+    def __init__(self, name, block=None):
+        self.name = name
+        self._block = block or _attach_block(name)
+        # numpy does not keep the buffer exported, ctypes does. Thereby, the block
+        # cannot be closed as long as views on it, e.g. frames, are referenced.
+        buffer = (ctypes.c_uint8 * len(self._block.buf)).from_buffer(self._block.buf)
+        self.header = np.ndarray((), _HEADER_DTYPE, buffer=buffer)
+        offset = _HEADER_DTYPE.itemsize
+        self.consumers = np.ndarray(
+            MAX_CONSUMERS, _CONSUMER_DTYPE, buffer=buffer, offset=offset
+        )
+        offset += self.consumers.nbytes
+        num_slots = int(self.header["num_slots"])
+        self.slots = np.ndarray(num_slots, _SLOT_DTYPE, buffer=buffer, offset=offset)
+        offset += self.slots.nbytes
+        self.pixels = np.ndarray(
+            (num_slots, int(self.header["height"]), int(self.header["width"])),
+            np.uint8,
+            buffer=buffer,
+            offset=offset,
+        )
+
+    @staticmethod
+    def size(num_slots, width, height) -> int:
+        return (
+            _HEADER_DTYPE.itemsize
+            + MAX_CONSUMERS * _CONSUMER_DTYPE.itemsize
+            + num_slots * (_SLOT_DTYPE.itemsize + width * height)
+        )
+
+    @classmethod
+    def create(cls, num_slots, width, height, frame_count) -> "_Frame_Ring":
+        block = _create_block(cls.size(num_slots, width, height))
+        header = np.ndarray((), _HEADER_DTYPE, buffer=block.buf)
+        header["num_slots"] = num_slots
+        header["width"] = width
+        header["height"] = height
+        header["frame_count"] = frame_count
+        header["heartbeat"] = time.monotonic()
+        ring = cls(block.name, block)
+        ring.slots["seq"] = -1
+        return ring
+
+    def close(self):
+        del self.header, self.consumers, self.slots, self.pixels
+        _close_block(self._block)
+
+    def unlink(self):
+        self._block.unlink()
+
+    @property
+    def frame_count(self) -> int:
+        return int(self.header["frame_count"])
+
+    @property
+    def num_slots(self) -> int:
+        return int(self.header["num_slots"])
+
+    def next_needed_seq(self, consumer_id, seq) -> T.Optional[int]:
+        """First sequence number >= `seq` that the consumer wants to receive."""
+        consumer = self.consumers[consumer_id]
+        seq = max(seq, int(consumer["start"]))
+        frame_idx = seq % self.frame_count
+        first_index, last_index = consumer["first_index"], consumer["last_index"]
+        if frame_idx < first_index:
+            seq += first_index - frame_idx
+        elif frame_idx > last_index:
+            seq += self.frame_count - frame_idx + first_index
+        return int(seq) if seq < consumer["end"] else None
+
+    def live_consumer_ids(self) -> T.List[int]:
+        return [
+            consumer_id
+            for consumer_id, consumer in enumerate(self.consumers)
+            if consumer["active"] and consumer["cursor"] < consumer["end"]
+        ]
+
+
+def _serve_frames(ring_name, source_path):
+    """Runs in the server process: decodes frames that registered consumers need."""
+    from types import SimpleNamespace
+
+    from video_capture import EndofVideoError, File_Source
+
+    ring = _Frame_Ring(ring_name)
+    try:
+        src = File_Source(
+            SimpleNamespace(),
+            source_path=source_path,
+            timing=None,
+            fill_gaps=True,
+            buffered_decoding=True,
+            frame_cache_bytes=0,
+        )
+        fake_gray = np.full(ring.pixels.shape[1:], 128, dtype=np.uint8)
+        while not ring.header["closed"]:
+            now = time.monotonic()
+            ring.header["heartbeat"] = now
+            consumer_ids = []
+            for consumer_id in ring.live_consumer_ids():
+                if now - ring.consumers[consumer_id]["heartbeat"] > STALE_AFTER_SECONDS:
+                    logger.debug(f"Frame consumer {consumer_id} is gone")
+                    ring.consumers[consumer_id]["active"] = 0
+                else:
+                    consumer_ids.append(consumer_id)
+
+            head = int(ring.header["head"])
+            needed = [ring.next_needed_seq(c_id, head) for c_id in consumer_ids]
+            needed = [seq for seq in needed if seq is not None]
+            if not needed:
+                time.sleep(_IDLE_INTERVAL_SECONDS)
+                continue
+            seq = min(needed)
+            # backpressure: do not overwrite frames that consumers still use
+            oldest_in_use = min(ring.consumers["cursor"][consumer_ids])
+            if seq - oldest_in_use >= ring.num_slots:
+                time.sleep(_POLL_INTERVAL_SECONDS)
+                continue
+
+            frame_idx = seq % ring.frame_count
+            if frame_idx != src.get_frame_index() + 1:
+                src.seek_to_frame(frame_idx)
+            try:
+                frame = src.get_frame()
+            except EndofVideoError:
+                frame = None
+
+            slot = seq % ring.num_slots
+            if frame is None or frame.is_fake:
+                ring.pixels[slot] = fake_gray
+                is_fake = True
+            else:
+                ring.pixels[slot] = frame.gray
+                is_fake = False
+            timestamp = src.timestamps[frame_idx] if frame is None else frame.timestamp
+            ring.slots[slot] = (seq, frame_idx, timestamp, is_fake)
+            ring.header["frames_written"] += 1
+            ring.header["head"] = seq + 1
+        src.cleanup()
+    except Exception:
+        ring.header["failed"] = 1
+        logger.exception("Frame server failed")
+    finally:
+        ring.close()
+
+
+class Frame_Server:
+    """Decodes a video once for any number of consumers in other processes.
+
+    Frames are converted to grayscale and handed out through a ring buffer in
+    shared memory. Every consumer gets every frame of its frame index range once,
+    starting at the frame that is currently decoded, or at the start of its range.
+    The decoder waits for the slowest consumer, such that frames are never dropped.
+
+    The server process is started with the first consumer. Consumers that register
+    together share one decoding pass. The ring holds `num_slots` frames, by default
+    as many as fit into `DEFAULT_RING_BYTES`.
+    """
+
+    def __init__(self, source_path, frame_size, frame_count, num_slots=None):
+        self.source_path = str(source_path)
+        self.frame_size = tuple(frame_size)
+        self.frame_count = int(frame_count)
+        width, height = self.frame_size
+        self.num_slots = num_slots or min(
+            max(DEFAULT_RING_BYTES // max(width * height, 1), MIN_NUM_SLOTS),
+            MAX_NUM_SLOTS,
+        )
+        self._ring = None
+        self._process = None
+
+    def register_consumer(
+        self, frame_index_range=None, from_start=False
+    ) -> T.Optional[Frame_Consumer_Handle]:
+        """Registers a consumer for frames in `frame_index_range` (inclusive).
+
+        With `from_start`, frames are received in order of their index, otherwise
+        the first frame is the one that is currently decoded. Returns None if no
+        more consumers can be registered, or if `from_start` is requested while
+        other consumers are in the middle of a pass. Decode privately in that case,
+        instead of waiting for the pass to finish.
+        """
+        if self.frame_count == 0:
+            return None
+        if not self._server_alive():
+            self.shutdown()
+            try:
+                self._start()
+            except OSError as err:
+                logger.warning(f"Could not start frame server: {err}")
+                self.shutdown()
+                return None
+        ring = self._ring
+
+        free_ids = np.flatnonzero(ring.consumers["active"] == 0)
+        if not free_ids.size:
+            logger.debug("Maximum number of frame consumers reached")
+            return None
+        consumer_id = int(free_ids[0])
+
+        first_index, last_index = frame_index_range or (0, self.frame_count - 1)
+        first_index = max(0, int(first_index))
+        last_index = min(self.frame_count - 1, int(last_index))
+        if first_index > last_index:
+            return None
+
+        head = int(ring.header["head"])
+        if not ring.live_consumer_ids():
+            # start the next pass, the server skips to it since nobody needs frames
+            start = -(-head // self.frame_count) * self.frame_count
+        elif from_start and head % self.frame_count:
+            logger.debug("Frame server is busy, consumer should decode on its own")
+            return None
+        else:
+            start = head
+
+        consumer = ring.consumers[consumer_id]
+        consumer["start"] = start
+        consumer["end"] = start + self.frame_count
+        consumer["first_index"] = first_index
+        consumer["last_index"] = last_index
+        consumer["cursor"] = ring.next_needed_seq(consumer_id, start)
+        consumer["heartbeat"] = time.monotonic()
+        consumer["active"] = 1
+        return Frame_Consumer_Handle(ring.name, consumer_id)
+
+    def release_consumer(self, handle: T.Optional[Frame_Consumer_Handle]):
+        """Releases a consumer, e.g. after its process was canceled."""
+        if handle is None or self._ring is None or handle.ring_name != self._ring.name:
+            return
+        self._ring.consumers[handle.consumer_id]["active"] = 0
+
+    def shutdown(self):
+        if self._ring is None:
+            return
+        self._ring.header["closed"] = 1
+        if self._process is not None:
+            self._process.join(timeout=1.0)
+            if self._process.is_alive():
+                self._process.terminate()
+        ring = self._ring
+        self._ring = None
+        self._process = None
+        ring.close()
+        try:
+            ring.unlink()
+        except OSError:
+            # still mapped by a consumer on Windows
+            logger.debug(f"Could not remove frame ring: {ring.name}")
+
+    def _server_alive(self):
+        return (
+            self._process is not None
+            and self._process.is_alive()
+            and not self._ring.header["failed"]
+        )
+
+    def _start(self):
+        width, height = self.frame_size
+        self._ring = _Frame_Ring.create(self.num_slots, width, height, self.frame_count)
+        # decoding is not fork-safe
+        self._process = mp.get_context("spawn").Process(
+            target=_serve_frames,
+            name="Frame Server",
+            args=(self._ring.name, self.source_path),
+        )
+        self._process.daemon = True
+        self._process.start()
+        self._ring.header["server_pid"] = self._process.pid
+
+
+class Frame_Consumer:
+    """Receives the frames of a registered consumer, in any process."""
+
+    def __init__(self, handle: Frame_Consumer_Handle):
+        self._handle = Frame_Consumer_Handle(*handle)
+        self._ring = _Frame_Ring(self._handle.ring_name)
+
+    @property
+    def frame_count(self) -> int:
+        """Number of frames the consumer receives."""
+        consumer = self._ring.consumers[self._handle.consumer_id]
+        return int(consumer["last_index"] - consumer["first_index"] + 1)
+
+    def __iter__(self) -> T.Iterator[Gray_Frame]:
+        ring = self._ring
+        consumer_id = self._handle.consumer_id
+        consumer = ring.consumers[consumer_id]
+        try:
+            seq = ring.next_needed_seq(consumer_id, consumer["start"])
+            while seq is not None and self._ring is not None:
+                self._wait_for(seq, ring, consumer)
+                slot = seq % ring.num_slots
+                seq_written, index, timestamp, is_fake = ring.slots[slot].item()
+                if seq_written != seq:
+                    raise Frame_Server_Error(f"Frame {index} was overwritten")
+                yield Gray_Frame(index, timestamp, ring.pixels[slot], is_fake)
+                # the previous frame stays valid, e.g. for optical flow
+                consumer["cursor"] = seq
+                seq = ring.next_needed_seq(consumer_id, seq + 1)
+        finally:
+            del consumer
+            self.release()
+
+    def release(self):
+        """Stops receiving frames. The server does not wait for this consumer."""
+        if self._ring is not None:
+            self._ring.consumers[self._handle.consumer_id]["active"] = 0
+            self._ring.close()
+            self._ring = None
+
+    @staticmethod
+    def _wait_for(seq, ring, consumer):
+        while ring.header["head"] <= seq:
+            now = time.monotonic()
+            consumer["heartbeat"] = now
+            if not consumer["active"]:
+                raise Frame_Server_Error("Consumer was released")
+            if ring.header["failed"] or ring.header["closed"]:
+                raise Frame_Server_Error("Frame server stopped")
+            silent_for = now - ring.header["heartbeat"]
+            if silent_for > _CHECK_SERVER_AFTER_SECONDS and not _is_running(
+                int(ring.header["server_pid"])
+            ):
+                # killed without a chance to report it, e.g. by a signal
+                raise Frame_Server_Error("Frame server died")
+            if silent_for > STALE_AFTER_SECONDS:
+                raise Frame_Server_Error("Frame server is not responding")
+            time.sleep(_POLL_INTERVAL_SECONDS)
+        consumer["heartbeat"] = time.monotonic()
+
+
+def _bench_private_consumer(source_path):
+    from types import SimpleNamespace
+
+    from video_capture import EndofVideoError, File_Source
+
+    src = File_Source(
+        SimpleNamespace(), source_path=source_path, timing=None, fill_gaps=True
+    )
+    while True:
+        try:
+            cv2.mean(src.get_frame().gray)
+        except EndofVideoError:
+            return
+
+
+def _bench_shared_consumer(handle):
+    for frame in Frame_Consumer(handle):
+        cv2.mean(frame.gray)
+
+
+def bench_shared_decoding(
+    rec_dir="frame_server_bench", num_frames=1800, num_consumers=4
+):
+    """Runs `num_consumers` analyses on a 720p video, each in its own process.
+
+    Compares decoding the video in every process with one frame server.
+    """
+    from types import SimpleNamespace
+
+    from video_capture.file_backend import File_Source, _bench_write_h264_video
+
+    os.makedirs(rec_dir, exist_ok=True)
+    source_path = os.path.join(rec_dir, "world.mp4")
+    if not os.path.exists(source_path):
+        _bench_write_h264_video(rec_dir, num_frames=num_frames, size=(1280, 720))
+    src = File_Source(SimpleNamespace(), source_path=source_path, timing=None)
+    frame_size, frame_count = src.frame_size, src.get_frame_count()
+    src.cleanup()
+
+    context = mp.get_context("spawn")
+    start = time.perf_counter()
+    processes = [
+        context.Process(target=_bench_private_consumer, args=(source_path,))
+        for _ in range(num_consumers)
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+    print(f"{num_consumers} private decoders {time.perf_counter() - start:6.2f} s")
+
+    server = Frame_Server(source_path, frame_size, frame_count)
+    start = time.perf_counter()
+    handles = [server.register_consumer() for _ in range(num_consumers)]
+    processes = [
+        context.Process(target=_bench_shared_consumer, args=(handle,))
+        for handle in handles
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+    frames_written = int(server._ring.header["frames_written"])
+    server.shutdown()
+    print(
+        f"1 frame server       {time.perf_counter() - start:6.2f} s,"
+        f" decoded {frames_written} frames for {num_consumers} consumers"
+    )
@@ -188,52 +188,12 @@ class Gazer2D(GazerBase):
     def predict(
         self, matched_pupil_data: T.Iterator[T.List["Pupil"]]
     ) -> T.Iterator["Gaze"]:
-        for pupil_match in matched_pupil_data:
-            num_matched = len(pupil_match)
-            gaze_positions = ...  # Placeholder for gaze_positions
-
-            if num_matched == 2:
-                if self.binocular_model.is_fitted:
-                    right = self._extract_pupil_features([pupil_match[0]])
-                    left = self._extract_pupil_features([pupil_match[1]])
-                    X = np.hstack([left, right])
-                    assert X.shape[1] == _BINOCULAR_FEATURE_COUNT
-                    gaze_positions = self.binocular_model.predict(X).tolist()
-                    topic = "gaze.2d.01."
-                else:
-                    logger.debug(
-                        "Prediction failed because binocular model is not fitted"
-                    )
-            elif num_matched == 1:
-                X = self._extract_pupil_features([pupil_match[0]])
-                assert X.shape[1] == _MONOCULAR_FEATURE_COUNT
-                if pupil_match[0]["id"] == 0:
-                    if self.right_model.is_fitted:
-                        gaze_positions = self.right_model.predict(X).tolist()
-                        topic = "gaze.2d.0."
-                    else:
-                        logger.debug(
-                            "Prediction failed because right model is not fitted"
-                        )
-                elif pupil_match[0]["id"] == 1:
-                    if self.left_model.is_fitted:
-                        gaze_positions = self.left_model.predict(X).tolist()
-                        topic = "gaze.2d.1."
-                    else:
-                        logger.debug(
-                            "Prediction failed because left model is not fitted"
-                        )
-            else:
-                raise ValueError(
-                    f"Unexpected number of matched pupil_data: {num_matched}"
-                )
-
-            if gaze_positions is ...:
-                continue  # Prediction failed and the reason was logged
-
-            for gaze_pos in gaze_positions:
+        batches = self._batches_to_predict(matched_pupil_data)
+        for model, eye_ids, pupil_matches, X in batches:
+            gaze_positions = model.predict(X).tolist()
+            for pupil_match, gaze_pos in zip(pupil_matches, gaze_positions):
                 gaze_datum = {
-                    "topic": topic,
+                    "topic": f"gaze.2d.{eye_ids}.",
                     "norm_pos": gaze_pos,
                     "confidence": np.mean([p["confidence"] for p in pupil_match]),
                     "timestamp": np.mean([p["timestamp"] for p in pupil_match]),
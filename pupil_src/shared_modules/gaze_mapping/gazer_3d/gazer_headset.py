@@ -24,7 +24,6 @@ from gaze_mapping.gazer_base import (
     FitDidNotConvergeError,
 )
 
-from methods import normalize
 from .calibrate_3d import (
     calibrate_binocular,
     calibrate_monocular,
@@ -34,8 +33,6 @@ from .utils import (
     get_eye_cam_pose_in_world,
 )
 
-from .utils import _clamp_norm_point
-
 
 logger = logging.getLogger(__name__)
 
@@ -53,6 +50,22 @@ _BINOCULAR_SPHERE_CENTER = slice(8, 11)
 _BINOCULAR_PUPIL_NORMAL = slice(11, 14)
 
 
+def _to_world(eye_camera_to_world_matrix, points):
+    rotation = eye_camera_to_world_matrix[:3, :3]
+    translation = eye_camera_to_world_matrix[:3, 3]
+    return points @ rotation.T + translation
+
+
+def _normalize_image_points(image_points, resolution):
+    width, height = resolution
+    norm_points = np.empty_like(image_points, dtype=float)
+    norm_points[:, 0] = image_points[:, 0] / float(width)
+    norm_points[:, 1] = 1 - image_points[:, 1] / float(height)
+    # clamp like `_clamp_norm_point()`
+    norm_points = np.clip(norm_points, -100.0, 100.0)
+    return [tuple(norm_point) for norm_point in norm_points.tolist()]
+
+
 class Model3D(Model):
     @abc.abstractmethod
     def _fit(self, *args, **kwargs):
@@ -81,10 +94,12 @@ class Model3D(Model):
         self._is_fitted = True
 
     def predict(self, X):
+        """Returns a gaze dict per sample, or None if the prediction failed."""
         assert X.ndim == 2
-        predictions = (self._predict_single(x) for x in X)
-        predictions = filter(bool, predictions)
-        return predictions
+        return self._predict_batch(X)
+
+    def _predict_batch(self, X):
+        return [self._predict_single(x) for x in X]
 
     def set_params(self, **params):
         self._params = params
@@ -148,38 +163,40 @@ class Model3D_Monocular(Model3D):
 
     def _predict_single(self, x):
         assert x.ndim == 1, x
-        assert x.shape[0] == _MONOCULAR_FEATURE_COUNT, x
-        pupil_normal = x[_MONOCULAR_PUPIL_NORMAL]
-        sphere_center = x[_MONOCULAR_SPHERE_CENTER]
-        gaze_point = pupil_normal * self.gaze_distance + sphere_center
-
-        eye_center = self._toWorld(sphere_center)
-        gaze_3d = self._toWorld(gaze_point)
-        normal_3d = np.dot(self.rotation_matrix, pupil_normal)
-
-        g = {
-            "eye_center_3d": eye_center.tolist(),
-            "gaze_normal_3d": normal_3d.tolist(),
-            "gaze_point_3d": gaze_3d.tolist(),
-        }
+        return self._predict_batch(x[np.newaxis])[0]
+
+    def _predict_batch(self, X):
+        assert X.shape[1] == _MONOCULAR_FEATURE_COUNT, X
+        pupil_normals = X[:, _MONOCULAR_PUPIL_NORMAL]
+        sphere_centers = X[:, _MONOCULAR_SPHERE_CENTER]
+        gaze_points = pupil_normals * self.gaze_distance + sphere_centers
+
+        eye_centers = _to_world(self.eye_camera_to_world_matrix, sphere_centers)
+        gaze_3d = _to_world(self.eye_camera_to_world_matrix, gaze_points)
+        normals_3d = pupil_normals @ self.rotation_matrix.T
+
+        predictions = [
+            {
+                "eye_center_3d": eye_center,
+                "gaze_normal_3d": normal_3d,
+                "gaze_point_3d": gaze_point,
+            }
+            for eye_center, normal_3d, gaze_point in zip(
+                eye_centers.tolist(), normals_3d.tolist(), gaze_3d.tolist()
+            )
+        ]
 
         if self.intrinsics is not None:
-            image_point = self.intrinsics.projectPoints(
-                gaze_point[np.newaxis], self.rotation_vector, self.translation_vector
+            image_points = self.intrinsics.projectPoints(
+                gaze_points, self.rotation_vector, self.translation_vector
             )
-            image_point = image_point.reshape(-1, 2)
-            image_point = normalize(
-                image_point[0], self.intrinsics.resolution, flip_y=True
+            image_points = _normalize_image_points(
+                image_points.reshape(-1, 2), self.intrinsics.resolution
             )
-            image_point = _clamp_norm_point(image_point)
-            g["norm_pos"] = image_point
-
-        return g
+            for g, image_point in zip(predictions, image_points):
+                g["norm_pos"] = image_point
 
-    def _toWorld(self, p):
-        point = np.ones(4)
-        point[:3] = p[:3]
-        return np.dot(self.eye_camera_to_world_matrix, point)[:3]
+        return predictions
 
 
 class Model3D_Binocular(Model3D):
@@ -247,73 +264,72 @@ class Model3D_Binocular(Model3D):
 
     def _predict_single(self, x):
         assert x.ndim == 1, x
-        assert x.shape[0] == _BINOCULAR_FEATURE_COUNT, x
+        return self._predict_batch(x[np.newaxis])[0]
+
+    def _predict_batch(self, X):
+        assert X.shape[1] == _BINOCULAR_FEATURE_COUNT, X
         # find the nearest intersection point of the two gaze lines
         # eye ball centers in world coords
-        s1_center = self._eye1_to_World(x[_MONOCULAR_SPHERE_CENTER])
-        s0_center = self._eye0_to_World(x[_BINOCULAR_SPHERE_CENTER])
+        s1_centers = _to_world(
+            self.eye_camera_to_world_matricies[1], X[:, _MONOCULAR_SPHERE_CENTER]
+        )
+        s0_centers = _to_world(
+            self.eye_camera_to_world_matricies[0], X[:, _BINOCULAR_SPHERE_CENTER]
+        )
         # eye line of sight in world coords
-        s1_normal = np.dot(self.rotation_matricies[1], x[_MONOCULAR_PUPIL_NORMAL])
-        s0_normal = np.dot(self.rotation_matricies[0], x[_BINOCULAR_PUPIL_NORMAL])
+        s1_normals = X[:, _MONOCULAR_PUPIL_NORMAL] @ self.rotation_matricies[1].T
+        s0_normals = X[:, _BINOCULAR_PUPIL_NORMAL] @ self.rotation_matricies[0].T
 
         # See Lech Swirski: "Gaze estimation on glasses-based stereoscopic displays"
         # Chapter: 7.4.2 Cyclopean gaze estimate
 
         # the cyclop is the avg of both lines of sight
-        cyclop_normal = (s0_normal + s1_normal) / 2.0
-        cyclop_center = (s0_center + s1_center) / 2.0
+        cyclop_normals = (s0_normals + s1_normals) / 2.0
+        cyclop_centers = (s0_centers + s1_centers) / 2.0
 
         # We use it to define a viewing plane.
-        gaze_plane = np.cross(cyclop_normal, s1_center - s0_center)
-        gaze_plane = gaze_plane / np.linalg.norm(gaze_plane)
+        gaze_planes = np.cross(cyclop_normals, s1_centers - s0_centers)
+        gaze_planes /= np.linalg.norm(gaze_planes, axis=1, keepdims=True)
 
         # project lines of sight onto the gaze plane
-        s0_norm_on_plane = s0_normal - np.dot(gaze_plane, s0_normal) * gaze_plane
-        s1_norm_on_plane = s1_normal - np.dot(gaze_plane, s1_normal) * gaze_plane
-
-        # create gaze lines on this plane
-        gaze_line0 = [s0_center, s0_center + s0_norm_on_plane]
-        gaze_line1 = [s1_center, s1_center + s1_norm_on_plane]
+        def project_on_gaze_planes(normals):
+            distances = np.einsum("ij,ij->i", gaze_planes, normals)
+            return normals - distances[:, np.newaxis] * gaze_planes
 
         # find the intersection of left and right line of sight.
-        (
-            nearest_intersection_point,
-            intersection_distance,
-        ) = math_helper.nearest_intersection(gaze_line0, gaze_line1)
-
-        if nearest_intersection_point is None:
-            return None
-
-        g = {
-            "eye_centers_3d": {0: s0_center.tolist(), 1: s1_center.tolist()},
-            "gaze_normals_3d": {0: s0_normal.tolist(), 1: s1_normal.tolist()},
-            "gaze_point_3d": nearest_intersection_point.tolist(),
-        }
+        intersection_points, _ = math_helper.nearest_intersections(
+            s0_centers,
+            project_on_gaze_planes(s0_normals),
+            s1_centers,
+            project_on_gaze_planes(s1_normals),
+        )
+
+        predictions = [
+            {
+                "eye_centers_3d": {0: s0_center, 1: s1_center},
+                "gaze_normals_3d": {0: s0_normal, 1: s1_normal},
+                "gaze_point_3d": intersection_point,
+            }
+            for s0_center, s1_center, s0_normal, s1_normal, intersection_point in zip(
+                s0_centers.tolist(),
+                s1_centers.tolist(),
+                s0_normals.tolist(),
+                s1_normals.tolist(),
+                intersection_points.tolist(),
+            )
+        ]
 
         if self.intrinsics is not None:
-            cyclop_gaze = nearest_intersection_point - cyclop_center
+            cyclop_gaze = intersection_points[-1] - cyclop_centers[-1]
             self.last_gaze_distance = np.sqrt(cyclop_gaze.dot(cyclop_gaze))
-            image_point = self.intrinsics.projectPoints(
-                np.array([nearest_intersection_point])
+            image_points = self.intrinsics.projectPoints(intersection_points)
+            image_points = _normalize_image_points(
+                image_points.reshape(-1, 2), self.intrinsics.resolution
             )
-            image_point = image_point.reshape(-1, 2)
-            image_point = normalize(
-                image_point[0], self.intrinsics.resolution, flip_y=True
-            )
-            image_point = _clamp_norm_point(image_point)
-            g["norm_pos"] = image_point
-
-        return g
+            for g, image_point in zip(predictions, image_points):
+                g["norm_pos"] = image_point
 
-    def _eye0_to_World(self, p):
-        point = np.ones(4)
-        point[:3] = p[:3]
-        return np.dot(self.eye_camera_to_world_matricies[0], point)[:3]
-
-    def _eye1_to_World(self, p):
-        point = np.ones(4)
-        point[:3] = p[:3]
-        return np.dot(self.eye_camera_to_world_matricies[1], point)[:3]
+        return predictions
 
 
 class Gazer3D(GazerBase):
@@ -361,51 +377,15 @@ class Gazer3D(GazerBase):
     def predict(
         self, matched_pupil_data: T.Iterator[T.List["Pupil"]]
     ) -> T.Iterator["Gaze"]:
-        for pupil_match in matched_pupil_data:
-            num_matched = len(pupil_match)
-            gaze_positions = ...  # Placeholder for gaze_positions
-
-            if num_matched == 2:
-                if self.binocular_model.is_fitted:
-                    right = self._extract_pupil_features([pupil_match[0]])
-                    left = self._extract_pupil_features([pupil_match[1]])
-                    X = np.hstack([left, right])
-                    gaze_positions = self.binocular_model.predict(X)
-                    topic = "gaze.3d.01."
-                else:
-                    logger.debug(
-                        "Prediction failed because binocular model is not fitted"
-                    )
-            elif num_matched == 1:
-                X = self._extract_pupil_features([pupil_match[0]])
-                if pupil_match[0]["id"] == 0:
-                    if self.right_model.is_fitted:
-                        gaze_positions = self.right_model.predict(X)
-                        topic = "gaze.3d.0."
-                    else:
-                        logger.debug(
-                            "Prediction failed because right model is not fitted"
-                        )
-                elif pupil_match[0]["id"] == 1:
-                    if self.left_model.is_fitted:
-                        gaze_positions = self.left_model.predict(X)
-                        topic = "gaze.3d.1."
-                    else:
-                        logger.debug(
-                            "Prediction failed because left model is not fitted"
-                        )
-            else:
-                raise ValueError(
-                    f"Unexpected number of matched pupil_data: {num_matched}"
-                )
-
-            if gaze_positions is ...:
-                continue  # Prediction failed and the reason was logged
-
-            for gaze_pos in gaze_positions:
+        batches = self._batches_to_predict(matched_pupil_data)
+        for model, eye_ids, pupil_matches, X in batches:
+            gaze_positions = model.predict(X)
+            for pupil_match, gaze_pos in zip(pupil_matches, gaze_positions):
+                if gaze_pos is None:
+                    continue
                 gaze_pos.update(
                     {
-                        "topic": topic,
+                        "topic": f"gaze.3d.{eye_ids}.",
                         "confidence": np.mean([p["confidence"] for p in pupil_match]),
                         "timestamp": np.mean([p["timestamp"] for p in pupil_match]),
                         "base_data": pupil_match,
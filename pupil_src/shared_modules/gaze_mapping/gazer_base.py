@@ -345,6 +345,43 @@ class GazerBase(abc.ABC, Plugin):
         X = self._extract_pupil_features(pupil)
         return X, Y
 
+    def _batches_to_predict(self, matched_pupil_data):
+        """Groups consecutive matches by the model that maps them.
+
+        Yields the model, the eye ids for the gaze topic, the matches, and their
+        features. The order of matches is kept, such that stateful models behave
+        as if each match was predicted on its own.
+        """
+
+        def model_name(pupil_match):
+            num_matched = len(pupil_match)
+            if num_matched == 2:
+                return "binocular"
+            elif num_matched == 1:
+                return {0: "right", 1: "left"}.get(pupil_match[0]["id"])
+            raise ValueError(f"Unexpected number of matched pupil_data: {num_matched}")
+
+        models = {
+            "binocular": (self.binocular_model, "01"),
+            "right": (self.right_model, "0"),
+            "left": (self.left_model, "1"),
+        }
+        for name, pupil_matches in itertools.groupby(matched_pupil_data, model_name):
+            if name is None:
+                continue
+            model, eye_ids = models[name]
+            if not model.is_fitted:
+                logger.debug(f"Prediction failed because {name} model is not fitted")
+                continue
+            pupil_matches = list(pupil_matches)
+            if name == "binocular":
+                right = self._extract_pupil_features([m[0] for m in pupil_matches])
+                left = self._extract_pupil_features([m[1] for m in pupil_matches])
+                X = np.hstack([left, right])
+            else:
+                X = self._extract_pupil_features([m[0] for m in pupil_matches])
+            yield model, eye_ids, pupil_matches, X
+
     def map_pupil_to_gaze(self, pupil_data, sort_by_creation_time=True):
         pupil_data = self.filter_pupil_data(pupil_data)
         if sort_by_creation_time:
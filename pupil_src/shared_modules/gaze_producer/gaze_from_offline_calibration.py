@@ -161,6 +161,9 @@ class GazeFromOfflineCalibration(GazeProducerBase):
         CircleMarkerDetectionTask.zmq_ctx = self.g_pool.zmq_ctx
         CircleMarkerDetectionTask.capture_source_path = self.g_pool.capture.source_path
         CircleMarkerDetectionTask.notify_all = self.notify_all
+        CircleMarkerDetectionTask.frame_server = getattr(
+            self.g_pool, "frame_server", None
+        )
 
         from gaze_producer.worker import create_calibration
 
@@ -10,8 +10,6 @@ See COPYING and COPYING.LESSER for license details.
 """
 from pyglui import ui
 
-import file_methods as fm
-import player_methods as pm
 from gaze_producer.gaze_producer_base import GazeProducerBase
 
 
@@ -26,13 +24,12 @@ class GazeFromRecording(GazeProducerBase):
 
     def __init__(self, g_pool):
         super().__init__(g_pool)
-        self.g_pool.gaze_positions = self._load_gaze_data()
+        # Player started loading in the background already. Wait for it here, such
+        # that consumers that are initialized after us find the data.
+        future = g_pool.pldata_loader.submit_gaze_positions()
+        self.g_pool.gaze_positions = future.result()
         self._gaze_changed_announcer.announce_existing()
 
-    def _load_gaze_data(self):
-        gaze = fm.load_pldata_file(self.g_pool.rec_dir, "gaze")
-        return pm.Bisector(gaze.data, gaze.timestamps)
-
     def init_ui(self):
         super().init_ui()
         self.menu.append(ui.Info_Text("Using gaze data recorded by Pupil Capture."))
@@ -36,6 +36,7 @@ class CalibrationStorage(Storage, Observable):
     def __init__(self, rec_dir, plugin, get_recording_index_range, recording_uuid):
         super().__init__(plugin)
         self._rec_dir = rec_dir
+        self._pldata_loader = plugin.g_pool.pldata_loader
         self._get_recording_index_range = get_recording_index_range
         self._recording_uuid = str(recording_uuid)
         self._calibrations = []
@@ -160,7 +161,7 @@ class CalibrationStorage(Storage, Observable):
         self.add(calibration)
 
     def _load_recorded_calibrations(self):
-        notifications = fm.load_pldata_file(self._rec_dir, "notify")
+        notifications = self._pldata_loader.load("notify")
         for topic, data in zip(notifications.topics, notifications.data):
             if topic.startswith("notify."):
                 # Remove "notify." prefix
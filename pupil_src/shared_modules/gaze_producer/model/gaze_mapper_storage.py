@@ -80,6 +80,8 @@ class GazeMapperStorage(SingleFileStorage, Observable):
         try:
             os.remove(mapping_file_path + ".pldata")
             os.remove(mapping_file_path + "_timestamps.npy")
+            os.remove(mapping_file_path + fm.PLDATA_COLUMNS_SUFFIX)
+            os.remove(mapping_file_path + fm.PLDATA_INDEX_SUFFIX)
         except FileNotFoundError:
             pass
 
@@ -98,6 +100,14 @@ class GazeMapperStorage(SingleFileStorage, Observable):
                 old_mapping_file_path + "_timestamps.npy",
                 new_mapping_file_path + "_timestamps.npy",
             )
+            os.rename(
+                old_mapping_file_path + fm.PLDATA_COLUMNS_SUFFIX,
+                new_mapping_file_path + fm.PLDATA_COLUMNS_SUFFIX,
+            )
+            os.rename(
+                old_mapping_file_path + fm.PLDATA_INDEX_SUFFIX,
+                new_mapping_file_path + fm.PLDATA_INDEX_SUFFIX,
+            )
         except FileNotFoundError:
             pass
 
@@ -32,11 +32,13 @@ class CircleMarkerDetectionTask(TaskInterface):
     zmq_ctx = None
     capture_source_path = None
     notify_all = None
+    frame_server = None
 
     def __init__(self):
         super().__init__()
         self._process_pipe = None
         self._progress = 0.0
+        self._frame_consumer = None
 
     @property
     def progress(self):
@@ -49,14 +51,23 @@ class CircleMarkerDetectionTask(TaskInterface):
 
     def _request_start_of_detection(self, pair_url):
         source_path = self.capture_source_path
+        if self.frame_server is not None:
+            # the tracker relies on consecutive frames
+            self._frame_consumer = self.frame_server.register_consumer(from_start=True)
         self.notify_all(
             {
                 "subject": "circle_detector_process.should_start",
                 "source_path": source_path,
                 "pair_url": pair_url,
+                "frame_consumer": self._frame_consumer,
             }
         )
 
+    def _release_frame_consumer(self):
+        if self._frame_consumer is not None:
+            self.frame_server.release_consumer(self._frame_consumer)
+            self._frame_consumer = None
+
     def cancel_gracefully(self):
         super().cancel_gracefully()
         self._terminate_background_detection()
@@ -69,6 +80,7 @@ class CircleMarkerDetectionTask(TaskInterface):
         self.on_canceled_or_killed()
 
     def _terminate_background_detection(self):
+        self._release_frame_consumer()
         self._process_pipe.send({"topic": "terminate"})
         self._process_pipe.socket.close()
         self._process_pipe = None
@@ -91,6 +103,7 @@ class CircleMarkerDetectionTask(TaskInterface):
                 for detection in detections_without_None_items:
                     self._yield_detection(detection)
             elif topic == "finished":
+                self._release_frame_consumer()
                 self.on_completed(None)  # return_value_or_none
                 return
             elif topic == "exception":
@@ -100,6 +113,7 @@ class CircleMarkerDetectionTask(TaskInterface):
                     )
                 )
                 logger.info("Marker detection was interrupted")
+                self._release_frame_consumer()
                 logger.debug("Reason: {}".format(msg.get("reason", "n/a")))
                 self.on_canceled_or_killed()
                 return
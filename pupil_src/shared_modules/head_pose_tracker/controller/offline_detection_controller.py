@@ -27,6 +27,7 @@ class OfflineDetectionController(Observable):
         get_current_trim_mark_range,
         all_timestamps,
         source_path,
+        frame_server=None,
     ):
         self._general_settings = general_settings
         self._detection_storage = detection_storage
@@ -34,6 +35,8 @@ class OfflineDetectionController(Observable):
         self._get_current_trim_mark_range = get_current_trim_mark_range
         self._all_timestamps = all_timestamps
         self._source_path = source_path
+        self._frame_server = frame_server
+        self._frame_consumer = None
         self._task = None
 
     def calculate(self):
@@ -48,11 +51,13 @@ class OfflineDetectionController(Observable):
                 self._insert_markers_bisector(data_pairs)
 
         def on_completed(_):
+            self._release_frame_consumer()
             self._detection_storage.save_pldata_to_disk()
             logger.info("marker detection completed")
             self.on_detection_ended()
 
         def on_canceled_or_killed():
+            self._release_frame_consumer()
             self._detection_storage.save_pldata_to_disk()
             logger.info("marker detection canceled")
             self.on_detection_ended()
@@ -66,10 +71,15 @@ class OfflineDetectionController(Observable):
         logger.info("Start marker detection")
 
     def _create_task(self):
+        frame_index_range = self._general_settings.detection_frame_index_range
+        if self._frame_server is not None:
+            self._frame_consumer = self._frame_server.register_consumer(
+                frame_index_range=frame_index_range
+            )
         args = (
             self._source_path,
             self._all_timestamps,
-            self._general_settings.detection_frame_index_range,
+            frame_index_range,
             set(self._detection_storage.frame_index_to_num_markers.keys()),
         )
         return self._task_manager.create_background_task(
@@ -77,15 +87,23 @@ class OfflineDetectionController(Observable):
             routine_or_generator_function=worker.offline_detection,
             pass_shared_memory=True,
             args=args,
+            kwargs={"frame_consumer": self._frame_consumer},
         )
 
+    def _release_frame_consumer(self):
+        if self._frame_consumer is not None:
+            self._frame_server.release_consumer(self._frame_consumer)
+            self._frame_consumer = None
+
     def _insert_markers_bisector(self, data_pairs):
+        timestamps, all_markers = [], []
         for timestamp, markers, frame_index in data_pairs:
-            for marker in markers:
-                self._detection_storage.markers_bisector.insert(timestamp, marker)
+            timestamps.extend([timestamp] * len(markers))
+            all_markers.extend(markers)
             self._detection_storage.frame_index_to_num_markers[frame_index] = len(
                 markers
             )
+        self._detection_storage.markers_bisector.extend(timestamps, all_markers)
         self.on_detection_yield()
 
     def cancel_task(self):
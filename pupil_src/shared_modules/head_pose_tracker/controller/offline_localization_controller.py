@@ -141,8 +141,9 @@ class OfflineLocalizationController(Observable):
         )
 
     def _insert_pose_bisector(self, data_pairs):
-        for timestamp, pose in data_pairs:
-            self._localization_storage.pose_bisector.insert(timestamp, pose)
+        timestamps = [timestamp for timestamp, _ in data_pairs]
+        poses = [pose for _, pose in data_pairs]
+        self._localization_storage.pose_bisector.extend(timestamps, poses)
         self.on_localization_yield()
 
     def cancel_task(self):
@@ -72,6 +72,7 @@ class Offline_Head_Pose_Tracker(Head_Pose_Tracker_Base):
             get_current_trim_mark_range=self._current_trim_mark_range,
             all_timestamps=self.g_pool.timestamps,
             source_path=self.g_pool.capture.source_path,
+            frame_server=getattr(self.g_pool, "frame_server", None),
         )
         self._optimization_controller = controller.OfflineOptimizationController(
             self._detection_controller,
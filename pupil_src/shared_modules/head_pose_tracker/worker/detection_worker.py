@@ -17,6 +17,7 @@ import numpy as np
 import pupil_apriltags
 
 import file_methods as fm
+import frame_server
 import video_capture
 from methods import normalize
 from stdlib_utils import unique
@@ -74,6 +75,7 @@ def offline_detection(
     frame_index_range,
     calculated_frame_indices,
     shared_memory,
+    frame_consumer=None,
 ):
     batch_size = 30
     frame_start, frame_end = frame_index_range
@@ -87,6 +89,12 @@ def offline_detection(
     shared_memory.progress = (frame_indices[0] - frame_start + 1) / frame_count
     yield None
 
+    if frame_consumer is not None:
+        yield from _offline_detection_on_shared_frames(
+            frame_consumer, all_timestamps, frame_indices, shared_memory, batch_size
+        )
+        return
+
     src = video_capture.File_Source(
         SimpleNamespace(), source_path, fill_gaps=False, timing=None
     )
@@ -118,5 +126,31 @@ def offline_detection(
     yield queue
 
 
+def _offline_detection_on_shared_frames(
+    frame_consumer, all_timestamps, frame_indices, shared_memory, batch_size
+):
+    # frames arrive in the order of the frame server
+    frame_indices = set(frame_indices)
+    num_remaining = len(frame_indices)
+
+    queue = []
+    for frame in frame_server.Frame_Consumer(frame_consumer):
+        if frame.index not in frame_indices:
+            continue
+        # gaps in the world video
+        detections = [] if frame.is_fake else _detect(frame)
+        serialized_dicts = [fm.Serialized_Dict(d) for d in detections]
+        queue.append((all_timestamps[frame.index], serialized_dicts, frame.index))
+        num_remaining -= 1
+
+        if len(queue) >= batch_size:
+            shared_memory.progress = 1 - num_remaining / len(frame_indices)
+            data = queue[:batch_size]
+            del queue[:batch_size]
+            yield data
+
+    yield queue
+
+
 def online_detection(frame):
     return _detect(frame)
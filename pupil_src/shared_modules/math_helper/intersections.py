@@ -87,3 +87,34 @@ def nearest_linepoint_to_point(ref_point, line):
     intersection_dist = np.sqrt(d.dot(d))
 
     return point, intersection_dist
+
+
+def nearest_intersections(points0, directions0, points1, directions1):
+    """Vectorized `nearest_intersection()` of lines given by points and directions.
+
+    All arguments are arrays of shape (N, 3). Returns the nearest intersection
+    points of shape (N, 3) and their distances of shape (N,).
+    """
+
+    def normalise(d):
+        mag = np.linalg.norm(d, axis=1, keepdims=True)
+        return np.divide(d, mag, out=np.zeros_like(d), where=mag != 0)
+
+    d1 = normalise(directions0)
+    d2 = normalise(directions1)
+
+    diff = points0 - points1
+    a01 = -np.einsum("ij,ij->i", d1, d2)
+    b0 = np.einsum("ij,ij->i", diff, d1)
+    b1 = -np.einsum("ij,ij->i", diff, d2)
+
+    # Select any pair of closest points for parallel lines.
+    not_parallel = np.abs(a01) < 1.0
+    det = np.where(not_parallel, 1.0 - a01 * a01, 1.0)
+    s0 = np.where(not_parallel, (a01 * b1 - b0) / det, -b0)
+    s1 = np.where(not_parallel, (a01 * b0 - b1) / det, 0.0)
+
+    closest_points0 = points0 + s0[:, np.newaxis] * d1
+    closest_points1 = points1 + s1[:, np.newaxis] * d2
+    dist = np.linalg.norm(closest_points1 - closest_points0, axis=1)
+    return closest_points1 + (closest_points0 - closest_points1) * 0.5, dist
@@ -37,9 +37,13 @@ def exact_window(timestamps, index_range):
 
 
 class Bisector(object):
-    """Stores data with associated timestamps, both sorted by the timestamp."""
+    """Stores data with associated timestamps, both sorted by the timestamp.
 
-    def __init__(self, data=(), data_ts=()):
+    Optionally stores numeric `columns` (see `file_methods.load_pldata_columns`) that
+    allow reading numeric fields without deserializing the data.
+    """
+
+    def __init__(self, data=(), data_ts=(), columns=None):
         if len(data) != len(data_ts):
             raise ValueError(
                 (
@@ -47,23 +51,50 @@ class Bisector(object):
                     " timestamp in `data_ts`"
                 )
             )
+        elif columns is not None and len(columns) != len(data):
+            raise ValueError(
+                "Each element in `data` requires a corresponding row in `columns`"
+            )
         elif not len(data):
             self.data = np.array([])
             self.data_ts = np.array([])
+            self.columns = None
             self.sorted_idc = []
         else:
             self.data_ts = np.asarray(data_ts)
-            self.data = np.asarray(data, dtype=object)
 
             # Find correct order once and reorder both lists in-place
             self.sorted_idc = np.argsort(self.data_ts)
             self.data_ts = self.data_ts[self.sorted_idc]
-            self.data = self.data[self.sorted_idc]
+            if isinstance(data, fm.Lazy_PLData_Sequence):
+                # keep data on disk until it is accessed
+                self.data = data.subset(self.sorted_idc)
+            else:
+                self.data = np.asarray(data, dtype=object)
+                self.data = self.data[self.sorted_idc]
+            if columns is not None:
+                columns = np.asarray(columns)[self.sorted_idc]
+            self.columns = columns
+
+    @classmethod
+    def from_sorted(cls, data, data_ts, columns=None):
+        """Creates a bisector from data that is sorted by `data_ts` already.
+
+        Skips sorting and keeps the given arrays, i.e. slices stay views.
+        """
+        bisector = cls()
+        if len(data):
+            bisector.data = data
+            bisector.data_ts = np.asarray(data_ts)
+            bisector.columns = columns
+            bisector.sorted_idc = np.arange(len(data))
+        return bisector
 
     def copy(self):
         copy = type(self)()
         copy.data = self.data.copy()
         copy.data_ts = self.data_ts.copy()
+        copy.columns = None if self.columns is None else self.columns.copy()
         copy.sorted_idc = self.sorted_idc.copy()
         return copy
 
@@ -89,6 +120,17 @@ class Bisector(object):
         start_idx, stop_idx = self._start_stop_idc_for_window(ts_window)
         return self.data[start_idx:stop_idx]
 
+    def bisector_for_window(self, ts_window) -> "Bisector":
+        """Like `by_ts_window()`, but returns a bisector that shares this one's data."""
+        start_idx, stop_idx = self._start_stop_idc_for_window(ts_window)
+        section = slice(start_idx, stop_idx)
+        if isinstance(self.data, fm.Lazy_PLData_Sequence):
+            data = self.data.subset(section)
+        else:
+            data = self.data[section]
+        columns = None if self.columns is None else self.columns[section]
+        return Bisector.from_sorted(data, self.data_ts[section], columns=columns)
+
     def _start_stop_idc_for_window(self, ts_window):
         return np.searchsorted(self.data_ts, ts_window)
 
@@ -108,6 +150,16 @@ class Bisector(object):
     def timestamps(self):
         return self.data_ts
 
+    def column(self, key, index=slice(None)):
+        """Returns the numeric values of `key` for the data selected by `index`.
+
+        Uses the numeric columns if available and falls back to reading `key` from
+        each selected datum otherwise.
+        """
+        if self.columns is not None and key in self.columns.dtype.names:
+            return self.columns[key][index]
+        return np.array([datum[key] for datum in self.data[index]])
+
     def init_dict_for_window(self, ts_window):
         start_idx, stop_idx = self._start_stop_idc_for_window(ts_window)
         return {
@@ -117,10 +169,144 @@ class Bisector(object):
 
 
 class Mutable_Bisector(Bisector):
+    """Bisector that supports inserting data.
+
+    Inserted data is collected in an append buffer. The buffer is sorted into a
+    new run when it is full or when data is queried. Like in a binary counter,
+    runs are merged as soon as a run is at least as large as its predecessor, such
+    that there are O(log n) runs and each datum is merged O(log n) times.
+
+    `by_ts()`, `by_ts_window()`, `init_dict_for_window()` and `len()` search the
+    runs directly. Accessing `data` or `data_ts` merges all runs into one.
+
+    Among data with equal timestamps, the most recently inserted datum comes
+    first.
+    """
+
+    BUFFER_SIZE = 256
+
+    def __init__(self, data=(), data_ts=()):
+        self._data = np.array([])
+        self._data_ts = np.array([])
+        self._runs = []  # sorted (timestamps, data) pairs, newest last
+        self._buffer_ts = []
+        self._buffer_data = []
+        super().__init__(data, data_ts)
+
+    @property
+    def data(self):
+        self._merge_all_runs()
+        return self._data
+
+    @data.setter
+    def data(self, data):
+        self._data = data
+
+    @property
+    def data_ts(self):
+        self._merge_all_runs()
+        return self._data_ts
+
+    @data_ts.setter
+    def data_ts(self, data_ts):
+        self._data_ts = data_ts
+
     def insert(self, timestamp, datum):
-        insert_idx = np.searchsorted(self.data_ts, timestamp)
-        self.data_ts = np.insert(self.data_ts, insert_idx, timestamp)
-        self.data = np.insert(self.data, insert_idx, datum)
+        self._buffer_ts.append(timestamp)
+        self._buffer_data.append(datum)
+        # inserted data has no numeric columns
+        self.columns = None
+        if len(self._buffer_ts) >= self.BUFFER_SIZE:
+            self._seal_buffer()
+
+    def extend(self, timestamps, data):
+        """Inserts many data at once."""
+        if len(timestamps) != len(data):
+            raise ValueError(
+                "Each element in `data` requires a corresponding timestamp"
+            )
+        self._seal_buffer()
+        self._buffer_ts = list(timestamps)
+        self._buffer_data = list(data)
+        self.columns = None
+        self._seal_buffer()
+
+    def by_ts(self, ts):
+        self._seal_buffer()
+        for run_ts, run_data in reversed(self._all_runs()):
+            found_index = np.searchsorted(run_ts, ts)
+            if found_index < len(run_ts) and run_ts[found_index] == ts:
+                return run_data[found_index]
+        raise ValueError
+
+    def by_ts_window(self, ts_window):
+        return self.init_dict_for_window(ts_window)["data"]
+
+    def init_dict_for_window(self, ts_window):
+        self._seal_buffer()
+        parts = []
+        for run_ts, run_data in reversed(self._all_runs()):
+            start_idx, stop_idx = np.searchsorted(run_ts, ts_window)
+            if start_idx < stop_idx:
+                section = slice(start_idx, stop_idx)
+                parts.append((run_ts[section], run_data[section]))
+        if len(parts) == 1:
+            data_ts, data = parts[0]
+        elif parts:
+            data_ts = np.concatenate([part_ts for part_ts, _ in parts])
+            data = np.concatenate([part_data for _, part_data in parts])
+            order = np.argsort(data_ts, kind="stable")
+            data_ts, data = data_ts[order], data[order]
+        else:
+            data_ts, data = np.array([]), np.array([], dtype=object)
+        return {"data": data, "data_ts": data_ts}
+
+    def __len__(self):
+        return (
+            len(self._data)
+            + sum(len(run_ts) for run_ts, _ in self._runs)
+            + len(self._buffer_ts)
+        )
+
+    def __bool__(self):
+        return bool(len(self))
+
+    def _all_runs(self):
+        return [(self._data_ts, self._data)] + self._runs
+
+    def _seal_buffer(self):
+        if not self._buffer_ts:
+            return
+        # reversed + stable sort: most recent datum first among equal timestamps
+        run_ts = np.asarray(self._buffer_ts[::-1], dtype=np.float64)
+        run_data = np.empty(len(run_ts), dtype=object)
+        run_data[:] = self._buffer_data[::-1]
+        order = np.argsort(run_ts, kind="stable")
+        self._runs.append((run_ts[order], run_data[order]))
+        self._buffer_ts = []
+        self._buffer_data = []
+
+        runs = self._all_runs()
+        while len(runs) > 1 and len(runs[-2][0]) <= len(runs[-1][0]):
+            newer = runs.pop()
+            runs[-1] = self._merge_runs(newer, runs[-1])
+        (self._data_ts, self._data), *self._runs = runs
+
+    def _merge_all_runs(self):
+        self._seal_buffer()
+        runs = self._all_runs()
+        while len(runs) > 1:
+            newer = runs.pop()
+            runs[-1] = self._merge_runs(newer, runs[-1])
+        (self._data_ts, self._data), *self._runs = runs
+
+    @staticmethod
+    def _merge_runs(newer, older):
+        merged_ts, order = merge_sorted_timestamps([newer[0], older[0]])
+        merged_data = np.empty(len(merged_ts), dtype=object)
+        merged_data[: len(newer[1])] = newer[1]
+        merged_data[len(newer[1]) :] = older[1]
+        return merged_ts, merged_data[order]
 
 
 class Affiliator(Bisector):
@@ -165,17 +351,28 @@ class PupilTopic:
 
     @staticmethod
     def create(topic: str, pupil_datum: dict) -> str:
-        regex_v1 = PupilTopic._match_regex_v1()
-        match_v1 = re.match(regex_v1, topic)
-        if match_v1:
-            detector_tag = pupil_datum["method"]
-            if detector_tag in PupilTopic._legacy_method_to_detector_tag:
-                detector_tag = PupilTopic._legacy_method_to_detector_tag[detector_tag]
-            return PupilTopic._FORMAT_STRING_V2.format(
-                eye_id=match_v1.group("eye_id"), detector_tag=detector_tag,
-            )
-        regex_v2 = PupilTopic._match_regex_v2()
-        match_v2 = re.match(regex_v2, topic)
+        pupil_topic = PupilTopic.create_from_topic(topic)
+        if pupil_topic is not None:
+            return pupil_topic
+        # v1 topics do not contain the detector tag
+        match_v1 = re.match(PupilTopic._match_regex_v1(), topic)
+        detector_tag = pupil_datum["method"]
+        if detector_tag in PupilTopic._legacy_method_to_detector_tag:
+            detector_tag = PupilTopic._legacy_method_to_detector_tag[detector_tag]
+        return PupilTopic._FORMAT_STRING_V2.format(
+            eye_id=match_v1.group("eye_id"), detector_tag=detector_tag,
+        )
+
+    @staticmethod
+    @functools.lru_cache(128)
+    def create_from_topic(topic: str) -> T.Optional[str]:
+        """Like `create()`, but returns None for v1 topics, which require the datum.
+
+        Results are cached, i.e. the topic is parsed once per distinct topic.
+        """
+        if re.match(PupilTopic._match_regex_v1(), topic):
+            return None
+        match_v2 = re.match(PupilTopic._match_regex_v2(), topic)
         if match_v2:
             return PupilTopic._FORMAT_STRING_V2.format(
                 eye_id=match_v2.group("eye_id"),
@@ -230,20 +427,53 @@ class PupilTopic:
 
 
 class PupilDataBisector:
-    def __init__(self, data: T.Optional[fm.PLData] = None, bisectors=None):
+    def __init__(
+        self,
+        data: T.Optional[fm.PLData] = None,
+        bisectors=None,
+        columns: T.Optional[np.ndarray] = None,
+    ):
         if bisectors is not None:
             self._bisectors = bisectors
         else:
             if data is None:
                 data = fm.PLData([], [], [])
-            self._bisectors = self._bisectors_from_data(data)
+            self._bisectors = self._bisectors_from_data(data, columns)
+        # merged bisectors by their tuple of pupil topics, built on first use
+        self._combined_bisectors = {}
+
+    def __getstate__(self):
+        # merged bisectors are cheap to rebuild, do not send them to other processes
+        return self._bisectors
+
+    def __setstate__(self, bisectors):
+        self._bisectors = bisectors
+        self._combined_bisectors = {}
+
+    def _bisectors_from_data(
+        self, data: fm.PLData, columns: T.Optional[np.ndarray] = None
+    ):
+        if columns is not None and len(columns) != len(data.data):
+            logger.debug("Ignoring pupil data columns that do not match the data")
+            columns = None
+        if isinstance(data.data, fm.Lazy_PLData_Sequence):
+            all_data = data.data
+        else:
+            all_data = np.asarray(data.data, dtype=object)
+        all_timestamps = np.asarray(data.timestamps)
 
-    def _bisectors_from_data(self, data: fm.PLData):
         _bisectors = {}
-        for pupil_topic, data in self._group_data_by_pupil_topic(data).items():
+        grouped = self._group_indices_by_pupil_topic(data)
+        for pupil_topic, indices in grouped.items():
             assert pupil_topic not in _bisectors
-            assert len(data.topics) == len(data.data) == len(data.timestamps)
-            bisector = pm.Bisector(data.data, data.timestamps)
+            if isinstance(all_data, fm.Lazy_PLData_Sequence):
+                topic_data = all_data.subset(indices)
+            else:
+                topic_data = all_data[indices]
+            topic_columns = None if columns is None else columns[indices]
+            bisector = pm.Bisector(
+                topic_data, all_timestamps[indices], columns=topic_columns
+            )
             _bisectors[pupil_topic] = bisector
         return _bisectors
 
@@ -263,21 +493,30 @@ class PupilDataBisector:
         data = fm.PLData(init_dict["data"], init_dict["data_ts"], init_dict["topics"])
         return PupilDataBisector(data)
 
-    @functools.lru_cache(32)
     def __getitem__(
         self, key: T.Tuple[PupilTopic.EyeIdFilterKey, PupilTopic.DetectorTagFilterKey]
     ) -> pm.Bisector:
-        bisectors = [
-            B for topic, B in self._bisectors.items() if PupilTopic.match(topic, *key)
-        ]
-        return self.combine_bisectors(bisectors)
+        topics = tuple(
+            topic for topic in self._bisectors if PupilTopic.match(topic, *key)
+        )
+        return self._combined_bisector(topics)
 
-    def by_ts_window(self, ts_window):
-        bisectors = self._bisectors.values()
-        init_dicts = [b.init_dict_for_window(ts_window) for b in bisectors]
-        bisectors = [pm.Bisector(**init_dict) for init_dict in init_dicts]
-        combined = self.combine_bisectors(bisectors)
-        return combined
+    def by_ts_window(self, ts_window) -> pm.Bisector:
+        """Data of all pupil topics within `ts_window`.
+
+        The returned bisector is a slice of the merged data of all pupil topics.
+        """
+        all_topics = tuple(self._bisectors)
+        return self._combined_bisector(all_topics).bisector_for_window(ts_window)
+
+    def _combined_bisector(self, topics: T.Tuple[str, ...]) -> pm.Bisector:
+        try:
+            return self._combined_bisectors[topics]
+        except KeyError:
+            bisectors = [self._bisectors[topic] for topic in topics]
+            combined = self.combine_bisectors(bisectors)
+            self._combined_bisectors[topics] = combined
+            return combined
 
     def by_ts(self, ts):
         # Returns datum for first bisector that contains it
@@ -294,14 +533,44 @@ class PupilDataBisector:
 
     @staticmethod
     def combine_bisectors(bisectors: T.Iterable[pm.Bisector]) -> pm.Bisector:
-        data = list(chain.from_iterable(b.data for b in bisectors))
-        data_ts = list(chain.from_iterable(b.data_ts for b in bisectors))
-        return pm.Bisector(data, data_ts)
+        """Merges the sorted bisectors into one without sorting again."""
+        bisectors = [b for b in bisectors if b]
+        if len(bisectors) == 1:
+            return bisectors[0]
+        data_ts, order = merge_sorted_timestamps([b.data_ts for b in bisectors])
+
+        if bisectors and all(
+            isinstance(b.data, fm.Lazy_PLData_Sequence) for b in bisectors
+        ):
+            data = fm.Lazy_PLData_Sequence.concatenate([b.data for b in bisectors])
+            data = data.subset(order)
+        else:
+            data = np.empty(len(data_ts), dtype=object)
+            data[:] = list(chain.from_iterable(b.data for b in bisectors))
+            data = data[order]
+        columns = [b.columns for b in bisectors]
+        if (
+            columns
+            and all(c is not None for c in columns)
+            and len({c.dtype for c in columns}) == 1
+        ):
+            columns = np.concatenate(columns)[order]
+        else:
+            columns = None
+        return pm.Bisector.from_sorted(data, data_ts, columns=columns)
 
     @classmethod
-    def load_from_file(cls, dir_path, filename) -> "PupilDataBisector":
-        data = fm.load_pldata_file(dir_path, filename)
-        return cls(data=data)
+    def load_from_file(cls, dir_path, filename, lazy=False) -> "PupilDataBisector":
+        """Loads pupil data from a pldata file.
+
+        With `lazy=True` the data stays on disk and is only read on access.
+        """
+        if lazy:
+            data = fm.load_pldata_file_lazy(dir_path, filename)
+        else:
+            data = fm.load_pldata_file(dir_path, filename)
+        columns = fm.load_pldata_columns(dir_path, filename)
+        return cls(data=data, columns=columns)
 
     def save_to_file(self, dir_path, filename):
         with fm.PLData_Writer(dir_path, filename) as writer:
@@ -312,15 +581,44 @@ class PupilDataBisector:
     ### PRIVATE
 
     @staticmethod
-    def _group_data_by_pupil_topic(data: fm.PLData) -> T.Dict[str, fm.PLData]:
+    def _group_indices_by_pupil_topic(data: fm.PLData) -> T.Dict[str, np.ndarray]:
+        """Sorted indices of the data for each pupil topic.
+
+        Interns the topics as integer codes and parses each distinct topic once.
+        Only data with v1 topics is read, since their detector tag is stored in the
+        datum.
+        """
         assert len(data.topics) == len(data.data) == len(data.timestamps)
-        data_by_topic = collections.defaultdict(lambda: fm.PLData([], [], []))
-        for raw_topic, datum, ts in zip(data.topics, data.data, data.timestamps):
-            pupil_topic = PupilTopic.create(raw_topic, datum)
-            data_by_topic[pupil_topic].data.append(datum)
-            data_by_topic[pupil_topic].timestamps.append(ts)
-            data_by_topic[pupil_topic].topics.append(raw_topic)
-        return data_by_topic
+        codes_by_topic = {}
+        codes = np.fromiter(
+            (codes_by_topic.setdefault(t, len(codes_by_topic)) for t in data.topics),
+            dtype=np.int64,
+            count=len(data.topics),
+        )
+        order = np.argsort(codes, kind="stable")
+        bounds = np.searchsorted(codes[order], np.arange(len(codes_by_topic) + 1))
+
+        parts_by_topic = collections.defaultdict(list)
+        all_data = None
+        for raw_topic, code in codes_by_topic.items():
+            indices = order[bounds[code] : bounds[code + 1]]
+            pupil_topic = PupilTopic.create_from_topic(raw_topic)
+            if pupil_topic is not None:
+                parts_by_topic[pupil_topic].append(indices)
+                continue
+            if all_data is None:
+                all_data = data.data
+                if not isinstance(all_data, fm.Lazy_PLData_Sequence):
+                    all_data = np.asarray(all_data, dtype=object)
+            v1_topics = [PupilTopic.create(raw_topic, all_data[i]) for i in indices]
+            v1_topics = np.array(v1_topics, dtype=object)
+            for pupil_topic in dict.fromkeys(v1_topics):
+                parts_by_topic[pupil_topic].append(indices[v1_topics == pupil_topic])
+
+        return {
+            topic: parts[0] if len(parts) == 1 else np.sort(np.concatenate(parts))
+            for topic, parts in parts_by_topic.items()
+        }
 
 
 class PupilDataCollector:
@@ -352,6 +650,52 @@ class PupilDataCollector:
         return num_collected
 
 
+def merge_sorted_timestamps(
+    sorted_timestamps: T.Sequence[np.ndarray],
+) -> T.Tuple[np.ndarray, np.ndarray]:
+    """K-way merge of sorted timestamp arrays.
+
+    Merges pairwise, such that each element is moved O(log k) times. Equal
+    timestamps keep the order of their arrays.
+
+    Returns the merged timestamps and the positions of the merged elements in the
+    concatenation of all arrays.
+    """
+    runs = []
+    offset = 0
+    for timestamps in sorted_timestamps:
+        timestamps = np.asarray(timestamps, dtype=np.float64)
+        runs.append((timestamps, np.arange(offset, offset + len(timestamps))))
+        offset += len(timestamps)
+    if not runs:
+        return np.array([]), np.array([], dtype=np.int64)
+
+    while len(runs) > 1:
+        merged_runs = [
+            _merge_two_runs(*runs[i : i + 2]) for i in range(0, len(runs) - 1, 2)
+        ]
+        if len(runs) % 2:
+            merged_runs.append(runs[-1])
+        runs = merged_runs
+    return runs[0]
+
+
+def _merge_two_runs(left, right):
+    left_ts, left_idc = left
+    right_ts, right_idc = right
+    # final positions: own position + number of elements of the other run before
+    left_pos = np.arange(len(left_ts)) + np.searchsorted(right_ts, left_ts, "left")
+    right_pos = np.arange(len(right_ts)) + np.searchsorted(left_ts, right_ts, "right")
+
+    merged_ts = np.empty(len(left_ts) + len(right_ts), dtype=np.float64)
+    merged_ts[left_pos] = left_ts
+    merged_ts[right_pos] = right_ts
+    merged_idc = np.empty(len(merged_ts), dtype=np.int64)
+    merged_idc[left_pos] = left_idc
+    merged_idc[right_pos] = right_idc
+    return merged_ts, merged_idc
+
+
 def find_closest(target, source):
     """Find indeces of closest `target` elements for elements in `source`.
     -
@@ -369,6 +713,47 @@ def find_closest(target, source):
     return idx
 
 
+def correlate_data_indices(data_ts, timestamps):
+    """Correlate data to frames, using the frames' `enclosing_window`s.
+
+    Frame `i` receives the data with `window[0] <= timestamp < window[1]`, i.e. the
+    same data as `Bisector.by_ts_window(enclosing_window(timestamps, i))`.
+
+    Returns a CSR-style pair `(offsets, indices)` with `len(offsets) ==
+    len(timestamps) + 1`: The data of frame `i` is found at the positions
+    `indices[offsets[i]:offsets[i + 1]]` of the original data. If `data_ts` is
+    sorted, `indices` is `np.arange(len(data_ts))` and the offsets can be used to
+    slice the data directly.
+    """
+    data_ts = np.asarray(data_ts, dtype=np.float64)
+    timestamps = np.asarray(timestamps, dtype=np.float64)
+    if np.all(data_ts[:-1] <= data_ts[1:]):
+        indices = np.arange(len(data_ts))
+        sorted_ts = data_ts
+    else:
+        indices = np.argsort(data_ts, kind="stable")
+        sorted_ts = data_ts[indices]
+
+    offsets = np.zeros(len(timestamps) + 1, dtype=np.int64)
+    if len(timestamps):
+        midpoints = (timestamps[1:] + timestamps[:-1]) / 2.0
+        offsets[1:-1] = np.searchsorted(sorted_ts, midpoints)
+        offsets[-1] = len(data_ts)
+    return offsets, indices
+
+
+def correlated_frame_indices(offsets, indices):
+    """Inverts `correlate_data_indices()`: frame index for each datum.
+
+    Data that was not correlated to any frame receives -1.
+    """
+    frame_idc = np.full(len(indices), -1, dtype=np.int64)
+    frame_idc[indices[offsets[0] : offsets[-1]]] = np.repeat(
+        np.arange(len(offsets) - 1), np.diff(offsets)
+    )
+    return frame_idc
+
+
 def correlate_data(data, timestamps):
     """
     data:  list of data :
@@ -381,35 +766,25 @@ def correlate_data(data, timestamps):
     with the length of the number of timestamps.
     Each slot contains a list that will have 0, 1 or more assosiated data points.
 
-    Finally we add an index field to the datum with the associated index
+    Data up to the midpoint between two frames belongs to the earlier frame. Data
+    after the midpoint between the last two frames is dropped, i.e. the last slot
+    is always empty. See `correlate_data_indices()` for an index-based variant.
     """
-    timestamps = list(timestamps)
-    data_by_frame = [[] for i in timestamps]
+    data_ts = np.array([datum["timestamp"] for datum in data], dtype=np.float64)
+    indices = np.argsort(data_ts, kind="stable")
+    sorted_ts = data_ts[indices]
+    timestamps = np.asarray(timestamps, dtype=np.float64)
 
-    frame_idx = 0
-    data_index = 0
+    offsets = np.zeros(len(timestamps) + 1, dtype=np.int64)
+    if len(timestamps) > 1:
+        midpoints = (timestamps[1:] + timestamps[:-1]) / 2.0
+        offsets[1:-1] = np.searchsorted(sorted_ts, midpoints, side="right")
+        offsets[-1] = offsets[-2]
 
-    data.sort(key=lambda d: d["timestamp"])
-
-    while True:
-        try:
-            datum = data[data_index]
-            # we can take the midpoint between two frames in time: More appropriate for SW timestamps
-            ts = (timestamps[frame_idx] + timestamps[frame_idx + 1]) / 2.0
-            # or the time of the next frame: More appropriate for Sart Of Exposure Timestamps (HW timestamps).
-            # ts = timestamps[frame_idx+1]
-        except IndexError:
-            # we might loose a data point at the end but we dont care
-            break
-
-        if datum["timestamp"] <= ts:
-            # datum['index'] = frame_idx
-            data_by_frame[frame_idx].append(datum)
-            data_index += 1
-        else:
-            frame_idx += 1
-
-    return data_by_frame
+    return [
+        [data[idx] for idx in indices[start:stop]]
+        for start, stop in zip(offsets[:-1], offsets[1:])
+    ]
 
 
 def transparent_circle(img, center, radius, color, thickness):
@@ -466,3 +841,219 @@ def transparent_image_overlay(pos, overlay_img, img, alpha):
         logger.debug(
             "transparent_image_overlay was outside of the world image and was not drawn"
         )
+
+
+def _bench_first_frame(directory, topic, lazy, results):
+    import resource
+    import time
+
+    start = time.perf_counter()
+    if lazy:
+        pldata = fm.load_pldata_file_lazy(directory, topic)
+    else:
+        pldata = fm.load_pldata_file(directory, topic)
+    bisector = Bisector(pldata.data, pldata.timestamps)
+    # data of the first world frame at 30 Hz
+    first_ts = bisector.timestamps[0]
+    first_frame_data = bisector.by_ts_window((first_ts, first_ts + 1 / 30))
+    confidences = [datum["confidence"] for datum in first_frame_data]
+    duration = time.perf_counter() - start
+    peak_rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    results.put((duration, peak_rss_mb, len(confidences)))
+
+
+def _bench_write_pupil_recording(directory, duration_s, rate_hz):
+    import os
+    import time
+
+    os.makedirs(directory, exist_ok=True)
+    if os.path.exists(os.path.join(directory, "pupil.pldata")):
+        return
+    start = time.perf_counter()
+    with fm.PLData_Writer(directory, "pupil") as writer:
+        for idx in range(duration_s * rate_hz):
+            for eye_id in (0, 1):
+                datum = {
+                    "topic": f"pupil.{eye_id}.3d",
+                    "timestamp": idx / rate_hz,
+                    "confidence": 1.0,
+                    "norm_pos": [0.5, 0.5],
+                    "diameter_3d": 4.0,
+                    "ellipse": {"center": [96.0, 96.0], "axes": [30.0, 25.0]},
+                    "circle_3d": {"center": [0.0, 0.0, 50.0], "radius": 2.0},
+                    "method": "3d c++",
+                    "id": eye_id,
+                }
+                writer.append(datum)
+    print(f"generated recording in {time.perf_counter() - start:.1f}s")
+
+
+def bench_lazy_load(directory="pldata_bench", duration_s=2 * 60 * 60, rate_hz=200):
+    """Compares eager and lazy loading of a synthetic binocular pupil recording.
+
+    Measures the time until the data of the first world frame is available.
+
+    Each loader runs in a fresh process to measure its peak RSS (Linux/macOS).
+    """
+    import multiprocessing as mp
+
+    _bench_write_pupil_recording(directory, duration_s, rate_hz)
+    ctx = mp.get_context("spawn")
+    for lazy in (False, True):
+        results = ctx.Queue()
+        proc = ctx.Process(
+            target=_bench_first_frame, args=(directory, "pupil", lazy, results)
+        )
+        proc.start()
+        duration, peak_rss_mb, num_data = results.get()
+        proc.join()
+        print(
+            f"{'lazy' if lazy else 'eager'}: time to first frame {duration:.3f}s,"
+            f" peak RSS {peak_rss_mb:.0f} MB ({num_data} data in first frame)"
+        )
+
+
+def bench_pupil_window_queries(duration_s=10 * 60, rate_hz=200, fps=30):
+    """Per-frame `PupilDataBisector.by_ts_window()` queries during playback.
+
+    Uses binocular data with 2d and 3d detections, i.e. four pupil topics, and
+    compares against rebuilding and re-sorting the combined bisector per frame.
+    """
+    import time
+
+    data, data_ts, topics = [], [], []
+    for idx in range(duration_s * rate_hz):
+        for eye_id in (0, 1):
+            for detector_tag in ("2d", "3d"):
+                topic = f"pupil.{eye_id}.{detector_tag}"
+                datum = {"topic": topic, "timestamp": idx / rate_hz, "id": eye_id}
+                data.append(fm.Serialized_Dict(python_dict=datum))
+                data_ts.append(idx / rate_hz)
+                topics.append(topic)
+    pupil_data = PupilDataBisector(fm.PLData(data, data_ts, topics))
+    frame_ts = np.arange(0.0, duration_s, 1 / fps)
+    windows = [enclosing_window(frame_ts, idx) for idx in range(len(frame_ts))]
+
+    def legacy_by_ts_window(ts_window):
+        bisectors = pupil_data._bisectors.values()
+        init_dicts = [b.init_dict_for_window(ts_window) for b in bisectors]
+        bisectors = [Bisector(**init_dict) for init_dict in init_dicts]
+        bisectors = [b for b in bisectors if b]
+        return Bisector(
+            list(chain.from_iterable(b.data for b in bisectors)),
+            list(chain.from_iterable(b.data_ts for b in bisectors)),
+        )
+
+    start = time.perf_counter()
+    pupil_data[..., ...]
+    print(f"merging {len(data)} data once: {time.perf_counter() - start:.3f}s")
+    for name, by_ts_window in (
+        ("rebuild per frame", legacy_by_ts_window),
+        ("slice merged index", pupil_data.by_ts_window),
+    ):
+        start = time.perf_counter()
+        num_data = sum(len(by_ts_window(window)) for window in windows)
+        duration = time.perf_counter() - start
+        print(
+            f"{name}: {duration / len(windows) * 1e6:.1f} us per frame"
+            f" ({len(windows)} frames, {num_data} data)"
+        )
+
+
+def bench_mutable_bisector(sizes=(10 ** 5, 10 ** 6), legacy_max_size=10 ** 5):
+    """Insertion-heavy workloads for `Mutable_Bisector`.
+
+    Inserts data with random timestamps one by one, with a window query after
+    every 100 inserts like during playback, and in batches of 1000 via `extend()`.
+    The previous `np.insert()`-based implementation is O(n^2) and only measured up
+    to `legacy_max_size`.
+    """
+    import time
+
+    class Legacy_Mutable_Bisector(Bisector):
+        def __init__(self):
+            super().__init__()
+            self.data = np.array([], dtype=object)
+
+        def insert(self, timestamp, datum):
+            insert_idx = np.searchsorted(self.data_ts, timestamp)
+            self.data_ts = np.insert(self.data_ts, insert_idx, timestamp)
+            self.data = np.insert(self.data, insert_idx, datum)
+
+    def insert_one_by_one(bisector, timestamps, data):
+        for idx, (timestamp, datum) in enumerate(zip(timestamps, data)):
+            bisector.insert(timestamp, datum)
+            if idx % 100 == 0:
+                bisector.by_ts_window((timestamp, timestamp + 0.1))
+
+    def extend_in_batches(bisector, timestamps, data):
+        for start in range(0, len(data), 1000):
+            section = slice(start, start + 1000)
+            bisector.extend(timestamps[section], data[section])
+            bisector.by_ts_window((timestamps[start], timestamps[start] + 0.1))
+
+    rng = np.random.default_rng(0)
+    for size in sizes:
+        timestamps = rng.uniform(0.0, size / 100, size)
+        data = [{"index": idx} for idx in range(size)]
+        variants = [
+            ("Mutable_Bisector.insert", Mutable_Bisector, insert_one_by_one),
+            ("Mutable_Bisector.extend", Mutable_Bisector, extend_in_batches),
+        ]
+        if size <= legacy_max_size:
+            variants.insert(
+                0, ("np.insert (previous)", Legacy_Mutable_Bisector, insert_one_by_one)
+            )
+        for name, bisector_cls, fill in variants:
+            bisector = bisector_cls()
+            start = time.perf_counter()
+            fill(bisector, timestamps, data)
+            bisector.timestamps  # merge everything
+            duration = time.perf_counter() - start
+            print(f"{size:>8d} items, {name:24s}: {duration:7.2f}s")
+
+
+def bench_pupil_data_load(directory="pldata_bench", duration_s=30 * 60, rate_hz=200):
+    """Load time of `PupilDataBisector` with per-datum and batch topic grouping."""
+    import time
+
+    def group_per_datum(data):
+        # previous implementation: parse the topic of every datum
+        indices_by_topic = collections.defaultdict(list)
+        for idx, (raw_topic, datum) in enumerate(zip(data.topics, data.data)):
+            regex_v1 = PupilTopic._match_regex_v1()
+            if re.match(regex_v1, raw_topic):
+                pupil_topic = PupilTopic.create(raw_topic, datum)
+            else:
+                match_v2 = re.match(PupilTopic._match_regex_v2(), raw_topic)
+                pupil_topic = PupilTopic._FORMAT_STRING_V2.format(
+                    eye_id=match_v2.group("eye_id"),
+                    detector_tag=match_v2.group("detector_tag"),
+                )
+            indices_by_topic[pupil_topic].append(idx)
+        return {t: np.asarray(idc) for t, idc in indices_by_topic.items()}
+
+    class Per_Datum_PupilDataBisector(PupilDataBisector):
+        _group_indices_by_pupil_topic = staticmethod(group_per_datum)
+
+    _bench_write_pupil_recording(directory, duration_s, rate_hz)
+    for lazy in (False, True):
+        if lazy:
+            pldata = fm.load_pldata_file_lazy(directory, "pupil")
+        else:
+            pldata = fm.load_pldata_file(directory, "pupil")
+        for name, bisector_cls in (
+            ("per datum", Per_Datum_PupilDataBisector),
+            ("batch", PupilDataBisector),
+        ):
+            start = time.perf_counter()
+            grouped = bisector_cls._group_indices_by_pupil_topic(pldata)
+            grouping_duration = time.perf_counter() - start
+            start = time.perf_counter()
+            bisector_cls(pldata)
+            load_duration = time.perf_counter() - start
+            print(
+                f"{'lazy' if lazy else 'eager'} {len(pldata.data)} data, {name}:"
+                f" grouping {grouping_duration:.2f}s, bisector {load_duration:.2f}s"
+                f" ({len(grouped)} topics)"
+            )
@@ -0,0 +1,308 @@
+"""
+(*)~---------------------------------------------------------------------------
+Pupil - eye tracking platform
+Copyright (C) 2012-2020 Pupil Labs
+
+Distributed under the terms of the GNU
+Lesser General Public License (LGPL v3.0).
+See COPYING and COPYING.LESSER for license details.
+---------------------------------------------------------------------------~(*)
+"""
+import collections
+import concurrent.futures
+import enum
+import logging
+import mmap
+import multiprocessing as mp
+import os
+import threading
+import typing as T
+from glob import iglob
+
+import msgpack
+import numpy as np
+
+import file_methods as fm
+import player_methods as pm
+
+try:
+    from multiprocessing import shared_memory
+except ImportError:  # Python < 3.8
+    shared_memory = None
+
+logger = logging.getLogger(__name__)
+
+
+@enum.unique
+class Loader_Mode(enum.Enum):
+    # Unpacking msgpack holds the GIL most of the time. Threads still overlap the
+    # file reads with each other and with the main thread.
+    THREADS = "threads"
+    # Parses pldata files in worker processes. Only the index of each file is
+    # handed back (via shared memory if available), the data is read by mmap.
+    PROCESSES = "processes"
+
+
+def find_pldata_topics(directory) -> T.List[str]:
+    """Topics of all pldata files in `directory`, largest file first."""
+    paths = sorted(
+        iglob(os.path.join(directory, "*.pldata")), key=os.path.getsize, reverse=True
+    )
+    return [os.path.splitext(os.path.basename(path))[0] for path in paths]
+
+
+class PLData_Loader:
+    """Loads pldata files of a recording concurrently in the background.
+
+    `submit()` returns a future for the data of a topic. Futures are shared, i.e.
+    each topic is only loaded once per combination of arguments, until it is
+    invalidated. Topics passed via `preload_topics` start loading immediately.
+    """
+
+    def __init__(
+        self,
+        directory,
+        preload_topics: T.Iterable[str] = (),
+        mode: Loader_Mode = Loader_Mode.THREADS,
+        max_workers: T.Optional[int] = None,
+    ):
+        self.directory = directory
+        self.mode = Loader_Mode(mode)
+        max_workers = max_workers or min(8, os.cpu_count() or 1)
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers, thread_name_prefix="PLData_Loader"
+        )
+        self._process_pool = None
+        if self.mode is Loader_Mode.PROCESSES:
+            self._process_pool = concurrent.futures.ProcessPoolExecutor(
+                max_workers, mp_context=mp.get_context("spawn")
+            )
+        self._futures = {}
+        self._lock = threading.Lock()
+        for topic in preload_topics:
+            self.submit(topic)
+
+    def submit(self, topic: str, lazy: bool = False) -> concurrent.futures.Future:
+        """Future of the `fm.PLData` of `topic`, see `fm.load_pldata_file()`.
+
+        With `lazy=True` the data is read on access, see `fm.load_pldata_file_lazy()`.
+        """
+        if lazy:
+            return self.submit_call(
+                ("pldata", topic, True),
+                fm.load_pldata_file_lazy,
+                self.directory,
+                topic,
+            )
+        elif self._process_pool is not None:
+            return self.submit_call(
+                ("pldata", topic, False), self._load_in_process, topic
+            )
+        else:
+            return self.submit_call(
+                ("pldata", topic, False), fm.load_pldata_file, self.directory, topic
+            )
+
+    def submit_call(self, key, fn, *args, **kwargs) -> concurrent.futures.Future:
+        """Runs `fn(*args, **kwargs)` once per `key` on the loader threads.
+
+        Use this to also move the processing of loaded data off the main thread.
+        """
+        with self._lock:
+            future = self._futures.get(key)
+            if future is None:
+                future = self._executor.submit(fn, *args, **kwargs)
+                self._futures[key] = future
+            return future
+
+    def submit_pupil_positions(self) -> concurrent.futures.Future:
+        """Future of the recorded pupil data as `pm.PupilDataBisector`."""
+        return self.submit_call(
+            "pupil_positions",
+            pm.PupilDataBisector.load_from_file,
+            self.directory,
+            "pupil",
+            lazy=True,
+        )
+
+    def submit_gaze_positions(self) -> concurrent.futures.Future:
+        """Future of the recorded gaze data as `pm.Bisector`."""
+        return self.submit_call("gaze_positions", _load_gaze_positions, self.directory)
+
+    def load(self, topic: str, lazy: bool = False) -> fm.PLData:
+        """Blocks until the data of `topic` is loaded."""
+        return self.submit(topic, lazy=lazy).result()
+
+    def invalidate(self, topic: str):
+        """Drops the futures of `topic`. Call this after rewriting its pldata file.
+
+        The next `submit()` of `topic` loads the file again.
+        """
+        with self._lock:
+            for key in [key for key in self._futures if key[:2] == ("pldata", topic)]:
+                del self._futures[key]
+
+    def shutdown(self, wait=True):
+        for future in self._futures.values():
+            future.cancel()
+        self._executor.shutdown(wait=wait)
+        if self._process_pool is not None:
+            self._process_pool.shutdown(wait=wait)
+
+    def _load_in_process(self, topic: str) -> fm.PLData:
+        msgpack_path = os.path.join(self.directory, topic + ".pldata")
+        ts_path = os.path.join(self.directory, topic + "_timestamps.npy")
+        if not os.path.exists(msgpack_path) or not os.path.exists(ts_path):
+            return fm.PLData([], [], [])
+        future = self._process_pool.submit(_read_payload_index, msgpack_path)
+        result = future.result()
+        if result is None:
+            # payloads that are not msgpack bin data cannot be sliced from the file
+            return fm.load_pldata_file(self.directory, topic)
+        payload_index, topics_by_code = _receive_payload_index(*result)
+
+        data = collections.deque()
+        topics = collections.deque()
+        if len(payload_index):
+            with open(msgpack_path, "rb") as fh:
+                buffer = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+            with buffer:
+                offsets = payload_index["offset"].tolist()
+                stops = (payload_index["offset"] + payload_index["length"]).tolist()
+                data.extend(
+                    fm.Serialized_Dict(msgpack_bytes=buffer[start:stop])
+                    for start, stop in zip(offsets, stops)
+                )
+            codes = payload_index["topic"].tolist()
+            topics.extend(topics_by_code[code] for code in codes)
+        return fm.PLData(data, np.load(ts_path), topics)
+
+
+def _load_gaze_positions(directory) -> pm.Bisector:
+    gaze = fm.load_pldata_file_lazy(directory, "gaze")
+    columns = fm.load_pldata_columns(directory, "gaze")
+    if columns is not None and len(columns) != len(gaze.data):
+        columns = None
+    return pm.Bisector(gaze.data, gaze.timestamps, columns=columns)
+
+
+_PAYLOAD_INDEX_DTYPE = np.dtype(
+    [("offset", "<u8"), ("length", "<u8"), ("topic", "<u4")]
+)
+# header length of msgpack bin 8/16/32 payloads
+_BIN_HEADER_LENGTH = {0xC4: 2, 0xC5: 3, 0xC6: 5}
+
+
+def _read_payload_index(msgpack_path):
+    """Runs in a worker process. Locates the payload bytes of each datum.
+
+    Returns the index either as name of a shared memory block or as raw bytes,
+    plus the list of distinct topics that the index' topic codes refer to. Returns
+    None if a payload is not msgpack bin data.
+    """
+    rows = []
+    codes_by_topic = {}
+    with open(msgpack_path, "rb") as fh:
+        unpacker = msgpack.Unpacker(fh, raw=False, use_list=False)
+        while True:
+            try:
+                unpacker.read_array_header()
+                topic = unpacker.unpack()
+                start = unpacker.tell()
+                unpacker.skip()
+            except msgpack.OutOfData:
+                break
+            stop = unpacker.tell()
+            rows.append((start, stop - start, topic))
+
+        payload_headers = []
+        if rows:
+            with mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+                payload_headers = [buffer[start] for start, _, _ in rows]
+    for row_idx, payload_header in enumerate(payload_headers):
+        header_length = _BIN_HEADER_LENGTH.get(payload_header)
+        if header_length is None:
+            return None
+        start, length, topic = rows[row_idx]
+        code = codes_by_topic.setdefault(topic, len(codes_by_topic))
+        rows[row_idx] = (start + header_length, length - header_length, code)
+
+    payload_index = np.array(rows, dtype=_PAYLOAD_INDEX_DTYPE)
+    topics = list(codes_by_topic)
+    if shared_memory is None or not payload_index.nbytes:
+        return None, payload_index.tobytes(), topics
+    block = shared_memory.SharedMemory(create=True, size=payload_index.nbytes)
+    try:
+        block.buf[: payload_index.nbytes] = payload_index.tobytes()
+    finally:
+        block.close()
+    return block.name, len(payload_index), topics
+
+
+def _receive_payload_index(shm_name, content, topics):
+    if shm_name is None:
+        return np.frombuffer(content, dtype=_PAYLOAD_INDEX_DTYPE), topics
+    block = shared_memory.SharedMemory(name=shm_name)
+    try:
+        payload_index = np.ndarray(
+            (content,), dtype=_PAYLOAD_INDEX_DTYPE, buffer=block.buf
+        ).copy()
+    finally:
+        block.close()
+        block.unlink()
+    return payload_index, topics
+
+
+def bench_player_startup(directory="pldata_startup_bench", duration_s=30 * 60):
+    """Time until pupil, gaze and notify data of a synthetic recording are loaded.
+
+    Compares sequential loading on the main thread with the loader's thread and
+    process modes, while the main thread keeps doing (simulated) startup work.
+    """
+    import time
+
+    os.makedirs(directory, exist_ok=True)
+    sizes = {"pupil": duration_s * 400, "gaze": duration_s * 200, "notify": 20000}
+    for topic, num_data in sizes.items():
+        if os.path.exists(os.path.join(directory, topic + ".pldata")):
+            continue
+        with fm.PLData_Writer(directory, topic) as writer:
+            for idx in range(num_data):
+                datum = {
+                    "topic": f"{topic}.{idx % 2}.3d",
+                    "timestamp": idx / 200,
+                    "confidence": 1.0,
+                    "norm_pos": [0.5, 0.5],
+                    "ellipse": {"center": [96.0, 96.0], "axes": [30.0, 25.0]},
+                    "base_data": [{"topic": "pupil.0.3d", "norm_pos": [0.5, 0.5]}],
+                }
+                writer.append(datum)
+
+    def simulate_main_thread_work():
+        # e.g. video lookup tables, window and UI setup
+        start = time.perf_counter()
+        while time.perf_counter() - start < 1.0:
+            sum(range(1000))
+
+    start = time.perf_counter()
+    for topic in sizes:
+        fm.load_pldata_file(directory, topic)
+    blocked = time.perf_counter() - start
+    simulate_main_thread_work()
+    print(
+        f"sequential: all data after {time.perf_counter() - start:.2f}s,"
+        f" main thread blocked by loading for {blocked:.2f}s"
+    )
+
+    for mode in Loader_Mode:
+        start = time.perf_counter()
+        loader = PLData_Loader(directory, preload_topics=sizes, mode=mode)
+        simulate_main_thread_work()
+        wait_start = time.perf_counter()
+        num_data = sum(len(loader.load(topic).data) for topic in sizes)
+        end = time.perf_counter()
+        print(
+            f"{mode.value}: all data after {end - start:.2f}s, main thread blocked"
+            f" by waiting for {end - wait_start:.2f}s ({num_data} data)"
+        )
+        loader.shutdown()
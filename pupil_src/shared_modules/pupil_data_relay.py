@@ -28,18 +28,131 @@ class Pupil_Data_Relay(System_Plugin_Base):
         )
 
     def recent_events(self, events):
-        recent_pupil_data = []
+        recent_pupil_data = [
+            pupil_datum.deserialize()
+            for topic, pupil_datum in self.pupil_sub.recv_batch()
+        ]
         recent_gaze_data = []
-        while self.pupil_sub.new_data:
-            topic, pupil_datum = self.pupil_sub.recv()
-            recent_pupil_data.append(pupil_datum)
-
-            gazer = self.g_pool.active_gaze_mapping_plugin
-            if gazer is None:
-                continue
-            for gaze_datum in gazer.map_pupil_to_gaze([pupil_datum]):
+
+        gazer = self.g_pool.active_gaze_mapping_plugin
+        if gazer is not None and recent_pupil_data:
+            # map in order of arrival, like one by one
+            recent_gaze_data = list(
+                gazer.map_pupil_to_gaze(recent_pupil_data, sort_by_creation_time=False)
+            )
+            for gaze_datum in recent_gaze_data:
                 self.gaze_pub.send(gaze_datum)
-                recent_gaze_data.append(gaze_datum)
 
         events["pupil"] = recent_pupil_data
         events["gaze"] = recent_gaze_data
+
+
+def bench_gaze_mapping(duration_s=10, rate_hz=1000, fps=30):
+    """Maps synthetic binocular pupil data like `Pupil_Data_Relay`.
+
+    Both eyes produce pupil data at `rate_hz`. The data are mapped with 2d and 3d
+    gazers one by one, and in batches per world loop iteration at `fps`. Reports
+    the mapped pupil data per second.
+    """
+    import time
+    import types
+
+    import numpy as np
+
+    from camera_models import Dummy_Camera
+    from gaze_mapping import Gazer2D, Gazer3D
+
+    resolution = (1280, 720)
+    g_pool = types.SimpleNamespace(
+        capture=types.SimpleNamespace(
+            frame_size=resolution, intrinsics=Dummy_Camera(resolution, "bench")
+        )
+    )
+    rng = np.random.default_rng(0)
+
+    def model_2d(num_features):
+        return {
+            "coef_": rng.normal(scale=0.1, size=(2, num_features)).tolist(),
+            "intercept_": [0.5, 0.5],
+        }
+
+    def eye_camera_to_world(x):
+        # eye cameras face the eyes, opposite to the world camera
+        matrix = np.diag([-1.0, 1.0, -1.0, 1.0])
+        matrix[:3, 3] = x, 15.0, -20.0
+        return matrix.tolist()
+
+    gazer_params = {
+        Gazer2D: {
+            "left_model": model_2d(6),
+            "right_model": model_2d(6),
+            "binocular_model": model_2d(12),
+        },
+        Gazer3D: {
+            "left_model": {
+                "eye_camera_to_world_matrix": eye_camera_to_world(-30.0),
+                "gaze_distance": 500.0,
+            },
+            "right_model": {
+                "eye_camera_to_world_matrix": eye_camera_to_world(30.0),
+                "gaze_distance": 500.0,
+            },
+            "binocular_model": {
+                "eye_camera_to_world_matrix0": eye_camera_to_world(30.0),
+                "eye_camera_to_world_matrix1": eye_camera_to_world(-30.0),
+            },
+        },
+    }
+
+    num_samples = duration_s * rate_hz
+    pupil_data = []
+    for idx in range(num_samples):
+        for eye_id in (0, 1):
+            normal = rng.normal(scale=0.2, size=3) + (0.0, 0.0, -1.0)
+            pupil_data.append(
+                {
+                    "topic": f"pupil.{eye_id}",
+                    "id": eye_id,
+                    # eye cameras are not synchronized
+                    "timestamp": (idx + 0.3 * eye_id) / rate_hz,
+                    # some data are mapped monocularly
+                    "confidence": 0.5 if idx % 50 == 0 else 0.95,
+                    "norm_pos": rng.uniform(size=2).tolist(),
+                    "sphere": {"center": [0.0, 0.0, 35.0]},
+                    "circle_3d": {"normal": (normal / np.linalg.norm(normal)).tolist()},
+                }
+            )
+    batch_size = len(pupil_data) // (duration_s * fps)
+    batches = [
+        pupil_data[idx : idx + batch_size]
+        for idx in range(0, len(pupil_data), batch_size)
+    ]
+
+    for gazer_class, params in gazer_params.items():
+        method = "3d c++" if gazer_class is Gazer3D else "2d c++"
+        for datum in pupil_data:
+            datum["method"] = method
+
+        for label, batched in (("one by one", False), ("batched", True)):
+            gazer = gazer_class(g_pool, params=params)
+            start = time.perf_counter()
+            if batched:
+                gaze = [
+                    gaze_datum
+                    for batch in batches
+                    for gaze_datum in gazer.map_pupil_to_gaze(
+                        batch, sort_by_creation_time=False
+                    )
+                ]
+            else:
+                gaze = [
+                    gaze_datum
+                    for pupil_datum in pupil_data
+                    for gaze_datum in gazer.map_pupil_to_gaze([pupil_datum])
+                ]
+            elapsed = time.perf_counter() - start
+            print(
+                f"{gazer_class.__name__} {label:10s}:"
+                f" {len(pupil_data) / elapsed:8.0f} pupil data/s,"
+                f" {len(gaze)} gaze data"
+            )
@@ -190,12 +190,11 @@ class Pupil_Producer_Base(Observable, Producer_Plugin_Base):
                         pupil_positions.timestamps, timestamps_target
                     )
                     data_indeces = np.unique(data_indeces)
-                    for idx in data_indeces:
-                        ts_data_pair = (
-                            pupil_positions.timestamps[idx],
-                            pupil_positions[idx][key],
-                        )
-                        ts_data_pairs_right_left[eye_id].append(ts_data_pair)
+                    ts_data_pairs = zip(
+                        pupil_positions.timestamps[data_indeces],
+                        pupil_positions.column(key, data_indeces),
+                    )
+                    ts_data_pairs_right_left[eye_id].extend(ts_data_pairs)
 
             if ylim is None:
                 # max_val must not be 0, else gl will crash
@@ -295,9 +294,10 @@ class Pupil_From_Recording(Pupil_Producer_Base):
 
     def __init__(self, g_pool):
         super().__init__(g_pool)
-
-        pupil_data = pm.PupilDataBisector.load_from_file(g_pool.rec_dir, "pupil")
-        g_pool.pupil_positions = pupil_data
+        # Player started loading in the background already. Wait for it here, such
+        # that consumers that are initialized after us find the data.
+        future = g_pool.pldata_loader.submit_pupil_positions()
+        g_pool.pupil_positions = future.result()
         self._pupil_changed_announcer.announce_existing()
         logger.debug("pupil positions changed")
 
@@ -409,18 +409,13 @@ class Offline_Pupil_Detection(Pupil_Producer_Base):
 
     def recent_events(self, events):
         super().recent_events(events)
-        while self.data_sub.new_data:
-            topic = self.data_sub.recv_topic()
-            remaining_frames = self.data_sub.recv_remaining_frames()
+        for topic, payload in self.data_sub.recv_batch():
             if topic.startswith("pupil."):
-                # pupil data only has one remaining frame
-                payload_serialized = next(remaining_frames)
-                pupil_datum = fm.Serialized_Dict(msgpack_bytes=payload_serialized)
+                pupil_datum = fm.Serialized_Dict(msgpack_bytes=payload.serialized)
                 assert pm.PupilTopic.match(topic, eye_id=pupil_datum["id"])
                 timestamp = pupil_datum["timestamp"]
                 self._pupil_data_store.append(topic, pupil_datum, timestamp)
             else:
-                payload = self.data_sub.deserialize_payload(*remaining_frames)
                 if payload["subject"] == "file_source.video_finished":
                     for eyeid in (0, 1):
                         if self.eye_video_loc[eyeid] == payload["source_path"]:
@@ -9,9 +9,16 @@ See COPYING and COPYING.LESSER for license details.
 ---------------------------------------------------------------------------~(*)
 """
 
+import concurrent.futures
 import logging
+import logging.handlers
+import multiprocessing as mp
+import os
+import queue
+from pathlib import Path
 from types import SimpleNamespace
 
+import file_methods as fm
 from video_capture.file_backend import File_Source
 
 from ..recording import PupilRecording
@@ -71,6 +78,14 @@ def update_recording(rec_dir: str):
 
     check_for_worldless_recording_new_style(rec_dir)
 
+    # restore timestamps of data files that were not closed properly, e.g. because
+    # Capture crashed during the recording
+    _recover_all_pldata_timestamps(rec_dir)
+
+    # join data files that were recorded in parts, video parts are joined by the
+    # lookup tables
+    _merge_all_pldata_parts(rec_dir)
+
     # update to latest
     recording_update_to_latest_new_style(rec_dir)
 
@@ -78,6 +93,10 @@ def update_recording(rec_dir: str):
     # compiling large lookup tables when they are needed
     _generate_all_lookup_tables(rec_dir)
 
+    # backfill numeric columns of pupil and gaze data, which allow fast numeric
+    # queries without deserializing every datum
+    _generate_all_pldata_columns(rec_dir)
+
     # Update offline calibrations to latest calibration model version
     from gaze_producer.model.legacy import update_offline_calibrations_to_latest_version
     update_offline_calibrations_to_latest_version(rec_dir)
@@ -96,13 +115,67 @@ def _generate_all_lookup_tables(rec_dir: str):
         recording.files().core().eye0().videos(),
         recording.files().core().eye1().videos(),
     ]
-    for videos in videosets:
-        if not videos:
+    source_paths = [str(videos[0].resolve()) for videos in videosets if videos]
+    max_workers = min(len(source_paths), os.cpu_count() or 1)
+    if max_workers <= 1:
+        for source_path in source_paths:
+            _generate_lookup_table(source_path)
+        return
+
+    # Building a lookup table is mostly demuxing and numpy work, i.e. CPU bound. The
+    # video sets are independent of each other, so we build them in parallel.
+    mp_context = mp.get_context("spawn")
+    log_queue = mp_context.Queue()
+    try:
+        with concurrent.futures.ProcessPoolExecutor(
+            max_workers,
+            mp_context=mp_context,
+            initializer=_forward_logs_to_queue,
+            initargs=(log_queue,),
+        ) as pool:
+            # consume results to re-raise exceptions of the workers
+            for _ in pool.map(_generate_lookup_table, source_paths):
+                pass
+    finally:
+        while True:
+            try:
+                record = log_queue.get(timeout=0.05)
+            except queue.Empty:
+                break
+            logging.getLogger(record.name).handle(record)
+        log_queue.close()
+
+
+def _generate_lookup_table(source_path: str):
+    File_Source(SimpleNamespace(), source_path=source_path, fill_gaps=True, timing=None)
+
+
+def _forward_logs_to_queue(log_queue):
+    root_logger = logging.getLogger()
+    root_logger.handlers = [logging.handlers.QueueHandler(log_queue)]
+    root_logger.setLevel(logging.DEBUG)
+
+
+def _recover_all_pldata_timestamps(rec_dir: str):
+    for pldata_path in sorted(Path(rec_dir).glob("*.pldata")):
+        fm.recover_pldata_timestamps(rec_dir, pldata_path.stem)
+
+
+def _merge_all_pldata_parts(rec_dir: str):
+    for name, part_names in fm.find_pldata_parts(rec_dir).items():
+        logger.info(f"Merging {len(part_names) + 1} parts of {name}.pldata")
+        fm.merge_pldata_parts(rec_dir, name, part_names)
+
+
+def _generate_all_pldata_columns(rec_dir: str):
+    for topic in ("pupil", "gaze"):
+        pldata_path = Path(rec_dir) / f"{topic}.pldata"
+        if not pldata_path.exists():
             continue
-        source_path = videos[0].resolve()
-        File_Source(
-            SimpleNamespace(), source_path=source_path, fill_gaps=True, timing=None
-        )
+        if fm.load_pldata_columns(rec_dir, topic) is not None:
+            continue
+        logger.info(f"Creating numeric columns for {pldata_path.name}")
+        fm.build_pldata_columns(rec_dir, topic)
 
 
 __all__ = ["update_recording"]
@@ -153,7 +153,7 @@ def _convert_gaze(recording: PupilRecording):
                 (x, y), size=(width, height), flip_y=True
             )
             writer.append(template_datum)
-        logger.info(f"Converted {len(writer.ts_queue)} gaze positions.")
+        logger.info(f"Converted {writer.num_data} gaze positions.")
 
 
 def android_system_info(info_json: dict) -> str:
@@ -73,7 +73,12 @@ def update_newstyle_20_21(rec_dir: str):
         for path in Path(rec_dir).iterdir():
             if not path.is_file:
                 continue
-            if path.name in ["gaze.pldata", "gaze_timestamps.npy"]:
+            if path.name in [
+                "gaze.pldata",
+                "gaze_timestamps.npy",
+                "gaze" + fm.PLDATA_COLUMNS_SUFFIX,
+                "gaze" + fm.PLDATA_INDEX_SUFFIX,
+            ]:
                 logger.debug(
                     f"Deleting potentially corrupted file '{path.name}'"
                     f" from pre v1.18."
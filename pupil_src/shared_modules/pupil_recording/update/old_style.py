@@ -562,10 +562,15 @@ def _delete_all_lookup_files(rec_dir):
     names = ("world", "eye0", "eye1")
     rec_dir = Path(rec_dir)
     for name in names:
-        try:
-            (rec_dir / f"{name}_lookup.npy").unlink()
-        except FileNotFoundError:
-            pass
+        for file_name in (
+            f"{name}_lookup.npy",
+            f"{name}_lookup_keyframes.npy",
+            f"{name}_lookup_pts.npz",
+        ):
+            try:
+                (rec_dir / file_name).unlink()
+            except FileNotFoundError:
+                pass
 
 
 def update_recording_bytes_to_unicode(rec_dir):
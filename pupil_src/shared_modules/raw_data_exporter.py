@@ -208,7 +208,9 @@ class _Base_Positions_Exporter(abc.ABC):
         export_path = os.path.join(export_dir, export_file)
 
         export_section = positions_bisector.init_dict_for_window(export_window)
-        export_world_idc = pm.find_closest(timestamps, export_section["data_ts"])
+        export_world_idc = pm.correlated_frame_indices(
+            *pm.correlate_data_indices(export_section["data_ts"], timestamps)
+        )
 
         with open(export_path, "w", encoding="utf-8", newline="") as csvfile:
             csv_header = type(self).csv_export_labels()
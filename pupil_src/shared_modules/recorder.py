@@ -23,10 +23,11 @@ from ndsi import H264Writer
 from pyglui import ui
 
 import csv_utils
-from av_writer import MPEG_Writer, JPEG_Writer, NonMonotonicTimestampError
-from file_methods import PLData_Writer, load_object
+from av_writer import AV_Writer, MPEG_Writer, JPEG_Writer, NonMonotonicTimestampError
+from file_methods import PLData_Writer, load_object, pldata_part_name
 from methods import get_system_info, timer
 from video_capture.ndsi_backend import NDSI_Source
+from writer_thread import BackpressurePolicy, Writer_Thread
 
 from pupil_recording.info import Version
 from pupil_recording.info import RecordingInfoFile
@@ -49,6 +50,26 @@ def available_gb(path):
     return num_avail_gb
 
 
+def _write_pldata(writer, data):
+    """Writer thread task. Returns the number of written bytes."""
+    offset = writer.offset
+    writer.extend(data)
+    return writer.offset - offset
+
+
+def _write_video_frame(writer, frame):
+    """Writer thread task. Returns the number of written bytes."""
+    bytes_written = getattr(writer, "bytes_written", 0)
+    writer.write_video_frame(frame)
+    return getattr(writer, "bytes_written", 0) - bytes_written
+
+
+def _close_part_writer(writer):
+    """Writer thread task. Closes the video or pldata writer of a finished part."""
+    writer.close()
+    return 0
+
+
 class Recorder(System_Plugin_Base):
     """Capture Recorder"""
 
@@ -67,6 +88,10 @@ class Recorder(System_Plugin_Base):
         show_info_menu=False,
         record_eye=True,
         raw_jpeg=True,
+        writer_queue_size=600,
+        writer_backpressure=BackpressurePolicy.BLOCK.value,
+        part_duration_min=0,
+        part_size_gb=0,
     ):
         super().__init__(g_pool)
         # update name if it was autogenerated.
@@ -96,6 +121,11 @@ class Recorder(System_Plugin_Base):
             self.rec_root_dir = default_rec_root_dir
 
         self.raw_jpeg = raw_jpeg
+        self.writer_queue_size = writer_queue_size
+        self.writer_backpressure = BackpressurePolicy(writer_backpressure).value
+        # start a new part of the recording every n minutes or GB, 0 to disable
+        self.part_duration_min = part_duration_min
+        self.part_size_gb = part_size_gb
         self.order = 0.9
         self.record_eye = record_eye
         self.session_name = session_name
@@ -111,6 +141,8 @@ class Recorder(System_Plugin_Base):
         self.low_disk_space_thumb = None
         check_timer = timer(1.0)
         self.check_space = lambda: next(check_timer)
+        stats_timer = timer(1.0)
+        self.check_writer_stats = lambda: next(stats_timer)
 
     def get_init_dict(self):
         d = {}
@@ -121,6 +153,10 @@ class Recorder(System_Plugin_Base):
         d["show_info_menu"] = self.show_info_menu
         d["rec_root_dir"] = self.rec_root_dir
         d["raw_jpeg"] = self.raw_jpeg
+        d["writer_queue_size"] = self.writer_queue_size
+        d["writer_backpressure"] = self.writer_backpressure
+        d["part_duration_min"] = self.part_duration_min
+        d["part_size_gb"] = self.part_size_gb
         return d
 
     def init_ui(self):
@@ -172,6 +208,39 @@ class Recorder(System_Plugin_Base):
                 label="Compression",
             )
         )
+        self.menu.append(
+            ui.Selector(
+                "writer_backpressure",
+                self,
+                selection=[policy.value for policy in BackpressurePolicy],
+                labels=["Wait for disk", "Drop oldest data", "Drop newest data"],
+                label="When disk is too slow",
+            )
+        )
+        self.menu.append(
+            ui.Info_Text(
+                "Long recordings can be split into parts of limited duration or size."
+                " Player joins the parts when opening the recording."
+            )
+        )
+        self.menu.append(
+            ui.Selector(
+                "part_duration_min",
+                self,
+                selection=[0, 5, 15, 30, 60],
+                labels=["No limit", "5 min", "15 min", "30 min", "60 min"],
+                label="Part duration",
+            )
+        )
+        self.menu.append(
+            ui.Selector(
+                "part_size_gb",
+                self,
+                selection=[0, 1, 2, 4],
+                labels=["No limit", "1 GB", "2 GB", "4 GB"],
+                label="Part size",
+            )
+        )
         self.menu.append(
             ui.Info_Text(
                 "Recording the raw eye video is optional. We use it for debugging."
@@ -233,6 +302,9 @@ class Recorder(System_Plugin_Base):
         Emits notifications:
             ``recording.started``: New recording session started
             ``recording.stopped``: Current recording session stopped
+            ``recording.writer_stats``: Queue depth, throughput (bytes_per_s), and
+                number of written and dropped items of the recording writer thread.
+                Sent every second during a recording.
 
         Args:
             notification (dictionary): Notification dictionary
@@ -244,12 +316,10 @@ class Recorder(System_Plugin_Base):
                 notification["timestamp"] = self.g_pool.get_timestamp()
             # else:
             notification["topic"] = "notify." + notification["subject"]
-            try:
-                writer = self.pldata_writers["notify"]
-            except KeyError:
-                writer = PLData_Writer(self.rec_path, "notify")
-                self.pldata_writers["notify"] = writer
-            writer.append(notification)
+            writer = self.pldata_writer("notify")
+            self.writer_thread.submit(
+                _write_pldata, writer, [dict(notification)], droppable=False
+            )
 
         elif notification["subject"] == "recording.should_start":
             if self.running:
@@ -307,7 +377,15 @@ class Recorder(System_Plugin_Base):
             return
 
         self.pldata_writers = {}
+        self.writer_thread = Writer_Thread(
+            max_queue_size=self.writer_queue_size,
+            policy=BackpressurePolicy(self.writer_backpressure),
+            name="Recorder_Writer",
+        )
+        self.num_dropped_reported = 0
         self.frame_count = 0
+        self.part_idx = 0
+        self.part_start_time = self.start_time
         self.running = True
         self.menu.read_only = True
         recording_uuid = uuid.uuid4()
@@ -337,18 +415,7 @@ class Recorder(System_Plugin_Base):
         self.meta_info.recording_uuid = recording_uuid
         self.meta_info.system_info = get_system_info()
 
-        self.video_path = os.path.join(self.rec_path, "world.mp4")
-        if self.raw_jpeg and self.g_pool.capture.jpeg_support:
-            self.writer = JPEG_Writer(self.video_path, start_time_synced)
-        elif hasattr(self.g_pool.capture._recent_frame, "h264_buffer"):
-            self.writer = H264Writer(
-                self.video_path,
-                self.g_pool.capture.frame_size[0],
-                self.g_pool.capture.frame_size[1],
-                int(self.g_pool.capture.frame_rate),
-            )
-        else:
-            self.writer = MPEG_Writer(self.video_path, start_time_synced)
+        self.writer = self.open_video_writer(start_time_synced)
 
         calibration_data_notification_classes = [CalibrationSetupNotification, CalibrationResultNotification]
         writer = PLData_Writer(self.rec_path, "notify")
@@ -380,6 +447,62 @@ class Recorder(System_Plugin_Base):
             }
         )
 
+    def open_video_writer(self, start_time_synced):
+        # VideoSet joins all videos whose names start with "world"
+        name = "world" if self.part_idx == 0 else f"world_{self.part_idx:03d}"
+        self.video_path = os.path.join(self.rec_path, name + ".mp4")
+        if self.raw_jpeg and self.g_pool.capture.jpeg_support:
+            return JPEG_Writer(self.video_path, start_time_synced)
+        elif hasattr(self.g_pool.capture._recent_frame, "h264_buffer"):
+            return H264Writer(
+                self.video_path,
+                self.g_pool.capture.frame_size[0],
+                self.g_pool.capture.frame_size[1],
+                int(self.g_pool.capture.frame_rate),
+            )
+        else:
+            return MPEG_Writer(self.video_path, start_time_synced)
+
+    def pldata_writer(self, key):
+        try:
+            return self.pldata_writers[key]
+        except KeyError:
+            name = pldata_part_name(key, self.part_idx)
+            writer = PLData_Writer(self.rec_path, name)
+            self.pldata_writers[key] = writer
+            return writer
+
+    def part_is_full(self):
+        if not isinstance(self.writer, AV_Writer):
+            # H264Writer passes encoded frames through, cannot start at any frame
+            return False
+        if (
+            self.part_duration_min
+            and time() - self.part_start_time >= self.part_duration_min * 60
+        ):
+            return True
+        if self.part_size_gb:
+            part_bytes = getattr(self.writer, "bytes_written", 0) + sum(
+                writer.offset for writer in self.pldata_writers.values()
+            )
+            return part_bytes >= self.part_size_gb * 1e9
+        return False
+
+    def start_next_part(self, start_time_synced):
+        """Closes the writers of the current part and starts the next part.
+
+        The video of every part starts with a keyframe. The writers are closed on
+        the writer thread, after all data of the current part has been written.
+        """
+        self.writer_thread.submit(_close_part_writer, self.writer, droppable=False)
+        for writer in self.pldata_writers.values():
+            self.writer_thread.submit(_close_part_writer, writer, droppable=False)
+        self.pldata_writers = {}
+        self.part_idx += 1
+        self.part_start_time = time()
+        self.writer = self.open_video_writer(start_time_synced)
+        logger.debug(f"Started part {self.part_idx} of the recording")
+
     def open_info_menu(self):
         self.info_menu = ui.Growing_Menu(
             "additional Recording Info", size=(300, 300), pos=(300, 300)
@@ -434,34 +557,58 @@ class Recorder(System_Plugin_Base):
         if self.running:
             for key, data in events.items():
                 if key not in ("dt", "depth_frame") and not key.startswith("frame"):
-                    try:
-                        writer = self.pldata_writers[key]
-                    except KeyError:
-                        writer = PLData_Writer(self.rec_path, key)
-                        self.pldata_writers[key] = writer
-                    writer.extend(data)
+                    writer = self.pldata_writer(key)
+                    self.writer_thread.submit(_write_pldata, writer, list(data))
             if "frame" in events:
                 frame = events["frame"]
-                try:
-                    self.writer.write_video_frame(frame)
+                if self.part_is_full():
+                    self.start_next_part(frame.timestamp)
+                if self.writer_thread.submit(_write_video_frame, self.writer, frame):
                     self.frame_count += 1
-                except NonMonotonicTimestampError as e:
-                    logger.error(
-                        "Recorder received non-monotonic timestamp!"
-                        " Stopping the recording!"
-                    )
-                    logger.debug(str(e))
-                    self.notify_all({"subject": "recording.should_stop"})
-                    self.notify_all(
-                        {"subject": "recording.should_stop", "remote_notify": "all"}
-                    )
+            self.handle_writer_errors()
+            if self.check_writer_stats():
+                self.notify_writer_stats()
             # # cv2.putText(frame.img, "Frame %s"%self.frame_count,(200,200), cv2.FONT_HERSHEY_SIMPLEX,1,(255,100,100))
 
             self.button.status_text = self.get_rec_time_str()
 
+    def handle_writer_errors(self):
+        for error in self.writer_thread.pop_errors():
+            if isinstance(error, NonMonotonicTimestampError):
+                logger.error(
+                    "Recorder received non-monotonic timestamp!"
+                    " Stopping the recording!"
+                )
+                logger.debug(str(error))
+                self.notify_all({"subject": "recording.should_stop"})
+                self.notify_all(
+                    {"subject": "recording.should_stop", "remote_notify": "all"}
+                )
+            else:
+                logger.error(f"Error while writing recording data: {error}")
+
+    def notify_writer_stats(self):
+        stats = self.writer_thread.stats()
+        if stats["dropped"] > self.num_dropped_reported:
+            logger.warning(
+                f"Dropped {stats['dropped'] - self.num_dropped_reported} items"
+                " because the disk could not keep up with the recording!"
+            )
+            self.num_dropped_reported = stats["dropped"]
+        self.notify_all({"subject": "recording.writer_stats", **stats})
+
     def stop(self):
         duration_s = self.g_pool.get_timestamp() - self.meta_info.start_time_synced_s
 
+        # write all queued data before closing the writers
+        self.writer_thread.stop()
+        self.handle_writer_errors()
+        stats = self.writer_thread.stats()
+        logger.debug(
+            f"Recorder wrote {stats['written']} items, dropped {stats['dropped']}"
+        )
+        self.writer_thread = None
+
         # explicit release of VideoWriter
         try:
             self.writer.release()
@@ -32,6 +32,7 @@ class ScanPathBackgroundTask(Observable, _BaseTask):
         self._bg_task = None
         self._progress = 0.0
         self._gaze_data = None
+        self._frame_consumer = None
 
     # _BaseTask
 
@@ -51,10 +52,15 @@ class ScanPathBackgroundTask(Observable, _BaseTask):
 
         self._gaze_data = scan_path_zeros_numpy_array()
 
+        frame_server = getattr(self.g_pool, "frame_server", None)
+        if frame_server is not None:
+            # optical flow needs consecutive frames
+            self._frame_consumer = frame_server.register_consumer(from_start=True)
+
         self._bg_task = IPC_Logging_Task_Proxy(
             "Scan path",
             generate_frames_with_corrected_gaze,
-            args=(g_pool, timeframe, preprocessed_data),
+            args=(g_pool, timeframe, preprocessed_data, self._frame_consumer),
         )
 
     def process(self):
@@ -64,7 +70,9 @@ class ScanPathBackgroundTask(Observable, _BaseTask):
             except Exception as err:
                 self._bg_task.cancel()
                 self._bg_task = None
+                self._release_frame_consumer()
                 self.on_failed(err)
+                return
 
             for progress, gaze_data in task_data:
                 gaze_data = scan_path_numpy_array_from(gaze_data)
@@ -74,6 +82,7 @@ class ScanPathBackgroundTask(Observable, _BaseTask):
 
             if self._bg_task.completed:
                 self._bg_task = None
+                self._release_frame_consumer()
                 self._gaze_data = scan_path_numpy_array_from(self._gaze_data)
                 self.on_completed(self._gaze_data)
 
@@ -81,17 +90,25 @@ class ScanPathBackgroundTask(Observable, _BaseTask):
         if self._bg_task is not None:
             self._bg_task.cancel()
             self._bg_task = None
+            self._release_frame_consumer()
             self.on_canceled()
         self._progress = 0.0
 
+    def _release_frame_consumer(self):
+        if self._frame_consumer is not None:
+            self.g_pool.frame_server.release_consumer(self._frame_consumer)
+            self._frame_consumer = None
+
     def cleanup(self):
         self.cancel()
 
 
-def generate_frames_with_corrected_gaze(g_pool, timeframe, preprocessed_data):
+def generate_frames_with_corrected_gaze(
+    g_pool, timeframe, preprocessed_data, frame_consumer=None
+):
     sp = ScanPathAlgorithm(timeframe)
 
-    for progress, frame in generate_frames(g_pool):
+    for progress, frame in generate_frames(g_pool, frame_consumer):
         gaze_data = preprocessed_data[preprocessed_data.frame_index == frame.index]
         gaze_data = sp.update_from_frame(frame, gaze_data)
         yield progress, gaze_data
@@ -15,6 +15,7 @@ import numpy as np
 
 from pupil_recording import PupilRecording
 from video_capture.utils import VideoSet
+from frame_server import Frame_Consumer
 from video_capture.file_backend import File_Source, EndofVideoError
 from gaze_producer.gaze_from_recording import GazeFromRecording
 import methods as m
@@ -148,7 +149,14 @@ def generate_frames_with_gaze(g_pool):
         yield progress, current_frame, gaze_datums
 
 
-def generate_frames(g_pool):
+def generate_frames(g_pool, frame_consumer=None):
+    if frame_consumer is not None:
+        consumer = Frame_Consumer(frame_consumer)
+        total_frame_count = consumer.frame_count
+        for current_frame in consumer:
+            yield current_frame.index / total_frame_count, current_frame
+        return
+
     recording = PupilRecording(g_pool.rec_dir)
     video_path = recording.files().world().videos()[0]
 
@@ -38,6 +38,7 @@ class Seek_Control(System_Plugin_Base):
         self._trim_right = len(self.g_pool.timestamps) - 1
         self.was_playing = True
         self.was_seeking = False
+        self.dragging = False  # seek bar is being dragged
         self.start_time = 0.0
         self.start_ts = self.g_pool.timestamps[0]
         self.time_slew = 0.0
@@ -74,6 +75,7 @@ class Seek_Control(System_Plugin_Base):
             self._recent_playback_time = pbt
 
     def on_seek(self, seeking):
+        self.dragging = seeking
         if seeking:
             self.was_seeking = True
             self.was_playing = self.play
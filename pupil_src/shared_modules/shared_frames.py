@@ -0,0 +1,438 @@
+"""
+(*)~---------------------------------------------------------------------------
+Pupil - eye tracking platform
+Copyright (C) 2012-2020 Pupil Labs
+
+Distributed under the terms of the GNU
+Lesser General Public License (LGPL v3.0).
+See COPYING and COPYING.LESSER for license details.
+---------------------------------------------------------------------------~(*)
+"""
+
+"""
+Same-host transport of video frames via shared memory.
+
+Readers request frames in shared memory by subscribing to the frame topic
+prefixed with `SHM_TOPIC_PREFIX`, e.g. "shm.frame.world". While such a
+subscription exists, publishers write frames into a ring buffer of slots in
+shared memory and publish a small slot descriptor over the IPC backbone under
+that topic. Frames are also sent over ZMQ as before. ZMQ drops those without
+subscribers at the publisher.
+
+Each slot has a header with a sequence number. It is odd while the slot is
+written. Readers copy a slot and check that its sequence number still matches
+the descriptor, else the frame was overwritten and is dropped.
+"""
+
+import logging
+import os
+import struct
+import urllib.parse
+
+import numpy as np
+import zmq
+
+import zmq_tools
+
+try:
+    from multiprocessing import shared_memory
+except ImportError:  # Python < 3.8
+    shared_memory = None
+
+logger = logging.getLogger(__name__)
+
+SHM_TOPIC_PREFIX = "shm."
+
+# sequence number, frame index, timestamp, number of bytes, format, ndim, shape
+_HEADER = struct.Struct("<QqdQ16sB3I3x")
+_SEQUENCE = struct.Struct("<Q")
+
+
+def is_available():
+    return shared_memory is not None
+
+
+class Shared_Frame_Ring(object):
+    """Ring buffer of frame slots in shared memory, written by one process.
+
+    The buffer is recreated with larger slots if a frame does not fit.
+    """
+
+    def __init__(self, num_slots=8):
+        assert is_available(), "Shared memory requires Python 3.8"
+        self.num_slots = num_slots
+        self.slot_size = 0
+        self._shm = None
+        self._next_slot = 0
+
+    def write(self, data, index, timestamp, format):
+        """Copies `data` into the next slot and returns its descriptor."""
+        view = memoryview(data).cast("B")
+        shape = data.shape if isinstance(data, np.ndarray) else (view.nbytes,)
+        if view.nbytes > self.slot_size:
+            self._allocate(view.nbytes)
+
+        slot = self._next_slot
+        self._next_slot = (slot + 1) % self.num_slots
+        offset = slot * (_HEADER.size + self.slot_size)
+        buf = self._shm.buf
+        (seq,) = _SEQUENCE.unpack_from(buf, offset)
+
+        # odd while writing
+        _HEADER.pack_into(
+            buf,
+            offset,
+            seq + 1,
+            index,
+            timestamp,
+            view.nbytes,
+            format.encode(),
+            len(shape),
+            *shape,
+            *(0,) * (3 - len(shape)),
+        )
+        data_offset = offset + _HEADER.size
+        buf[data_offset : data_offset + view.nbytes] = view
+        _SEQUENCE.pack_into(buf, offset, seq + 2)
+        return {
+            "name": self._shm.name,
+            "slot": slot,
+            "slot_size": self.slot_size,
+            "seq": seq + 2,
+        }
+
+    def _allocate(self, nbytes):
+        self.close()
+        # leave room for frames of varying size, e.g. jpeg
+        self.slot_size = nbytes + nbytes // 4
+        self._shm = shared_memory.SharedMemory(
+            create=True, size=self.num_slots * (_HEADER.size + self.slot_size)
+        )
+        self._next_slot = 0
+
+    def close(self):
+        if self._shm is not None:
+            self._shm.close()
+            _unlink_shared_memory(self._shm)
+            self._shm = None
+
+
+class Shared_Frame_Reader(object):
+    """Reads frames from `Shared_Frame_Ring`s of other processes."""
+
+    def __init__(self, max_buffers=4):
+        self.max_buffers = max_buffers
+        self._buffers = {}
+
+    def read(self, descriptor):
+        """Returns the header and a copy of the frame, see `Shared_Frame_Ring`.
+
+        Returns None if the frame was overwritten or its buffer is gone.
+        """
+        try:
+            shm = self._attach(descriptor["name"])
+        except FileNotFoundError:
+            return None
+        buf = shm.buf
+        offset = descriptor["slot"] * (_HEADER.size + descriptor["slot_size"])
+
+        fields = _HEADER.unpack_from(buf, offset)
+        seq, index, timestamp, nbytes, frame_format, ndim, *shape = fields
+        if seq != descriptor["seq"]:
+            return None
+        data_offset = offset + _HEADER.size
+        data = np.frombuffer(buf, np.uint8, nbytes, data_offset).copy()
+        (seq,) = _SEQUENCE.unpack_from(buf, offset)
+        if seq != descriptor["seq"]:
+            return None
+
+        header = {
+            "index": index,
+            "timestamp": timestamp,
+            "format": frame_format.rstrip(b"\0").decode(),
+        }
+        return header, data.reshape(shape[:ndim])
+
+    def _attach(self, name):
+        shm = self._buffers.pop(name, None)
+        if shm is None:
+            shm = _attach_shared_memory(name)
+            while len(self._buffers) >= self.max_buffers:
+                oldest = next(iter(self._buffers))
+                self._buffers.pop(oldest).close()
+        # keep most recently used last
+        self._buffers[name] = shm
+        return shm
+
+    def close(self):
+        for shm in self._buffers.values():
+            shm.close()
+        self._buffers.clear()
+
+
+def _attach_shared_memory(name):
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:  # Python < 3.13
+        pass
+    shm = shared_memory.SharedMemory(name=name)
+    if os.name == "posix":
+        # Attaching registered the buffer with the resource tracker of this process,
+        # which would unlink it when this process exits, while the writer uses it.
+        from multiprocessing import resource_tracker
+
+        resource_tracker.unregister(shm._name, "shared_memory")
+    return shm
+
+
+def _unlink_shared_memory(shm):
+    if os.name == "posix":
+        # Readers unregister the buffers they attach to. Processes spawned by the
+        # same parent share the resource tracker, such that this also removed the
+        # writer's registration, which unlink() expects.
+        from multiprocessing import resource_tracker
+
+        resource_tracker.register(shm._name, "shared_memory")
+    shm.unlink()
+
+
+class _Descriptor_Streamer(zmq_tools.Msg_Streamer):
+    """Publishes descriptors and tracks which of them readers subscribed to.
+
+    The IPC backbone forwards the first subscription and the last unsubscription
+    of each topic to all publishers, also to publishers that connect later.
+    """
+
+    def __init__(self, ctx, url):
+        self.socket = zmq.Socket(ctx, zmq.XPUB)
+        self.socket.connect(url)
+        self._subscriptions = set()
+
+    def is_subscribed(self, topic):
+        while self.socket.poll(0):
+            event = self.socket.recv()
+            prefix = event[1:].decode("utf-8", "replace")
+            # subscriptions to all topics do not request shared memory
+            if not prefix.startswith(SHM_TOPIC_PREFIX):
+                continue
+            if event[0]:
+                self._subscriptions.add(prefix)
+            else:
+                self._subscriptions.discard(prefix)
+        return any(topic.startswith(prefix) for prefix in self._subscriptions)
+
+
+class Shared_Frame_Publisher(object):
+    """Publishes frames over ZMQ and via shared memory to readers on this host.
+
+    Frame payloads are the ones sent with `zmq_tools.Msg_Streamer.send()`, with
+    the image buffer as only raw data. They are sent with `streamer` without
+    copying, as before. While readers subscribe to the topic prefixed with
+    `SHM_TOPIC_PREFIX`, the buffer is also copied into a `Shared_Frame_Ring` per
+    topic and its descriptor is published to the IPC backbone at `url`.
+    """
+
+    def __init__(self, ctx, url, streamer, num_slots=8):
+        self.streamer = streamer
+        self.num_slots = num_slots
+        self._rings = {}
+        self._descriptors = _Descriptor_Streamer(ctx, url) if is_available() else None
+
+    def send(self, payload, owner=None):
+        topic = payload["topic"]
+        if self._descriptors is None:
+            pass
+        elif self._descriptors.is_subscribed(SHM_TOPIC_PREFIX + topic):
+            self._send_descriptor(payload)
+        elif topic in self._rings:
+            # the last reader is gone
+            self._rings.pop(topic).close()
+        self.streamer.send(payload, copy=False, owner=owner)
+
+    def _send_descriptor(self, payload):
+        topic = payload["topic"]
+        ring = self._rings.get(topic)
+        if ring is None:
+            ring = self._rings[topic] = Shared_Frame_Ring(self.num_slots)
+        (data,) = payload["__raw_data__"]
+        descriptor = ring.write(
+            data, payload["index"], payload["timestamp"], payload["format"]
+        )
+        meta = {k: v for k, v in payload.items() if k != "__raw_data__"}
+        meta["topic"] = SHM_TOPIC_PREFIX + topic
+        meta["shared_memory"] = descriptor
+        self._descriptors.send(meta)
+
+    def cleanup(self):
+        for ring in self._rings.values():
+            ring.close()
+        self._rings.clear()
+        if self._descriptors is not None:
+            self._descriptors.socket.close(linger=0)
+            self._descriptors = None
+
+
+class Shared_Frame_Receiver(object):
+    """Receives frames published with `Shared_Frame_Publisher`.
+
+    Reads frames from shared memory if the IPC backbone at `url` runs on this
+    host. The subscription requests them from the publishers. Else, subscribes to
+    `topics` and receives frames over ZMQ.
+    """
+
+    def __init__(
+        self,
+        ctx,
+        url,
+        topics=(),
+        hwm=None,
+        block_until_connected=True,
+        use_shared_memory=True,
+    ):
+        assert type(topics) != str
+        self.uses_shared_memory = (
+            use_shared_memory and is_available() and _is_local_url(url)
+        )
+        prefix = SHM_TOPIC_PREFIX if self.uses_shared_memory else ""
+        self._receiver = zmq_tools.Msg_Receiver(
+            ctx,
+            url,
+            topics=[prefix + topic for topic in topics],
+            hwm=hwm,
+            block_until_connected=block_until_connected,
+        )
+        self._reader = Shared_Frame_Reader()
+
+    @property
+    def socket(self):
+        return self._receiver.socket
+
+    @property
+    def new_data(self):
+        return self._receiver.new_data
+
+    def recv(self):
+        """Recv a frame like `zmq_tools.Msg_Receiver.recv()`.
+
+        Returns the topic without prefix and the payload with the frame as only
+        '__raw_data__'. The payload is None if the frame was overwritten before
+        it could be read, i.e. if the receiver is too slow.
+        """
+        topic, payload = self._receiver.recv()
+        if not self.uses_shared_memory:
+            return topic, payload
+        topic = topic[len(SHM_TOPIC_PREFIX) :]
+        frame = self._reader.read(payload.pop("shared_memory"))
+        if frame is None:
+            return topic, None
+        _, data = frame
+        payload["topic"] = topic
+        payload["__raw_data__"] = [data]
+        return topic, payload
+
+    def cleanup(self):
+        self._reader.close()
+        # unsubscribing stops publishers from copying frames into shared memory
+        self._receiver.socket.close()
+
+
+def _is_local_url(url):
+    parsed = urllib.parse.urlparse(url)
+    if parsed.scheme in ("ipc", "inproc"):
+        return True
+    return parsed.hostname in ("127.0.0.1", "localhost", "::1")
+
+
+def _bench_receiver(url, use_shared_memory, results):
+    import time
+
+    ctx = zmq.Context()
+    receiver = Shared_Frame_Receiver(
+        ctx, url, topics=("frame.world",), use_shared_memory=use_shared_memory
+    )
+    results.put("ready")
+    latencies = []
+    num_dropped = 0
+    while receiver.socket.poll(2000):
+        topic, payload = receiver.recv()
+        if payload is None:
+            num_dropped += 1
+            continue
+        # touch the data, like a consumer
+        np.frombuffer(payload["__raw_data__"][0], np.uint8)[0]
+        latencies.append(time.perf_counter() - payload["timestamp"])
+    receiver.cleanup()
+    results.put((latencies, num_dropped))
+
+
+def bench_frame_transport(num_frames=300, subscriber_counts=(1, 4), fps=30):
+    """Sends 1080p BGR frames to local subscribers over ZMQ and via shared memory.
+
+    The IPC backbone runs in a thread, subscribers in their own processes.
+    Reports the median and 99th percentile latency from sending a frame to having
+    its data, and how many frames the slowest subscriber received or dropped.
+    """
+    import multiprocessing as mp
+    import threading
+    import time
+
+    mp_context = mp.get_context("spawn")
+    ctx = zmq.Context()
+    xsub = ctx.socket(zmq.XSUB)
+    pub_url = f"tcp://127.0.0.1:{xsub.bind_to_random_port('tcp://127.0.0.1')}"
+    xpub = ctx.socket(zmq.XPUB)
+    sub_url = f"tcp://127.0.0.1:{xpub.bind_to_random_port('tcp://127.0.0.1')}"
+    backbone = threading.Thread(target=zmq.proxy, args=(xsub, xpub), daemon=True)
+    backbone.start()
+
+    publisher = Shared_Frame_Publisher(
+        ctx, pub_url, zmq_tools.Msg_Streamer(ctx, pub_url)
+    )
+    # rotating buffers, like frames from a capture
+    images = [np.full((1080, 1920, 3), idx, dtype=np.uint8) for idx in range(4)]
+
+    for num_subscribers in subscriber_counts:
+        for label, use_shared_memory in (("zmq", False), ("shared memory", True)):
+            results = mp_context.Queue()
+            subscribers = [
+                mp_context.Process(
+                    target=_bench_receiver, args=(sub_url, use_shared_memory, results)
+                )
+                for _ in range(num_subscribers)
+            ]
+            for subscriber in subscribers:
+                subscriber.start()
+            for _ in subscribers:
+                results.get()
+            time.sleep(0.5)  # subscriptions reach the publisher
+
+            start = time.perf_counter()
+            for idx in range(num_frames):
+                delay = start + idx / fps - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                publisher.send(
+                    {
+                        "topic": "frame.world",
+                        "width": 1920,
+                        "height": 1080,
+                        "index": idx,
+                        "timestamp": time.perf_counter(),
+                        "format": "bgr",
+                        "__raw_data__": [images[idx % len(images)]],
+                    }
+                )
+
+            received = [results.get() for _ in subscribers]
+            for subscriber in subscribers:
+                subscriber.join()
+            latencies = np.concatenate([lat for lat, _ in received if lat]) * 1000
+            num_received = min(len(lat) for lat, _ in received)
+            num_dropped = max(dropped for _, dropped in received)
+            print(
+                f"{num_subscribers} subscriber(s), {label:13s}:"
+                f" {np.median(latencies):6.2f} ms median,"
+                f" {np.percentile(latencies, 99):6.2f} ms p99 latency,"
+                f" received {num_received}/{num_frames}, dropped {num_dropped}"
+            )
+    publisher.cleanup()
@@ -24,17 +24,19 @@ logger = logging.getLogger(__name__)
 
 
 def background_video_processor(
-    video_file_path, callable, visited_list, seek_idx, mp_context
+    video_file_path, callable, visited_list, seek_idx, mp_context, frame_consumer=None
 ):
     return background_helper.IPC_Logging_Task_Proxy(
         "Background Video Processor",
         video_processing_generator,
-        (video_file_path, callable, seek_idx, visited_list),
+        (video_file_path, callable, seek_idx, visited_list, frame_consumer),
         context=mp_context,
     )
 
 
-def video_processing_generator(video_file_path, callable, seek_idx, visited_list):
+def video_processing_generator(
+    video_file_path, callable, seek_idx, visited_list, frame_consumer=None
+):
     import os
     import logging
 
@@ -42,6 +44,17 @@ def video_processing_generator(video_file_path, callable, seek_idx, visited_list
     logger.debug("Started cacher process for Marker Detector")
     import video_capture
 
+    visited_list = [x is not None for x in visited_list]
+
+    if frame_consumer is not None:
+        yield from _process_shared_frames(
+            frame_consumer, callable, seek_idx, visited_list
+        )
+        if all(visited_list):
+            logger.debug("Caching completed.")
+            return
+
+    # decode the remaining frames on our own
     cap = video_capture.File_Source(
         types.SimpleNamespace(),
         source_path=video_file_path,
@@ -51,9 +64,7 @@ def video_processing_generator(video_file_path, callable, seek_idx, visited_list
 
     # Ensure that indiced are not generated beyond video frame count
     frame_count = cap.get_frame_count()
-    visited_list = visited_list[:frame_count]
-
-    visited_list = [x is not None for x in visited_list]
+    del visited_list[frame_count:]
 
     def next_unvisited_idx(frame_idx):
         """
@@ -128,6 +139,35 @@ def video_processing_generator(video_file_path, callable, seek_idx, visited_list
             yield next_frame_idx, res
 
 
+def _process_shared_frames(frame_consumer, callable, seek_idx, visited_list):
+    """Processes unvisited frames of the frame server until the user seeks.
+
+    The frame server hands out frames in its own order. A seek stays pending, such
+    that the caller decodes the remaining frames on its own, starting at the seek
+    index.
+    """
+    import frame_server
+
+    try:
+        consumer = frame_server.Frame_Consumer(frame_consumer)
+    except FileNotFoundError:
+        logger.warning("Decoding frames on my own: Frame server stopped")
+        return
+    del visited_list[consumer.frame_count :]
+    try:
+        for frame in consumer:
+            if seek_idx.value != -1:
+                break
+            if frame.index >= len(visited_list) or visited_list[frame.index]:
+                continue
+            visited_list[frame.index] = True
+            yield frame.index, callable(frame)
+    except frame_server.Frame_Server_Error as err:
+        logger.warning(f"Decoding frames on my own: {err}")
+    finally:
+        consumer.release()
+
+
 def background_data_processor(data, callable, seek_idx, mp_context):
     return background_helper.IPC_Logging_Task_Proxy(
         "Background Data Processor",
@@ -195,9 +235,12 @@ def data_processing_generator(data, callable, seek_idx):
 def gaze_on_surface_generator(
     surfaces, section, all_world_timestamps, all_gaze_events, camera_model
 ):
+    gaze_offsets, _ = player_methods.correlate_data_indices(
+        all_gaze_events.data_ts, all_world_timestamps
+    )
     for surface in surfaces:
         gaze_on_surf = surface.map_section(
-            section, all_world_timestamps, all_gaze_events, camera_model
+            section, all_world_timestamps, all_gaze_events, camera_model, gaze_offsets
         )
         yield gaze_on_surf
 
@@ -54,20 +54,30 @@ class Surface_Offline(Surface):
     def __setstate__(self, state):
         self.__dict__.update(state)
 
-    def map_section(self, section, all_world_timestamps, all_gaze_events, camera_model):
+    def map_section(
+        self,
+        section,
+        all_world_timestamps,
+        all_gaze_events,
+        camera_model,
+        gaze_offsets=None,
+    ):
         try:
             location_cache = self.location_cache[section]
         except TypeError:
             return []
 
+        if gaze_offsets is None:
+            gaze_offsets, _ = player_methods.correlate_data_indices(
+                all_gaze_events.data_ts, all_world_timestamps
+            )
+
         section_gaze_on_surf = []
         for frame_idx, location in enumerate(location_cache):
             frame_idx += section.start
             if location and location.detected:
-                frame_window = player_methods.enclosing_window(
-                    all_world_timestamps, frame_idx
-                )
-                gaze_events = all_gaze_events.by_ts_window(frame_window)
+                gaze_start, gaze_stop = gaze_offsets[frame_idx : frame_idx + 2]
+                gaze_events = all_gaze_events[gaze_start:gaze_stop]
 
                 gaze_on_surf = self.map_gaze_and_fixation_events(
                     gaze_events, camera_model, trans_matrix=location.img_to_surf_trans
@@ -67,10 +67,12 @@ class Surface_Tracker_Offline(Observable, Surface_Tracker, Analysis_Plugin_Base)
         self.MARKER_CACHE_VERSION = 3
         # Also add very small detected markers to cache and filter cache afterwards
         self.CACHE_MIN_MARKER_PERIMETER = 20
-        self.cache_seek_idx = mp_context.Value("i", 0)
+        # -1 while no frame is requested, see background_tasks
+        self.cache_seek_idx = mp_context.Value("i", -1)
         self.marker_cache = None
         self.marker_cache_unfiltered = None
         self.cache_filler = None
+        self._frame_consumer = None
         self._init_marker_cache()
         self.last_cache_update_ts = time.perf_counter()
         self.CACHE_UPDATE_INTERVAL_SEC = 5
@@ -184,6 +186,10 @@ class Surface_Tracker_Offline(Observable, Surface_Tracker, Analysis_Plugin_Base)
 
         if self.cache_filler is not None:
             self.cache_filler.cancel()
+        self._release_frame_consumer()
+        frame_server = getattr(self.g_pool, "frame_server", None)
+        if frame_server is not None:
+            self._frame_consumer = frame_server.register_consumer()
         self.cache_filler = background_tasks.background_video_processor(
             self.g_pool.capture.source_path,
             offline_utils.marker_detection_callable(
@@ -197,8 +203,14 @@ class Surface_Tracker_Offline(Observable, Surface_Tracker, Analysis_Plugin_Base)
             list(self.marker_cache),
             self.cache_seek_idx,
             mp_context,
+            frame_consumer=self._frame_consumer,
         )
 
+    def _release_frame_consumer(self):
+        if self._frame_consumer is not None:
+            self.g_pool.frame_server.release_consumer(self._frame_consumer)
+            self._frame_consumer = None
+
     def _filter_marker_cache(self, cache_to_filter):
         marker_type = self.marker_detector.marker_detector_mode.marker_type
         if marker_type != MarkerType.SQUARE_MARKER:
@@ -305,6 +317,7 @@ class Surface_Tracker_Offline(Observable, Surface_Tracker, Analysis_Plugin_Base)
 
         if self.cache_filler.completed and not did_timeout:
             self.cache_filler = None
+            self._release_frame_consumer()
             for surface in self.surfaces:
                 self._heatmap_update_requests.add(surface)
             self._fill_gaze_on_surf_buffer()
@@ -558,6 +571,9 @@ class Surface_Tracker_Offline(Observable, Surface_Tracker, Analysis_Plugin_Base)
     def cleanup(self):
         super().cleanup()
         self._save_marker_cache()
+        if self.cache_filler is not None:
+            self.cache_filler.cancel()
+        self._release_frame_consumer()
 
         for proxy in self.export_proxies.copy():
             proxy.cancel()
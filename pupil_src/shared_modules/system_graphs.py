@@ -28,6 +28,7 @@ class System_Graphs(System_Plugin_Base):
         show_fps=True,
         show_conf0=True,
         show_conf1=True,
+        show_rec_writer=True,
         **kwargs,
     ):
         super().__init__(g_pool)
@@ -35,9 +36,12 @@ class System_Graphs(System_Plugin_Base):
         self.show_fps = show_fps
         self.show_conf0 = show_conf0
         self.show_conf1 = show_conf1
+        self.show_rec_writer = show_rec_writer
         self.conf_grad_limits = 0.0, 1.0
         self.ts = None
         self.idx = None
+        self.rec_writer_graphs = ()
+        self.recording = False
 
     def init_ui(self):
         # set up performace graphs:
@@ -69,6 +73,25 @@ class System_Graphs(System_Plugin_Base):
             self.conf0_graph.color,
         )
 
+        # recorder writer thread, updated by `recording.writer_stats` notifications
+        self.rec_queue_graph = graph.Bar_Graph()
+        self.rec_queue_graph.pos = (500, 50)
+        self.rec_queue_graph.update_rate = 1
+        self.rec_queue_graph.label = "rec queue %0.0f"
+        self.rec_rate_graph = graph.Bar_Graph()
+        self.rec_rate_graph.pos = (620, 50)
+        self.rec_rate_graph.update_rate = 1
+        self.rec_rate_graph.label = "rec %0.1f MB/s"
+        self.rec_dropped_graph = graph.Bar_Graph()
+        self.rec_dropped_graph.pos = (740, 50)
+        self.rec_dropped_graph.update_rate = 1
+        self.rec_dropped_graph.label = "rec dropped %0.0f"
+        self.rec_writer_graphs = (
+            self.rec_queue_graph,
+            self.rec_rate_graph,
+            self.rec_dropped_graph,
+        )
+
         self.on_window_resize(self.g_pool.main_window)
 
     def on_window_resize(self, window, *args):
@@ -85,6 +108,10 @@ class System_Graphs(System_Plugin_Base):
         self.conf0_graph.adjust_window_size(*fb_size)
         self.conf1_graph.adjust_window_size(*fb_size)
 
+        for rec_writer_graph in self.rec_writer_graphs:
+            rec_writer_graph.scale = hdpi_factor
+            rec_writer_graph.adjust_window_size(*fb_size)
+
     def gl_display(self):
         if self.show_cpu:
             self.cpu_graph.draw()
@@ -108,6 +135,19 @@ class System_Graphs(System_Plugin_Base):
                 self.conf_grad_limits[1],
             )
             self.conf1_graph.draw()
+        if self.show_rec_writer and self.recording:
+            for rec_writer_graph in self.rec_writer_graphs:
+                rec_writer_graph.draw()
+
+    def on_notify(self, notification):
+        if notification["subject"] == "recording.writer_stats":
+            self.recording = True
+            if self.rec_writer_graphs:
+                self.rec_queue_graph.add(notification["queue_depth"])
+                self.rec_rate_graph.add(notification["bytes_per_s"] / 1e6)
+                self.rec_dropped_graph.add(notification["dropped"])
+        elif notification["subject"] == "recording.stopped":
+            self.recording = False
 
     def recent_events(self, events):
         # update cpu graph
@@ -141,6 +181,10 @@ class System_Graphs(System_Plugin_Base):
         self.fps_graph = None
         self.conf0_graph = None
         self.conf1_graph = None
+        self.rec_queue_graph = None
+        self.rec_rate_graph = None
+        self.rec_dropped_graph = None
+        self.rec_writer_graphs = ()
 
     def get_init_dict(self):
         return {
@@ -148,4 +192,5 @@ class System_Graphs(System_Plugin_Base):
             "show_fps": self.show_fps,
             "show_conf0": self.show_conf0,
             "show_conf1": self.show_conf1,
+            "show_rec_writer": self.show_rec_writer,
         }
@@ -0,0 +1,170 @@
+"""
+(*)~---------------------------------------------------------------------------
+Pupil - eye tracking platform
+Copyright (C) 2012-2020 Pupil Labs
+
+Distributed under the terms of the GNU
+Lesser General Public License (LGPL v3.0).
+See COPYING and COPYING.LESSER for license details.
+---------------------------------------------------------------------------~(*)
+"""
+
+import collections
+import contextlib
+import logging
+import threading
+import typing as T
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class Acquisition_Thread:
+    """Grabs frames from a capture on a dedicated thread.
+
+    Grabbed frames are kept in a small ring, such that the main loop can take the
+    latest frame, or all frames of a burst, without waiting for the capture. Frames
+    that are never consumed are counted as dropped, by reason:
+        - "skipped": a newer frame was consumed instead
+        - "overflow": the ring was full
+        - "invalid_timestamp": the frame had a timestamp of 0
+        - "non_monotonic": the frame was not newer than the previous frame
+
+    `grab_frame(timeout)` is called on the acquisition thread. If it raises, the
+    thread stops grabbing until `resume()` is called, such that the owner can
+    restart the capture on its own thread. Reconfigure the capture only while
+    grabbing is `paused()`.
+    """
+
+    DROP_REASONS = ("skipped", "overflow", "invalid_timestamp", "non_monotonic")
+
+    def __init__(
+        self,
+        grab_frame: T.Callable[[float], T.Any],
+        ring_size: int = 4,
+        grab_timeout: float = 0.05,
+        name: str = "Acquisition_Thread",
+    ):
+        self._grab_frame = grab_frame
+        self.grab_timeout = grab_timeout
+        self._ring = collections.deque(maxlen=ring_size)
+        self._condition = threading.Condition()
+        self._should_stop = False
+        self._num_pauses = 0
+        self._grabbing = False
+        self._last_ts = None
+        self.error = None
+
+        self.num_grabbed = 0
+        self.num_consumed = 0
+        self.num_dropped = dict.fromkeys(self.DROP_REASONS, 0)
+
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def _can_grab(self):
+        return not self._num_pauses and self.error is None
+
+    def _run(self):
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._should_stop or self._can_grab())
+                if self._should_stop:
+                    return
+                self._grabbing = True
+
+            try:
+                frame = self._grab_frame(self.grab_timeout)
+            except Exception as err:
+                with self._condition:
+                    self.error = err
+                    self._grabbing = False
+                    self._condition.notify_all()
+                continue
+
+            with self._condition:
+                self._grabbing = False
+                self._add_frame(frame)
+                self._condition.notify_all()
+
+    def _add_frame(self, frame):
+        if np.isclose(frame.timestamp, 0):
+            # sometimes (probably only on windows) after disconnections, the first
+            # frame has 0 ts
+            self.num_dropped["invalid_timestamp"] += 1
+            return
+        if self._last_ts is not None and frame.timestamp <= self._last_ts:
+            logger.debug(
+                "Received non-monotonic timestamps! Dropping frame."
+                f" Last: {self._last_ts}, current: {frame.timestamp}"
+            )
+            self.num_dropped["non_monotonic"] += 1
+            return
+        self._last_ts = frame.timestamp
+        self.num_grabbed += 1
+        if len(self._ring) == self._ring.maxlen:
+            self.num_dropped["overflow"] += 1
+        self._ring.append(frame)
+
+    def latest(self, timeout: float = 0.0):
+        """Returns the latest frame, waits up to `timeout` if there is none.
+
+        Older frames that were not consumed yet are dropped. Returns None if there
+        is no new frame, or if grabbing stopped due to an error.
+        """
+        with self._condition:
+            self._condition.wait_for(
+                lambda: self._ring or not self._can_grab(), timeout=timeout
+            )
+            if not self._ring:
+                return None
+            frame = self._ring.pop()
+            self.num_dropped["skipped"] += len(self._ring)
+            self._ring.clear()
+            self.num_consumed += 1
+        return frame
+
+    def drain(self) -> T.List[T.Any]:
+        """Returns all frames that were not consumed yet, oldest first."""
+        with self._condition:
+            frames = list(self._ring)
+            self._ring.clear()
+            self.num_consumed += len(frames)
+        return frames
+
+    def resume(self):
+        """Continues grabbing after an error, e.g. after restarting the capture."""
+        with self._condition:
+            self.error = None
+            self._condition.notify_all()
+
+    @contextlib.contextmanager
+    def paused(self):
+        """Waits for the current grab to finish and pauses grabbing. Reentrant."""
+        with self._condition:
+            self._num_pauses += 1
+            self._condition.wait_for(lambda: not self._grabbing)
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._num_pauses -= 1
+                self._condition.notify_all()
+
+    def stop(self):
+        with self._condition:
+            self._should_stop = True
+            self._condition.notify_all()
+        if self._thread.is_alive():
+            self._thread.join()
+
+    def stats(self) -> T.Dict[str, int]:
+        with self._condition:
+            return {
+                "grabbed": self.num_grabbed,
+                "consumed": self.num_consumed,
+                **{f"dropped_{reason}": n for reason, n in self.num_dropped.items()},
+            }
@@ -10,15 +10,20 @@ See COPYING and COPYING.LESSER for license details.
 """
 
 # logging
+import collections
 import logging
 import os
 import os.path
+import queue
+import threading
 import typing as T
+import weakref
 from abc import ABC, abstractmethod
 from multiprocessing import cpu_count
 from time import sleep
 
 import av
+import cv2
 import numpy as np
 from pyglui import ui
 
@@ -26,12 +31,12 @@ from camera_models import load_intrinsics
 from pupil_recording import PupilRecording
 
 from .base_backend import Base_Manager, Base_Source, EndofVideoError, Playback_Source
+from .proxy import proxy_paths_by_container
 from .utils import VideoSet, InvalidContainerError
 
 logger = logging.getLogger(__name__)
 av.logging.set_level(av.logging.ERROR)
 logging.getLogger("libav").setLevel(logging.ERROR)
-logging.getLogger("av.buffered_decoder").setLevel(logging.WARNING)
 
 assert av.__version__ >= "0.4.3", "pyav is out-of-date, please update"
 
@@ -40,6 +45,64 @@ class FileSeekError(Exception):
     pass
 
 
+class Frame_Buffer_Pool:
+    """Reusable output arrays for pixel conversions, by shape.
+
+    A buffer is only handed out again once the array returned by `get()` and all
+    views on it are gone, which a weakref finalizer on the array reports. Consumers
+    can keep frames or their images around without their pixels changing.
+    """
+
+    def __init__(self, max_buffers_per_shape=4):
+        self.max_buffers_per_shape = max_buffers_per_shape
+        self.allocations = 0
+        self._free_buffers = collections.defaultdict(list)
+        self._num_buffers = collections.Counter()
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def get(self, shape) -> np.ndarray:
+        with self._lock:
+            free_buffers = self._free_buffers[shape]
+            if free_buffers:
+                buffer = free_buffers.pop(0)
+            else:
+                buffer = bytearray(int(np.prod(shape)))
+                self.allocations += 1
+                if self._num_buffers[shape] >= self.max_buffers_per_shape:
+                    return np.ndarray(shape, dtype=np.uint8, buffer=buffer)
+                self._num_buffers[shape] += 1
+            generation = self._generation
+        # views on the array keep it alive, since their base is the array itself
+        array = np.ndarray(shape, dtype=np.uint8, buffer=buffer)
+        weakref.finalize(array, self._release, shape, buffer, generation)
+        return array
+
+    def _release(self, shape, buffer, generation):
+        with self._lock:
+            if generation == self._generation:
+                self._free_buffers[shape].append(buffer)
+
+    def clear(self):
+        with self._lock:
+            self._free_buffers.clear()
+            self._num_buffers.clear()
+            self._generation += 1
+
+
+_frame_buffer_pool = Frame_Buffer_Pool()
+
+# formats that are converted from their planes instead of by libswscale
+_YUV420_FORMATS = ("yuv420p", "yuvj420p")
+
+
+def _plane_view(plane, height, width) -> np.ndarray:
+    """Strided view on the first `width` bytes of every line of a plane."""
+    return np.ndarray(
+        (height, width), dtype=np.uint8, buffer=plane, strides=(plane.line_size, 1)
+    )
+
+
 class Frame:
     """docstring of Frame"""
 
@@ -61,7 +124,10 @@ class Frame:
     @property
     def img(self):
         if self._img is None:
-            self._img = self._av_frame.to_nd_array(format="bgr24")
+            if self._is_yuv420 and self._convert_with_opencv:
+                self._img = self._bgr_from_yuv420()
+            else:
+                self._img = self._av_frame.to_nd_array(format="bgr24")
         return self._img
 
     @property
@@ -71,15 +137,55 @@ class Frame:
     @property
     def gray(self):
         if self._gray is None:
-            plane = self._av_frame.planes[0]
-            self._gray = np.frombuffer(plane, np.uint8)
-            try:
-                self._gray.shape = self.height, self.width
-            except ValueError:
-                self._gray = self._gray.reshape(-1, plane.line_size)
-                self._gray = np.ascontiguousarray(self._gray[:, : self.width])
+            if self._is_yuv420:
+                # the luma plane is the gray image
+                self._gray = _plane_view(
+                    self._av_frame.planes[0], self.height, self.width
+                )
+                if not self._gray.flags.c_contiguous:
+                    # padded lines, most consumers need contiguous images
+                    self._gray = self._copy_to_pool_buffer(self._gray)
+            else:
+                plane = self._av_frame.planes[0]
+                self._gray = np.frombuffer(plane, np.uint8)
+                try:
+                    self._gray.shape = self.height, self.width
+                except ValueError:
+                    self._gray = self._gray.reshape(-1, plane.line_size)
+                    self._gray = np.ascontiguousarray(self._gray[:, : self.width])
         return self._gray
 
+    @property
+    def _is_yuv420(self):
+        return self._av_frame.format.name in _YUV420_FORMATS
+
+    @property
+    def _convert_with_opencv(self):
+        # libswscale is faster than single-threaded OpenCV, but allocates a new frame
+        return cv2.getNumThreads() > 1 and self.width % 2 == 0 and self.height % 2 == 0
+
+    def _bgr_from_yuv420(self):
+        # OpenCV expects the three planes back to back without padding
+        height, width = self.height, self.width
+        i420 = _frame_buffer_pool.get((height * 3 // 2, width))
+        i420_flat = i420.reshape(-1)
+        chroma_size = (height // 2) * (width // 2)
+        offset = height * width
+        i420[:height] = _plane_view(self._av_frame.planes[0], height, width)
+        for plane in self._av_frame.planes[1:3]:
+            i420_flat[offset : offset + chroma_size].reshape(height // 2, -1)[
+                :
+            ] = _plane_view(plane, height // 2, width // 2)
+            offset += chroma_size
+        bgr = _frame_buffer_pool.get((height, width, 3))
+        return cv2.cvtColor(i420, cv2.COLOR_YUV2BGR_I420, dst=bgr)
+
+    @staticmethod
+    def _copy_to_pool_buffer(array):
+        buffer = _frame_buffer_pool.get(array.shape)
+        buffer[:] = array
+        return buffer
+
 
 class FakeFrame:
     """
@@ -106,6 +212,68 @@ class FakeFrame:
         return self.img[:, :, 0]  # return first channel
 
 
+class Decoded_Frame_Cache:
+    """LRU of decoded av frames by frame index, bounded by the frames' buffer bytes.
+
+    Holding on to decoded frames makes stepping back and forth O(1), instead of
+    seeking to the preceding keyframe and decoding forward for every frame.
+    """
+
+    DEFAULT_MAX_BYTES = 128 * 1024 * 1024
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.num_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = collections.OrderedDict()  # frame index -> (av frame, size)
+
+    def __contains__(self, frame_idx):
+        return frame_idx in self._entries
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, frame_idx):
+        try:
+            av_frame, _ = self._entries[frame_idx]
+        except KeyError:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._entries.move_to_end(frame_idx)
+        return av_frame
+
+    def put(self, frame_idx, av_frame):
+        if frame_idx in self._entries:
+            self._entries.move_to_end(frame_idx)
+            return
+        size = sum(plane.buffer_size for plane in av_frame.planes)
+        if size > self.max_bytes:
+            return
+        self._entries[frame_idx] = av_frame, size
+        self.num_bytes += size
+        while self.num_bytes > self.max_bytes:
+            _, (_, evicted_size) = self._entries.popitem(last=False)
+            self.num_bytes -= evicted_size
+            self.evictions += 1
+
+    def clear(self):
+        self._entries.clear()
+        self.num_bytes = 0
+
+    def stats(self):
+        return {
+            "entries": len(self._entries),
+            "bytes": self.num_bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
 class Decoder(ABC):
     """
     Abstract base class for stream decoders.
@@ -159,21 +327,85 @@ class BrokenStream(Decoder):
 
 
 class BufferedDecoder(Decoder):
-    def __init__(self, container, video_stream):
+    """Decodes ahead in a background thread, into a bounded queue of frames.
+
+    PyAV releases the GIL while demuxing and decoding, such that decoding overlaps
+    with the processing of previous frames on the calling thread. Seeking stops the
+    thread and drops the queued frames. It restarts with the next frame iterator.
+    """
+
+    DEFAULT_BUFFER_SIZE = 30
+
+    _END = object()
+
+    def __init__(self, container, video_stream, buffer_size=DEFAULT_BUFFER_SIZE):
         self.container = container
         self.video_stream = video_stream
-        self._buffered_decoder = self.container.get_buffered_decoder(
-            self.video_stream, dec_batch=50, dec_buffer_size=200
-        )
+        self.buffer_size = buffer_size
+        self._thread = None
+        self._should_stop = threading.Event()
 
     def seek(self, pts_position):
-        self._buffered_decoder.seek(pts_position)
+        self._stop_read_ahead()
+        self.video_stream.seek(pts_position)
 
     def get_frame_iterator(self):
-        return self._buffered_decoder.get_frame()
+        self._stop_read_ahead()
+        frames = queue.Queue(maxsize=self.buffer_size)
+        self._should_stop = threading.Event()
+        self._thread = threading.Thread(
+            target=self._read_ahead,
+            args=(frames, self._should_stop),
+            name="BufferedDecoder",
+            daemon=True,
+        )
+        self._thread.start()
+        return self._frames_from_queue(frames, self._thread)
+
+    def _read_ahead(self, frames, should_stop):
+        def put(item):
+            while not should_stop.is_set():
+                try:
+                    frames.put(item, timeout=0.05)
+                    return True
+                except queue.Full:
+                    pass
+            return False
+
+        try:
+            for packet in self.container.demux(self.video_stream):
+                for frame in packet.decode():
+                    if frame and not put(frame):
+                        return
+        except Exception as err:
+            # raised on the consumer thread
+            put(err)
+        finally:
+            put(self._END)
+
+    def _frames_from_queue(self, frames, thread):
+        while True:
+            try:
+                frame = frames.get(timeout=0.1)
+            except queue.Empty:
+                if thread.is_alive() or not frames.empty():
+                    continue
+                logger.error("Decoding thread stopped unexpectedly")
+                return
+            if frame is self._END:
+                return
+            if isinstance(frame, Exception):
+                raise frame
+            yield frame
+
+    def _stop_read_ahead(self):
+        if self._thread is not None:
+            self._should_stop.set()
+            self._thread.join()
+            self._thread = None
 
     def cleanup(self):
-        self._buffered_decoder.stop_buffer_thread()
+        self._stop_read_ahead()
 
 
 class OnDemandDecoder(Decoder):
@@ -191,6 +423,43 @@ class OnDemandDecoder(Decoder):
                     yield frame
 
 
+class Proxy_Reader:
+    """Decodes frames from the low-resolution, all-intra proxies of a video set.
+
+    The proxies keep the pts of the original parts, see proxy.py.
+    """
+
+    def __init__(self, paths_by_container):
+        self._paths = paths_by_container
+        self._decoders = {}
+
+    def get_av_frame(self, target_entry):
+        """Returns the proxy frame of a lookup entry, None if there is no proxy."""
+        container_idx = int(target_entry.container_idx)
+        try:
+            decoder = self._decoders[container_idx]
+        except KeyError:
+            try:
+                path = self._paths[container_idx]
+            except KeyError:
+                return None
+            container = av.open(path)
+            decoder = OnDemandDecoder(container, container.streams.video[0])
+            self._decoders[container_idx] = decoder
+
+        # all frames are keyframes, seeking lands on the target frame
+        decoder.seek(int(target_entry.pts))
+        for av_frame in decoder.get_frame_iterator():
+            if av_frame.pts >= target_entry.pts:
+                return av_frame if av_frame.pts == target_entry.pts else None
+        return None
+
+    def cleanup(self):
+        for decoder in self._decoders.values():
+            decoder.container.close()
+        self._decoders.clear()
+
+
 # NOTE:Base_Source is included as base class for uniqueness:by_base_class to work
 # correctly with other Source plugins.
 class File_Source(Playback_Source, Base_Source):
@@ -208,6 +477,7 @@ class File_Source(Playback_Source, Base_Source):
         buffered_decoding (bool): use buffered decode
         fill_gaps (bool): fill gaps with static frames
         show_plugin_menu (bool): enable to show regular capture UI with source selection
+        frame_cache_bytes (int): budget of the decoded frame cache, 0 to disable
     """
 
     def __init__(
@@ -218,6 +488,7 @@ class File_Source(Playback_Source, Base_Source):
         buffered_decoding=False,
         fill_gaps=False,
         show_plugin_menu=False,
+        frame_cache_bytes=Decoded_Frame_Cache.DEFAULT_MAX_BYTES,
         *args,
         **kwargs,
     ):
@@ -243,6 +514,13 @@ class File_Source(Playback_Source, Base_Source):
             # TODO: where does the fallback framerate of 1/20 come from?
             self._frame_rate = 20
         self.buffering = buffered_decoding
+        self._frame_cache = Decoded_Frame_Cache(frame_cache_bytes)
+        self._keyframe_indices = np.flatnonzero(self.videoset.keyframes)
+        # proxies are only used while dragging the seek bar in Player
+        self._proxy = None
+        self._recent_frame_is_proxy = False
+        if self.timing == "external":
+            self._load_proxy()
         # Load video split for first frame
         self.reset_video()
         self._intrinsics = load_intrinsics(rec, set_name, self.frame_size)
@@ -310,6 +588,29 @@ class File_Source(Playback_Source, Base_Source):
         self.current_container_index = container_index
         self.frame_iterator = self.video_stream.get_frame_iterator()
 
+        # map pts of this container to frame indices, to cache all decoded frames
+        lookup = self.videoset.lookup
+        frame_indices = np.flatnonzero(lookup.container_idx == container_index)
+        if container_index < 0:
+            frame_indices = frame_indices[:0]
+        container_pts = lookup.pts[frame_indices]
+        order = np.argsort(container_pts, kind="stable")
+        self._container_pts = container_pts[order]
+        self._container_frame_indices = frame_indices[order]
+        # container frame index that the decoder returned last
+        self._decoder_container_frame_idx = -1
+
+    def set_buffered_decoding(self, buffered_decoding):
+        """Switches between the background read-ahead decoder and on-demand decoding.
+
+        Reading ahead only pays off for sequential access, every seek discards it.
+        """
+        if buffered_decoding == self.buffering:
+            return
+        self.buffering = buffered_decoding
+        # continues at target_frame_idx, by decoding forward or seeking
+        self._setup_video(self.current_container_index)
+
     def _get_streams(self, container, should_buffer):
         """Get Video stream from containers."""
         try:
@@ -324,6 +625,11 @@ class File_Source(Playback_Source, Base_Source):
         video_stream.thread_count = cpu_count()
 
         if should_buffer:
+            try:
+                # frame and slice threading, the buffer hides the added latency
+                video_stream.thread_type = "AUTO"
+            except AttributeError:
+                logger.debug("Codec threading type is not supported by pyav")
             return BufferedDecoder(container, video_stream)
         else:
             return OnDemandDecoder(container, video_stream)
@@ -384,14 +690,39 @@ class File_Source(Playback_Source, Base_Source):
         if target_entry.container_idx == -1:
             return self._get_fake_frame_and_advance(target_entry)
 
+        av_frame = self._frame_cache.get(self.target_frame_idx)
+        if av_frame is None:
+            av_frame = self._decode_target_frame(target_entry)
+            target_entry = self.videoset.lookup[self.target_frame_idx]
+
+        # update indices, we know that we advanced until target_frame_index!
+        self.current_frame_idx = self.target_frame_idx
+        self.target_frame_idx += 1
+        return Frame(
+            timestamp=target_entry.timestamp,
+            av_frame=av_frame,
+            index=self.current_frame_idx,
+        )
+
+    def _decode_target_frame(self, target_entry):
         if target_entry.container_idx != self.current_container_index:
             # Contained index changed, need to load other video split
             self._setup_video(target_entry.container_idx)
 
-        # advance frame iterator until we hit the target frame
+        _, should_seek = self._decode_plan(self.target_frame_idx)
+        if should_seek:
+            self._seek_decoder(target_entry)
+
+        # advance frame iterator until we hit the target frame, caching all frames
         for av_frame in self.frame_iterator:
             if not av_frame:
                 raise EndofVideoError
+            frame_idx = self._frame_idx_for_pts(av_frame.pts)
+            if frame_idx is not None:
+                self._decoder_container_frame_idx = self.videoset.lookup[
+                    frame_idx
+                ].container_frame_idx
+                self._frame_cache.put(frame_idx, av_frame)
             if av_frame.pts == target_entry.pts:
                 break
             elif av_frame.pts < target_entry.pts:
@@ -400,27 +731,76 @@ class File_Source(Playback_Source, Base_Source):
                 # This should never happen, but just in case we should make sure
                 # that our current_frame_idx is actually correct afterwards!
                 logger.warn("Advancing frame iterator went past the target frame!")
-                current_video_lookup = self.videoset.lookup[
-                    self.videoset.lookup.container_idx == target_entry.container_idx
-                ]
-                pts_indices = np.flatnonzero(current_video_lookup.pts == av_frame.pts)
-                if pts_indices.size > 1:
-                    logger.err("Found multiple maching pts! Something is wrong!")
+                if frame_idx is None:
+                    logger.error("Found no maching pts! Something is wrong!")
                     raise EndofVideoError
-                elif pts_indices.size == 0:
-                    logger.err("Found no maching pts! Something is wrong!")
-                    raise EndofVideoError
-                self.target_frame_idx = pts_indices[0]
+                self.target_frame_idx = frame_idx
                 break
+        return av_frame
 
-        # update indices, we know that we advanced until target_frame_index!
-        self.current_frame_idx = self.target_frame_idx
-        self.target_frame_idx += 1
-        return Frame(
-            timestamp=target_entry.timestamp,
-            av_frame=av_frame,
-            index=self.current_frame_idx,
-        )
+    def _frame_idx_for_pts(self, pts):
+        pos = np.searchsorted(self._container_pts, pts)
+        if pos < self._container_pts.size and self._container_pts[pos] == pts:
+            return int(self._container_frame_indices[pos])
+        return None
+
+    def _seek_decoder(self, target_entry):
+        try:
+            # explicit conversion to python int required, else:
+            # TypeError: ('Container.seek only accepts integer offset.')
+            self.video_stream.seek(int(target_entry.pts))
+        except av.AVError as e:
+            raise FileSeekError() from e
+        # need to re-initialize frame_iterator at the new seek position
+        self.frame_iterator = self.video_stream.get_frame_iterator()
+        # The decoder restarts at the preceding keyframe. Only assume that it did not
+        # pass the target yet, in case the keyframe index is not accurate.
+        self._decoder_container_frame_idx = target_entry.container_frame_idx - 1
+
+    def seek_cost(self, target_idx):
+        """Returns the number of frames to decode in order to get frame `target_idx`.
+
+        Takes the current decoder position, the keyframes and the decoded frame cache
+        into account. Use it to serve frame requests in the cheapest order.
+        """
+        return self._decode_plan(target_idx)[0]
+
+    def _decode_plan(self, target_idx):
+        """Returns the decode cost of `target_idx` and whether seeking is cheapest."""
+        target_entry = self.videoset.lookup[target_idx]
+        if target_entry.container_idx == -1 or target_idx in self._frame_cache:
+            return 0, False
+
+        target_frame = target_entry.container_frame_idx
+        keyframe_idx = self._preceding_keyframe_idx(target_idx)
+        if keyframe_idx is None:
+            # no keyframe known, decode from start of the container
+            seek_cost = target_frame + 1
+        else:
+            keyframe = self.videoset.lookup[keyframe_idx].container_frame_idx
+            seek_cost = target_frame - keyframe + 1
+
+        if (
+            target_entry.container_idx == self.current_container_index
+            and self._decoder_container_frame_idx < target_frame
+        ):
+            forward_cost = target_frame - self._decoder_container_frame_idx
+            if forward_cost <= seek_cost:
+                return forward_cost, False
+        return seek_cost, True
+
+    def _preceding_keyframe_idx(self, target_idx):
+        pos = np.searchsorted(self._keyframe_indices, target_idx, side="right") - 1
+        if pos < 0:
+            return None
+        keyframe_idx = self._keyframe_indices[pos]
+        lookup = self.videoset.lookup
+        if lookup[keyframe_idx].container_idx != lookup[target_idx].container_idx:
+            return None
+        return keyframe_idx
+
+    def frame_cache_stats(self):
+        return self._frame_cache.stats()
 
     def _get_fake_frame_and_advance(self, target_entry):
         self.current_frame_idx = self.target_frame_idx
@@ -442,22 +822,63 @@ class File_Source(Playback_Source, Base_Source):
         frame = None
         pbt = self.g_pool.seek_control.current_playback_time
         ts_idx = self.g_pool.seek_control.ts_idx_from_playback_time(pbt)
-        if ts_idx == last_index:
+        if self._proxy is not None and self.g_pool.seek_control.dragging:
+            if ts_idx == last_index and self._recent_frame_is_proxy:
+                frame = self._recent_frame.copy()
+            else:
+                frame = self._get_proxy_frame(ts_idx)
+        if frame is not None:
+            self._recent_frame_is_proxy = True
+        elif ts_idx == last_index and not self._recent_frame_is_proxy:
             frame = self._recent_frame.copy()
-        elif ts_idx < last_index or ts_idx > last_index + 1:
+        elif (
+            ts_idx < last_index
+            or ts_idx > last_index + 1
+            or self._recent_frame_is_proxy
+        ):
+            # also replaces the proxy frame after releasing the seek bar
             self.seek_to_frame(ts_idx)
 
         # Normal Case to get next frame
-        try:
-            frame = frame or self.get_frame()
-        except EndofVideoError:
-            logger.info("No more video found")
-            self.g_pool.seek_control.play = False
-            frame = self._recent_frame.copy()
+        if frame is None:
+            try:
+                frame = self.get_frame()
+                self._recent_frame_is_proxy = False
+            except EndofVideoError:
+                logger.info("No more video found")
+                self.g_pool.seek_control.play = False
+                frame = self._recent_frame.copy()
         self.g_pool.seek_control.end_of_seek()
         events["frame"] = frame
         self._recent_frame = frame
 
+    def _load_proxy(self):
+        if self._proxy is not None:
+            self._proxy.cleanup()
+            self._proxy = None
+        paths = proxy_paths_by_container(self.videoset)
+        if paths:
+            self._proxy = Proxy_Reader(paths)
+            logger.debug(f"Using proxy videos for scrubbing: {list(paths.values())}")
+
+    def _get_proxy_frame(self, frame_idx):
+        try:
+            target_entry = self.videoset.lookup[frame_idx]
+        except IndexError:
+            return None
+        if target_entry.container_idx == -1:
+            return None
+        av_frame = self._proxy.get_av_frame(target_entry)
+        if av_frame is None:
+            return None
+        # consumers expect frames of the full resolution
+        width, height = self.frame_size
+        return Frame(
+            timestamp=target_entry.timestamp,
+            av_frame=av_frame.reformat(width, height),
+            index=frame_idx,
+        )
+
     def recent_events_own_timing(self, events):
         if not self.play:
             if self.timing == "own":
@@ -496,22 +917,22 @@ class File_Source(Playback_Source, Base_Source):
         except IndexError:
             logger.warning("Seeking to invalid position!")
             return
+        self.finished_sleep = 0
+        self.target_frame_idx = seek_pos
         if target_entry.container_idx > -1:
+            _, should_seek = self._decode_plan(seek_pos)
+            if not should_seek:
+                # cached, or decoding forward is cheaper than seeking
+                return
             if target_entry.container_idx != self.current_container_index:
                 self._setup_video(target_entry.container_idx)
-            try:
-                # explicit conversion to python int required, else:
-                # TypeError: ('Container.seek only accepts integer offset.')
-                self.video_stream.seek(int(target_entry.pts))
-            except av.AVError as e:
-                raise FileSeekError() from e
+            self._seek_decoder(target_entry)
         else:
             # TODO: Why seek here? Might be inefficient.
             self.video_stream.seek(0)
-        # need to re-initialize frame_iterator at the new seek position
-        self.frame_iterator = self.video_stream.get_frame_iterator()
-        self.finished_sleep = 0
-        self.target_frame_idx = seek_pos
+            # need to re-initialize frame_iterator at the new seek position
+            self.frame_iterator = self.video_stream.get_frame_iterator()
+            self._decoder_container_frame_idx = -1
 
     def on_notify(self, notification):
         super().on_notify(notification)
@@ -520,6 +941,12 @@ class File_Source(Playback_Source, Base_Source):
             and notification.get("source_path") == self.source_path
         ):
             self.seek_to_frame(notification["frame_index"])
+        elif (
+            notification["subject"] == "file_source.proxy_available"
+            and notification.get("source_path") == self.source_path
+            and self.timing == "external"
+        ):
+            self._load_proxy()
         elif (
             notification["subject"] == "file_source.should_play"
             and notification.get("source_path") == self.source_path
@@ -590,6 +1017,9 @@ class File_Source(Playback_Source, Base_Source):
             self.video_stream.cleanup()
         except AttributeError:
             pass
+        self._frame_cache.clear()
+        if self._proxy is not None:
+            self._proxy.cleanup()
         super().cleanup()
 
     @property
@@ -647,3 +1077,290 @@ class File_Manager(Base_Manager):
                     "args": settings,
                 }
             )
+
+
+def _bench_write_h264_video(
+    rec_dir, name="world", num_frames=3000, gop_size=250, rate_hz=30, size=(640, 480)
+):
+    """Writes a synthetic H.264 video with fixed GOP size and recorded timestamps."""
+    from fractions import Fraction
+
+    path = os.path.join(rec_dir, f"{name}.mp4")
+    container = av.open(path, "w")
+    stream = container.add_stream("libx264", rate=rate_hz)
+    stream.width, stream.height = size
+    stream.pix_fmt = "yuv420p"
+    stream.codec_context.gop_size = gop_size
+    stream.codec_context.options = {"bf": "0", "sc_threshold": "0", "preset": "fast"}
+    stream.time_base = Fraction(1, 65535)
+    timestamps = np.arange(num_frames) / rate_hz
+    gradient = np.linspace(0, 255, size[0], dtype=np.uint8)
+    for idx, ts in enumerate(timestamps):
+        image = np.empty((size[1], size[0], 3), dtype=np.uint8)
+        image[:] = np.roll(gradient, idx * 4)[None, :, None]
+        image[: size[1] // 2, :, 0] = idx % 256  # make every frame unique
+        frame = av.VideoFrame.from_ndarray(image, format="rgb24")
+        frame.pts = int(ts * 65535)
+        frame.time_base = stream.time_base
+        for packet in stream.encode(frame):
+            container.mux(packet)
+    for packet in stream.encode():
+        container.mux(packet)
+    container.close()
+    np.save(os.path.join(rec_dir, f"{name}_timestamps.npy"), timestamps)
+    return path
+
+
+def bench_backward_scrubbing(
+    rec_dir="scrubbing_bench", num_frames=3000, gop_size=250, num_scrubs=20, seed=0
+):
+    """Replays stepping and scrubbing in Player on an H.264 video with long GOPs.
+
+    Every scrub starts at a random frame, plays 30 frames forward and steps back
+    60 frames one by one, then steps forward and backward again.
+    """
+    import time
+    from types import SimpleNamespace
+
+    os.makedirs(rec_dir, exist_ok=True)
+    source_path = os.path.join(rec_dir, "world.mp4")
+    if not os.path.exists(source_path):
+        _bench_write_h264_video(rec_dir, num_frames=num_frames, gop_size=gop_size)
+
+    rng = np.random.default_rng(seed)
+    starts = rng.integers(60, num_frames - 60, size=num_scrubs)
+
+    for label, frame_cache_bytes in (
+        ("no cache", 0),
+        ("128 MB cache", Decoded_Frame_Cache.DEFAULT_MAX_BYTES),
+    ):
+        file_source = File_Source(
+            SimpleNamespace(),
+            source_path=source_path,
+            timing=None,
+            frame_cache_bytes=frame_cache_bytes,
+        )
+        latencies = []
+        for start in starts:
+            requests = list(range(start, start + 30))
+            requests += list(range(start + 29, start - 31, -1))
+            requests += list(range(start - 30, start + 30))
+            requests += list(range(start + 29, start - 31, -1))
+            for frame_idx in requests:
+                t0 = time.perf_counter()
+                if frame_idx != file_source.get_frame_index() + 1:
+                    file_source.seek_to_frame(int(frame_idx))
+                file_source.get_frame()
+                latencies.append(time.perf_counter() - t0)
+        stats = file_source.frame_cache_stats()
+        hit_rate = stats["hits"] / max(1, stats["hits"] + stats["misses"])
+        p50, p90, p99 = np.percentile(latencies, [50, 90, 99]) * 1000
+        print(
+            f"{label:12s} total {sum(latencies):6.2f} s, hit rate {hit_rate:6.1%},"
+            f" latency p50 {p50:6.2f} ms, p90 {p90:6.2f} ms, p99 {p99:6.2f} ms"
+        )
+        file_source.cleanup()
+
+
+def bench_read_ahead(
+    rec_dir="read_ahead_bench", num_frames=900, processing_ms=28, fps=30
+):
+    """Compares on-demand decoding with the background read-ahead decoder.
+
+    Playback: every frame is processed for `processing_ms` (e.g. waiting for the
+    GPU) and frames are due every 1/fps seconds. Reports the time spent in
+    get_frame() and the frames that missed their deadline.
+    Export: end-to-end throughput of decoding, bgr conversion and MPEG4 encoding,
+    like the isolated frame exporters.
+    """
+    import time
+    from types import SimpleNamespace
+
+    from av_writer import MPEG_Writer
+
+    os.makedirs(rec_dir, exist_ok=True)
+    source_path = os.path.join(rec_dir, "world.mp4")
+    if not os.path.exists(source_path):
+        _bench_write_h264_video(rec_dir, num_frames=num_frames, size=(1280, 720))
+
+    def open_source(buffered_decoding):
+        return File_Source(
+            SimpleNamespace(),
+            source_path=source_path,
+            timing=None,
+            buffered_decoding=buffered_decoding,
+            frame_cache_bytes=0,
+        )
+
+    for label, buffered_decoding in (("on demand", False), ("read-ahead", True)):
+        file_source = open_source(buffered_decoding)
+        waits = []
+        missed = 0
+        next_due = time.perf_counter() + 1 / fps
+        for _ in range(num_frames - 1):
+            t0 = time.perf_counter()
+            frame = file_source.get_frame()
+            waits.append(time.perf_counter() - t0)
+            frame.gray
+            time.sleep(processing_ms / 1000)
+            now = time.perf_counter()
+            if now > next_due:
+                missed += 1
+                next_due = now
+            else:
+                time.sleep(next_due - now)
+            next_due += 1 / fps
+        file_source.cleanup()
+        p50, p99 = np.percentile(waits, [50, 99]) * 1000
+        print(
+            f"playback, {label:10s} get_frame p50 {p50:6.2f} ms, p99 {p99:6.2f} ms,"
+            f" missed {missed}/{num_frames - 1} deadlines"
+        )
+
+        file_source = open_source(buffered_decoding)
+        writer = MPEG_Writer(os.path.join(rec_dir, "export.mp4"), start_time_synced=0)
+        start = time.perf_counter()
+        while True:
+            try:
+                frame = file_source.get_frame()
+            except EndofVideoError:
+                break
+            writer.write_video_frame(frame)
+        writer.close()
+        duration = time.perf_counter() - start
+        file_source.cleanup()
+        print(
+            f"export,   {label:10s} {file_source.get_frame_index() / duration:6.1f} fps"
+        )
+
+
+def bench_proxy_scrubbing(
+    rec_dir="proxy_bench", num_frames=3000, gop_size=250, num_jumps=200, seed=0
+):
+    """Compares the latency of dragging the seek bar with and without proxy.
+
+    Dragging is replayed as random jumps across the video. Also reports the time it
+    takes to generate the proxy.
+    """
+    import time
+    from types import SimpleNamespace
+
+    from .proxy import generate_proxy
+
+    os.makedirs(rec_dir, exist_ok=True)
+    source_path = os.path.join(rec_dir, "world.mp4")
+    if not os.path.exists(source_path):
+        _bench_write_h264_video(
+            rec_dir, num_frames=num_frames, gop_size=gop_size, size=(1280, 720)
+        )
+
+    start = time.perf_counter()
+    for _ in generate_proxy(source_path):
+        pass
+    print(f"proxy generation {time.perf_counter() - start:6.2f} s")
+
+    file_source = File_Source(
+        SimpleNamespace(),
+        source_path=source_path,
+        timing="external",
+        frame_cache_bytes=0,
+    )
+    jumps = np.random.default_rng(seed).integers(0, num_frames, size=num_jumps)
+
+    def full_resolution_frame(frame_idx):
+        file_source.seek_to_frame(frame_idx)
+        return file_source.get_frame()
+
+    for label, get_frame in (
+        ("full resolution", full_resolution_frame),
+        ("proxy", file_source._get_proxy_frame),
+    ):
+        latencies = []
+        for frame_idx in jumps:
+            t0 = time.perf_counter()
+            get_frame(int(frame_idx)).bgr
+            latencies.append(time.perf_counter() - t0)
+        p50, p90, p99 = np.percentile(latencies, [50, 90, 99]) * 1000
+        print(
+            f"{label:15s} latency p50 {p50:7.2f} ms, p90 {p90:7.2f} ms,"
+            f" p99 {p99:7.2f} ms"
+        )
+    file_source.cleanup()
+
+
+def bench_frame_conversions(
+    rec_dir="conversion_bench", num_frames=300, sizes=((1280, 720), (192, 192))
+):
+    """Compares the previous bgr and gray conversions of Frame with the current ones.
+
+    "current" converts bgr by libswscale or OpenCV depending on the number of
+    OpenCV threads, "opencv" always converts by OpenCV into pooled buffers.
+
+    Previously, bgr was converted by libswscale into a new frame for every frame and
+    gray was copied whenever the luma lines were padded. Reports the time spent in
+    the conversions and the image buffers that were allocated per frame.
+    """
+    import time
+    from types import SimpleNamespace
+
+    os.makedirs(rec_dir, exist_ok=True)
+
+    def previous_conversions(frame):
+        av_frame = frame._av_frame
+        bgr = av_frame.reformat(format="bgr24")
+        plane = bgr.planes[0]
+        bgr = _plane_view(plane, frame.height, frame.width * 3)
+        gray = _plane_view(av_frame.planes[0], frame.height, frame.width)
+        allocations = 1
+        if not gray.flags.c_contiguous:
+            gray = np.ascontiguousarray(gray)
+            allocations += 1
+        return allocations
+
+    def current_conversions(frame):
+        allocations = _frame_buffer_pool.allocations
+        frame.bgr
+        frame.gray
+        allocations = _frame_buffer_pool.allocations - allocations
+        if not frame._convert_with_opencv:
+            allocations += 1  # the frame allocated by libswscale
+        return allocations
+
+    def opencv_conversions(frame):
+        allocations = _frame_buffer_pool.allocations
+        frame._img = frame._bgr_from_yuv420()
+        frame.gray
+        return _frame_buffer_pool.allocations - allocations
+
+    for width, height in sizes:
+        name = f"world_{width}x{height}"
+        source_path = os.path.join(rec_dir, f"{name}.mp4")
+        if not os.path.exists(source_path):
+            _bench_write_h264_video(
+                rec_dir, name=name, num_frames=num_frames, size=(width, height)
+            )
+        file_source = File_Source(
+            SimpleNamespace(), source_path=source_path, timing=None
+        )
+        frames = [file_source.get_frame() for _ in range(num_frames - 1)]
+        file_source.cleanup()
+
+        for label, convert in (
+            ("previous", previous_conversions),
+            ("current", current_conversions),
+            ("opencv", opencv_conversions),
+        ):
+            durations = []
+            allocations = 0
+            for frame in frames:
+                frame = frame.copy()  # conversions are cached per frame
+                t0 = time.perf_counter()
+                allocations += convert(frame)
+                durations.append(time.perf_counter() - t0)
+                del frame
+            p50, p99 = np.percentile(durations, [50, 99]) * 1000
+            print(
+                f"{width}x{height} {label:8s} bgr+gray p50 {p50:6.3f} ms,"
+                f" p99 {p99:6.3f} ms,"
+                f" {allocations / len(frames):4.2f} buffer allocations per frame"
+            )
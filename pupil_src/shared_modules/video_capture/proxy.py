@@ -0,0 +1,120 @@
+"""
+(*)~---------------------------------------------------------------------------
+Pupil - eye tracking platform
+Copyright (C) 2012-2020 Pupil Labs
+
+Distributed under the terms of the GNU
+Lesser General Public License (LGPL v3.0).
+See COPYING and COPYING.LESSER for license details.
+---------------------------------------------------------------------------~(*)
+"""
+
+import logging
+import os
+import typing as T
+
+import av
+import numpy as np
+
+from .utils import InvalidContainerError, Video, VideoSet
+
+logger = logging.getLogger(__name__)
+
+PROXY_HEIGHT = 480
+
+
+def proxy_dir(rec_dir: str, set_name: str) -> str:
+    return os.path.join(rec_dir, "offline_data", f"{set_name}_proxy")
+
+
+def proxy_path(rec_dir: str, set_name: str, video: Video) -> str:
+    """Location of the proxy of a single part of a video set."""
+    return os.path.join(proxy_dir(rec_dir, set_name), f"{video.name}.mp4")
+
+
+def proxy_paths_by_container(videoset: VideoSet) -> T.Dict[int, str]:
+    """Returns the valid proxies of all parts of `videoset` by container index.
+
+    A proxy is only valid if it contains a frame for every pts in the lookup table.
+    """
+    paths = {}
+    for container_idx, video in enumerate(videoset.videos):
+        path = proxy_path(videoset.rec, videoset.name, video)
+        if not os.path.exists(path):
+            continue
+        lookup_pts = videoset.lookup.pts[videoset.lookup.container_idx == container_idx]
+        try:
+            proxy = Video(path)
+            proxy_pts = proxy.load_pts(proxy.load_container())
+        except InvalidContainerError:
+            logger.debug(f"Ignoring invalid proxy: {path}")
+            continue
+        if np.isin(lookup_pts, proxy_pts).all():
+            paths[container_idx] = path
+        else:
+            logger.debug(f"Ignoring outdated proxy: {path}")
+    return paths
+
+
+def generate_proxy(source_path: str, height: int = PROXY_HEIGHT):
+    """Transcodes all parts of a video set into all-intra, low-resolution MJPEG.
+
+    Every frame keeps its pts and time base, such that the lookup table of the video
+    set is valid for the proxies as well. Yields (status, progress in percent).
+    """
+    rec_dir, file_name = os.path.split(source_path)
+    set_name = os.path.splitext(file_name)[0]
+    videoset = VideoSet(rec_dir, set_name, fill_gaps=False)
+    videoset.load_or_build_lookup()
+    os.makedirs(proxy_dir(rec_dir, set_name), exist_ok=True)
+
+    num_frames = max(1, videoset.lookup.size)
+    num_done = 0
+    yield "Generating proxy", 0.0
+    for video in videoset.videos:
+        try:
+            container = video.load_container()
+        except InvalidContainerError:
+            continue
+        out_path = proxy_path(rec_dir, set_name, video)
+        tmp_path = out_path + ".writing"
+        for _ in _transcode_to_proxy(container, tmp_path, height):
+            num_done += 1
+            if num_done % 100 == 0:
+                yield "Generating proxy", min(100.0, num_done / num_frames * 100)
+        container.close()
+        os.replace(tmp_path, out_path)
+    yield "Proxy generated", 100.0
+
+
+def _transcode_to_proxy(container, out_path, height):
+    stream = container.streams.video[0]
+    # even sizes for chroma subsampling
+    proxy_height = min(height, stream.format.height) // 2 * 2
+    proxy_width = (
+        round(stream.format.width * proxy_height / stream.format.height / 2) * 2
+    )
+
+    out_container = av.open(out_path, "w", format="mp4")
+    out_stream = out_container.add_stream("mjpeg", rate=stream.average_rate or 30)
+    out_stream.width = proxy_width
+    out_stream.height = proxy_height
+    out_stream.pix_fmt = "yuvj420p"
+    # encoder and muxer must share the time base, otherwise pts get rounded
+    out_stream.time_base = stream.time_base
+    out_stream.codec_context.time_base = stream.time_base
+    try:
+        for packet in container.demux(stream):
+            for frame in packet.decode():
+                if not frame:
+                    continue
+                proxy_frame = frame.reformat(proxy_width, proxy_height, "yuvj420p")
+                proxy_frame.pts = frame.pts
+                proxy_frame.time_base = stream.time_base
+                for out_packet in out_stream.encode(proxy_frame):
+                    out_container.mux(out_packet)
+                yield
+        for out_packet in out_stream.encode():
+            out_container.mux(out_packet)
+    finally:
+        out_container.close()
@@ -12,6 +12,7 @@ import logging
 import os
 import pathlib as pl
 import typing as T
+import zipfile
 from pathlib import Path
 
 
@@ -24,6 +25,9 @@ logger = logging.getLogger(__name__)
 VIDEO_EXTS = ("mp4", "mjpeg", "h264", "mkv", "avi", "fake")
 VIDEO_TIME_EXTS = VIDEO_EXTS + ("time",)
 
+# number of demuxed packets that validate the pts read from a container index
+_PTS_INDEX_VALIDATION_PACKETS = 32
+
 
 class Exposure_Time(object):
     def __init__(self, max_ET, frame_rate, mode="manual"):
@@ -178,6 +182,7 @@ class Video:
         self.path = path
         self.ts = None
         self._pts = None
+        self._keyframes = None
         self._is_valid = None  # calculated on demand
 
     @property
@@ -219,11 +224,65 @@ class Video:
         self.ts = self._fix_negative_time_jumps(self.ts)
 
     def load_pts(self, container):
-        packets = container.demux(video=0)
-        # last pts is invalid
-        self._pts = np.array([packet.pts for packet in packets][:-1])
+        """Loads the pts of all frames, and which of them are keyframes."""
+        stream = container.streams.video[0]
+        from_index = self._pts_from_index(container, stream)
+        if from_index is not None:
+            self._pts, self._keyframes = from_index
+        else:
+            pts = []
+            keyframes = []
+            for packet in container.demux(stream):
+                pts.append(packet.pts)
+                keyframes.append(packet.is_keyframe)
+            # last pts is invalid
+            self._pts = np.array(pts[:-1])
+            self._keyframes = np.array(keyframes[:-1], dtype=bool)
         return self._pts
 
+    def _pts_from_index(
+        self, container, stream
+    ) -> T.Optional[T.Tuple[np.ndarray, np.ndarray]]:
+        """Reads pts and keyframe flags of all packets from the container index.
+
+        This avoids reading the whole file, which demuxing does. Only the mp4/mov
+        index is complete, other formats e.g. only index keyframes. Packets of
+        truncated files (e.g. after a crash) are indexed, but not readable.
+
+        The index holds decoding timestamps. It is therefore only used if it matches
+        the first demuxed packets, which is not the case for streams with B-frames.
+        """
+        entries = getattr(stream, "index_entries", None)  # not in older PyAV
+        if not entries or "mov" not in container.format.name.split(","):
+            return None
+        file_size = os.path.getsize(self.path)
+        entries = [
+            entry
+            for entry in entries
+            if not entry.is_discard and entry.pos + entry.size <= file_size
+        ]
+        pts = np.fromiter((entry.timestamp for entry in entries), dtype=np.int64)
+        keyframes = np.fromiter((entry.is_keyframe for entry in entries), dtype=bool)
+        demuxed = []
+        for packet in container.demux(stream):
+            if packet.pts is None:
+                break  # final flush packet
+            demuxed.append(packet.pts)
+            if len(demuxed) == _PTS_INDEX_VALIDATION_PACKETS:
+                break
+        container.seek(0)
+        if len(demuxed) < _PTS_INDEX_VALIDATION_PACKETS and len(demuxed) != pts.size:
+            return None
+        if demuxed != pts[: len(demuxed)].tolist():
+            return None
+        return pts, keyframes
+
+    @property
+    def file_stat(self) -> T.Tuple[int, int]:
+        """File size and modification time, which identify this version of a part."""
+        stat = os.stat(self.path)
+        return stat.st_size, stat.st_mtime_ns
+
     @property
     def name(self) -> str:
         file_ = os.path.split(self.path)[1]
@@ -249,6 +308,13 @@ class Video:
             self.load_pts()
         return self._pts
 
+    @property
+    def keyframes(self) -> np.ndarray:
+        """Boolean mask of the frames in `pts` that are keyframes."""
+        if self._keyframes is None:
+            self.load_pts()
+        return self._keyframes
+
     @staticmethod
     def _fix_negative_time_jumps(timestamps: np.ndarray) -> np.ndarray:
         """Fix cases when large negative time jumps cause huge gaps due to sorting
@@ -346,19 +412,21 @@ class VideoSet:
         if len(loaded_ts) == 0 and fallback_timestamps is not None:
             fallback_timestamps = np.asanyarray(fallback_timestamps)
             self.lookup = self._setup_lookup(fallback_timestamps)
+            self.keyframes = np.zeros(self.lookup.size, dtype=bool)
             return
 
         lookup = self._setup_lookup(loaded_ts)
+        keyframes = np.zeros(lookup.size, dtype=bool)
+        pts_cache = self._load_pts_cache()
         for container_idx, vid in enumerate(self.videos):
             try:
-                container = vid.load_container()
+                vid_pts, vid_keyframes = self._load_or_cache_pts(vid, pts_cache)
 
                 # NOTE: For unknown reasons we sometimes have more timestamps than
                 # frames. We don't know how to match non-matching timestamps and
                 # pts, so we might introduce a systematic bias when fixing this! The
                 # idea is to keep only data for timestamps that were recorded, but
                 # leave frames blank if we don't have frame information.
-                vid_pts = vid.load_pts(container)
                 npts = vid_pts.size
                 ntime = vid.timestamps.size
                 if npts < ntime:
@@ -379,6 +447,7 @@ class VideoSet:
                 lookup.container_frame_idx[lookup_mask] = np.arange(vid_timestamps.size)
                 lookup.container_idx[lookup_mask] = container_idx
                 lookup.pts[lookup_mask] = vid_pts
+                keyframes[lookup_mask] = vid_keyframes[:data_size]
 
             except InvalidContainerError:
                 # For invalid videos, we still try to load the timestamps (might be empty)
@@ -386,13 +455,84 @@ class VideoSet:
                 lookup.container_frame_idx[lookup_mask] = np.arange(vid.timestamps.size)
 
         self.lookup = lookup
+        self.keyframes = keyframes
+        # keyframes first, since an existing lookup implies an existing keyframe index
+        np.save(self.keyframes_loc, self.keyframes)
         np.save(self.lookup_loc, self.lookup)
+        self._save_pts_cache(pts_cache)
         # filter gaps (after saving!)
         if not self.fill_gaps:
             self._remove_filled_gaps()
 
+    @property
+    def keyframes_loc(self) -> str:
+        return os.path.join(self.rec, f"{self.name}_lookup_keyframes.npy")
+
+    @property
+    def pts_cache_loc(self) -> str:
+        return os.path.join(self.rec, f"{self.name}_lookup_pts.npz")
+
+    def _load_pts_cache(
+        self,
+    ) -> T.Dict[str, T.Tuple[T.Tuple[int, int], np.ndarray, np.ndarray]]:
+        """Demuxed pts and keyframes by video file name, with the part's file stat."""
+        pts_cache = {}
+        try:
+            with np.load(self.pts_cache_loc) as cache_file:
+                for key in cache_file.files:
+                    if key.endswith(".stat"):
+                        file_name = key[: -len(".stat")]
+                        file_stat = tuple(cache_file[key].tolist())
+                        pts_cache[file_name] = (
+                            file_stat,
+                            cache_file[file_name],
+                            cache_file[file_name + ".keyframes"],
+                        )
+        except FileNotFoundError:
+            pass
+        except (KeyError, ValueError, OSError, zipfile.BadZipFile):
+            logger.debug(f"Ignoring invalid pts cache: {self.pts_cache_loc}")
+            pts_cache = {}
+        return pts_cache
+
+    def _save_pts_cache(self, pts_cache):
+        video_names = {os.path.basename(vid.path) for vid in self.videos}
+        arrays = {}
+        for file_name, (file_stat, pts, keyframes) in pts_cache.items():
+            if file_name in video_names:
+                arrays[file_name] = pts
+                arrays[file_name + ".stat"] = np.array(file_stat, dtype=np.int64)
+                arrays[file_name + ".keyframes"] = keyframes
+        tmp_loc = self.pts_cache_loc + ".writing"
+        with open(tmp_loc, "wb") as fh:
+            np.savez(fh, **arrays)
+        os.replace(tmp_loc, self.pts_cache_loc)
+
+    @staticmethod
+    def _load_or_cache_pts(vid: Video, pts_cache) -> T.Tuple[np.ndarray, np.ndarray]:
+        """Demuxes pts and keyframes of `vid`, unless the part is unchanged since it
+        was cached.
+
+        Raises InvalidContainerError for invalid parts, which are never cached.
+        """
+        file_name = os.path.basename(vid.path)
+        file_stat = vid.file_stat
+        cached = pts_cache.get(file_name)
+        if cached is not None and cached[0] == file_stat:
+            _, vid._pts, vid._keyframes = cached
+            return vid._pts, vid._keyframes
+        container = vid.load_container()
+        pts = vid.load_pts(container)
+        pts_cache[file_name] = file_stat, pts, vid.keyframes
+        return pts, vid.keyframes
+
     def load_lookup(self):
+        """Raises FileNotFoundError if the lookup or its keyframe index is missing.
+
+        Lookups of older versions do not have a keyframe index and are rebuilt.
+        """
         self.lookup = np.load(self.lookup_loc).view(np.recarray)
+        self.keyframes = np.load(self.keyframes_loc)
         if not self.fill_gaps:
             self._remove_filled_gaps()
 
@@ -412,6 +552,7 @@ class VideoSet:
     def _remove_filled_gaps(self):
         cont_idc = self.lookup.container_idx
         self.lookup = self.lookup[cont_idc > -1]
+        self.keyframes = self.keyframes[cont_idc > -1]
 
     def _fill_gaps(self, timestamps: np.ndarray) -> np.ndarray:
         time_diff = np.diff(timestamps)
@@ -497,3 +638,96 @@ def pi_gaze_items(root_dir):
             raw_data = raw_data[:size]
             timestamps = timestamps[:size]
         yield from zip(raw_data, timestamps)
+
+
+def _bench_write_video_set(rec_dir, name, duration_s, rate_hz, num_parts):
+    """Writes a video set of `num_parts` tiny mjpeg parts with recorded timestamps."""
+    from fractions import Fraction
+
+    frames_per_part = int(duration_s * rate_hz) // num_parts
+    image = np.zeros((16, 16, 3), dtype=np.uint8)
+    for part in range(num_parts):
+        suffix = f"_{part:03d}" if part else ""
+        path = os.path.join(rec_dir, f"{name}{suffix}.mp4")
+        if os.path.exists(path):
+            continue
+        first_idx = part * frames_per_part
+        timestamps = (first_idx + np.arange(frames_per_part)) / rate_hz
+        container = av.open(path, "w")
+        stream = container.add_stream("mjpeg", rate=rate_hz)
+        stream.width = stream.height = 16
+        stream.pix_fmt = "yuvj420p"
+        stream.time_base = Fraction(1, 65535)
+        frame = av.VideoFrame.from_ndarray(image, format="rgb24")
+        for ts in timestamps:
+            frame.pts = int((ts - timestamps[0]) * 65535)
+            frame.time_base = stream.time_base
+            for packet in stream.encode(frame):
+                container.mux(packet)
+        for packet in stream.encode():
+            container.mux(packet)
+        container.close()
+        np.save(os.path.join(rec_dir, f"{name}{suffix}_timestamps.npy"), timestamps)
+
+
+def _bench_build_lookup(rec_dir, name):
+    VideoSet(rec_dir, name, fill_gaps=True).build_lookup()
+
+
+def bench_lookup_tables(rec_dir="lookup_bench", duration_s=60 * 60, num_parts=4):
+    """Builds the world, eye0 and eye1 lookup tables of a synthetic recording.
+
+    Compares the previous approach (sequential, demuxing all packets) with the
+    process pool and index based pts (cold), and with reused pts caches (warm).
+    """
+    import concurrent.futures
+    import multiprocessing as mp
+    import time
+
+    os.makedirs(rec_dir, exist_ok=True)
+    rates = {"world": 30, "eye0": 200, "eye1": 200}
+    for name, rate_hz in rates.items():
+        _bench_write_video_set(rec_dir, name, duration_s, rate_hz, num_parts)
+
+    def remove_lookups():
+        for name in rates:
+            videoset = VideoSet(rec_dir, name, fill_gaps=True)
+            for path in (videoset.lookup_loc, videoset.pts_cache_loc):
+                if os.path.exists(path):
+                    os.remove(path)
+
+    class Demuxing_Video(Video):
+        def _pts_from_index(self, container, stream):
+            return None
+
+    class Demuxing_VideoSet(VideoSet):
+        def fetch_videos(self):
+            for vid in super().fetch_videos():
+                yield Demuxing_Video(vid.path)
+
+        def _load_pts_cache(self):
+            return {}
+
+    for label, videoset_cls in (("demuxing", Demuxing_VideoSet), ("index", VideoSet)):
+        remove_lookups()
+        start = time.perf_counter()
+        for name in rates:
+            videoset_cls(rec_dir, name, fill_gaps=True).build_lookup()
+        print(f"sequential, {label} pts: {time.perf_counter() - start:.2f}s")
+
+    pool = concurrent.futures.ProcessPoolExecutor(
+        len(rates), mp_context=mp.get_context("spawn")
+    )
+    with pool:
+        for label in ("cold", "warm"):
+            if label == "cold":
+                remove_lookups()
+            else:
+                for name in rates:
+                    os.remove(VideoSet(rec_dir, name, fill_gaps=True).lookup_loc)
+            start = time.perf_counter()
+            list(pool.map(_bench_build_lookup, [rec_dir] * len(rates), rates))
+            print(
+                f"process pool, {label} pts cache: {time.perf_counter() - start:.2f}s"
+                f" ({os.cpu_count()} CPUs)"
+            )
@@ -10,6 +10,7 @@ See COPYING and COPYING.LESSER for license details.
 """
 
 import enum
+import functools
 import logging
 import platform
 import re
@@ -24,8 +25,10 @@ from pyglui import cygl, ui
 import gl_utils
 import uvc
 from camera_models import load_intrinsics
+from methods import timer
 from version_utils import VersionFormat
 
+from .acquisition import Acquisition_Thread
 from .base_backend import Base_Manager, Base_Source, InitialisationError, SourceInfo
 from .utils import Check_Frame_Stripes, Exposure_Time
 
@@ -48,9 +51,23 @@ class TJSAMP(enum.IntEnum):
     TJSAMP_411 = 5
 
 
+def _paused_acquisition(method):
+    """Pauses grabbing frames while `method` reconfigures the capture."""
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._acquisition.paused():
+            return method(self, *args, **kwargs)
+
+    return wrapper
+
+
 class UVC_Source(Base_Source):
     """
     Camera Capture is a class that encapsualtes uvc.Capture:
+
+    Frames are grabbed on an acquisition thread, such that long running plugins
+    do not cause frame drops in the capture.
     """
 
     def __init__(
@@ -70,8 +87,13 @@ class UVC_Source(Base_Source):
 
         super().__init__(g_pool, *args, **kwargs)
         self.uvc_capture = None
-        self._last_ts = None
         self._restart_in = 3
+        self._acquisition = Acquisition_Thread(
+            self._grab_frame, name=f"{type(self).__name__}_Acquisition"
+        )
+        drop_stats_timer = timer(5.0)
+        self.check_drop_stats = lambda: next(drop_stats_timer)
+        self._num_dropped_reported = 0
         assert name or preferred_names or uid
 
         if platform.system() == "Windows":
@@ -154,6 +176,7 @@ class UVC_Source(Base_Source):
                 self.exposure_time_backup = None
 
         self.backup_uvc_controls = {}
+        self._acquisition.start()
 
     def verify_drivers(self):
         import os
@@ -260,6 +283,7 @@ class UVC_Source(Base_Source):
 
             logger.warning("Done updating drivers!")
 
+    @_paused_acquisition
     def configure_capture(self, frame_size, frame_rate, uvc_controls):
         # Set camera defaults. Override with previous settings afterwards
         if "Pupil Cam" in self.uvc_capture.name:
@@ -401,6 +425,7 @@ class UVC_Source(Base_Source):
         if self.should_check_stripes:
             self.stripe_detector = Check_Frame_Stripes()
 
+    @_paused_acquisition
     def _re_init_capture(self, uid):
         current_size = self.uvc_capture.frame_size
         current_fps = self.uvc_capture.frame_rate
@@ -410,6 +435,7 @@ class UVC_Source(Base_Source):
         self.configure_capture(current_size, current_fps, current_uvc_controls)
         self.update_menu()
 
+    @_paused_acquisition
     def _init_capture(self, uid, backup_uvc_controls={}):
         self.uvc_capture = uvc.Capture(uid)
         self.configure_capture(
@@ -433,6 +459,7 @@ class UVC_Source(Base_Source):
             "Could not find Camera {} during re initilization.".format(names)
         )
 
+    @_paused_acquisition
     def _restart_logic(self):
         if self._restart_in <= 0:
             if self.uvc_capture:
@@ -452,21 +479,21 @@ class UVC_Source(Base_Source):
         else:
             self._restart_in -= 1
 
+    def _grab_frame(self, timeout):
+        """Grabs the next frame, called on the acquisition thread."""
+        frame = self.uvc_capture.get_frame(timeout)
+        if self.ts_offset is not None:
+            # c930 timestamps need to be set here. The camera does not provide valid pts from device
+            frame.timestamp = uvc.get_time_monotonic() + self.ts_offset
+        return frame
+
     def recent_events(self, events):
         was_online = self.online
 
-        try:
-            frame = self.uvc_capture.get_frame(0.05)
-
-            if np.isclose(frame.timestamp, 0):
-                # sometimes (probably only on windows) after disconnections, the first frame has 0 ts
-                logger.debug(
-                    "Received frame with invalid timestamp."
-                    " This can happen after a disconnect."
-                    " Frame will be dropped!"
-                )
-                return
-
+        # returns as soon as a frame was grabbed, or immediately if frames were
+        # grabbed while the main loop was busy
+        frame = self._acquisition.latest(timeout=0.05)
+        if frame is not None:
             if self.preferred_exposure_time:
                 target = self.preferred_exposure_time.calculate_based_on_frame(frame)
                 if target is not None:
@@ -477,33 +504,38 @@ class UVC_Source(Base_Source):
                 self.frame_rate = self.frame_rate
                 logger.info("Stripes detected")
 
-        except uvc.StreamError:
-            self._recent_frame = None
-            self._restart_logic()
-        except (AttributeError, uvc.InitError):
+            frame.timestamp -= self.g_pool.timebase.value
+            self._recent_frame = frame
+            events["frame"] = frame
+            self._restart_in = 3
+
+        error = self._acquisition.error
+        if error is not None:
+            if not isinstance(error, (uvc.StreamError, uvc.InitError, AttributeError)):
+                raise error
             self._recent_frame = None
-            time.sleep(0.02)
+            if not isinstance(error, uvc.StreamError):
+                time.sleep(0.02)
             self._restart_logic()
-        else:
-            if self.ts_offset is not None:
-                # c930 timestamps need to be set here. The camera does not provide valid pts from device
-                frame.timestamp = uvc.get_time_monotonic() + self.ts_offset
+            self._acquisition.resume()
 
-            if self._last_ts is not None and frame.timestamp <= self._last_ts:
-                logger.debug(
-                    "Received non-monotonic timestamps from UVC! Dropping frame."
-                    f" Last: {self._last_ts}, current: {frame.timestamp}"
-                )
-            else:
-                self._last_ts = frame.timestamp
-                frame.timestamp -= self.g_pool.timebase.value
-                self._recent_frame = frame
-                events["frame"] = frame
-            self._restart_in = 3
+        if self.check_drop_stats():
+            self._report_dropped_frames()
 
         if was_online != self.online:
             self.update_menu()
 
+    def _report_dropped_frames(self):
+        stats = self._acquisition.stats()
+        num_dropped = sum(n for key, n in stats.items() if key.startswith("dropped_"))
+        if num_dropped > self._num_dropped_reported:
+            logger.debug(f"{self.name} acquisition stats: {stats}")
+            self._num_dropped_reported = num_dropped
+
+    def frame_acquisition_stats(self):
+        """Number of grabbed, consumed, and dropped frames by reason."""
+        return self._acquisition.stats()
+
     def _get_uvc_controls(self):
         d = {}
         if self.uvc_capture:
@@ -539,6 +571,7 @@ class UVC_Source(Base_Source):
             return self.frame_size_backup
 
     @frame_size.setter
+    @_paused_acquisition
     def frame_size(self, new_size):
         # closest match for size
         sizes = [
@@ -575,6 +608,7 @@ class UVC_Source(Base_Source):
             return self.frame_rate_backup
 
     @frame_rate.setter
+    @_paused_acquisition
     def frame_rate(self, new_rate):
         # closest match for rate
         rates = [abs(r - new_rate) for r in self.uvc_capture.frame_rates]
@@ -862,6 +896,7 @@ class UVC_Source(Base_Source):
         return ui_elements
 
     def cleanup(self):
+        self._acquisition.stop()
         self.devices.cleanup()
         self.devices = None
         if self.uvc_capture:
@@ -79,7 +79,14 @@ def _convert_video_file(
     timestamp_export_format,
 ):
     yield "Export video", 0.0
-    input_source = File_Source(SimpleNamespace(), input_file, fill_gaps=True)
+    # frames are exported in order, decode ahead instead of caching them
+    input_source = File_Source(
+        SimpleNamespace(),
+        input_file,
+        fill_gaps=True,
+        buffered_decoding=True,
+        frame_cache_bytes=0,
+    )
     if not input_source.initialised:
         yield "Exporting video failed", 0.0
         return
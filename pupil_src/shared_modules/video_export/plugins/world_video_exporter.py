@@ -165,7 +165,15 @@ def _export_world_video(
             raise FileNotFoundError("No world video found")
 
         source_path = videos[0].resolve()
-        cap = File_Source(g_pool, source_path=source_path, fill_gaps=True, timing=None)
+        # frames are exported in order, decode ahead instead of caching them
+        cap = File_Source(
+            g_pool,
+            source_path=source_path,
+            fill_gaps=True,
+            timing=None,
+            buffered_decoding=True,
+            frame_cache_bytes=0,
+        )
         if not cap.initialised:
             warn = "Trying to export zero-duration world video."
             logger.warning(warn)
@@ -241,6 +249,10 @@ def _export_world_video(
         # add plugins
         g_pool.plugins = Plugin_List(g_pool, plugin_initializers)
 
+        gaze_offsets, _ = pm.correlate_data_indices(
+            g_pool.gaze_positions.data_ts, g_pool.timestamps
+        )
+
         while frames_to_export > current_frame:
             try:
                 frame = cap.get_frame()
@@ -250,7 +262,8 @@ def _export_world_video(
             events = {"frame": frame}
             # new positions and events
             frame_window = pm.enclosing_window(g_pool.timestamps, frame.index)
-            events["gaze"] = g_pool.gaze_positions.by_ts_window(frame_window)
+            gaze_start, gaze_stop = gaze_offsets[frame.index : frame.index + 2]
+            events["gaze"] = g_pool.gaze_positions[gaze_start:gaze_stop]
             events["pupil"] = g_pool.pupil_positions.by_ts_window(frame_window)
 
             # publish delayed notifications when their time has come.
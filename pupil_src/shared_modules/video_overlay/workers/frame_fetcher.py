@@ -10,6 +10,7 @@ See COPYING and COPYING.LESSER for license details.
 """
 
 import logging
+import os
 from types import SimpleNamespace
 
 import player_methods as pm
@@ -19,27 +20,42 @@ logger = logging.getLogger(__name__)
 
 
 class FrameFetcher:
-    __slots__ = ("source", "current_frame")
+    """Fetches the frames of a video by timestamp or index.
+
+    Playback and exports request monotonic indices. After a few of them the source
+    decodes ahead in the background, until an index is requested out of order.
+    Frames in between requested indices are decoded, but not converted.
+    Decoding ahead only overlaps with rendering if there is more than one CPU.
+    """
+
+    __slots__ = ("source", "current_frame", "_num_sequential_requests")
+
+    # monotonic requests before decoding ahead
+    SEQUENTIAL_AFTER = 3
+    DECODE_AHEAD = (os.cpu_count() or 1) > 1
 
     def __init__(self, video_path):
         self.source = File_Source(
-            SimpleNamespace(), source_path=video_path, timing=None, fill_gaps=True
+            SimpleNamespace(),
+            source_path=video_path,
+            timing=None,
+            fill_gaps=True,
+            frame_cache_bytes=0,
         )
         if not self.source.initialised:
             raise FileNotFoundError(video_path)
         self.current_frame = self.source.get_frame()
+        self._num_sequential_requests = 0
 
     def closest_frame_to_ts(self, ts):
         closest_idx = pm.find_closest(self.source.timestamps, ts)
         return self.frame_for_idx(closest_idx)
 
     def frame_for_idx(self, requested_frame_idx):
+        self._update_access_pattern(requested_frame_idx)
         if requested_frame_idx != self.current_frame.index:
-            if requested_frame_idx == self.source.get_frame_index() + 2:
-                # if we just need to seek by one frame,
-                # its faster to just read one and and throw it away.
-                self.source.get_frame()
             if requested_frame_idx != self.source.get_frame_index() + 1:
+                # decodes forward instead of seeking if that is cheaper
                 self.source.seek_to_frame(int(requested_frame_idx))
 
             try:
@@ -47,3 +63,86 @@ class FrameFetcher:
             except EndofVideoError:
                 logger.info("End of video {}.".format(self.source.source_path))
         return self.current_frame
+
+    def _update_access_pattern(self, requested_frame_idx):
+        if requested_frame_idx >= self.current_frame.index:
+            self._num_sequential_requests += 1
+        else:
+            self._num_sequential_requests = 0
+        self.source.set_buffered_decoding(
+            self.DECODE_AHEAD
+            and self._num_sequential_requests >= self.SEQUENTIAL_AFTER
+        )
+
+
+def bench_eye_overlay_export(rec_dir="eye_overlay_bench", duration_s=30):
+    """Compares the export time of a world video with an eye video overlay.
+
+    The eye video is recorded at 200 Hz, the world video at 30 Hz, so most eye
+    frames are skipped. Every world frame gets the closest eye frame pasted in and
+    is encoded, like the world video exporter with the eye overlay plugin.
+    """
+    import time
+
+    from av_writer import MPEG_Writer
+    from video_capture.file_backend import _bench_write_h264_video
+
+    os.makedirs(rec_dir, exist_ok=True)
+    world_path = os.path.join(rec_dir, "world.mp4")
+    eye_path = os.path.join(rec_dir, "eye0.mp4")
+    if not os.path.exists(world_path):
+        _bench_write_h264_video(rec_dir, num_frames=duration_s * 30, size=(1280, 720))
+    if not os.path.exists(eye_path):
+        _bench_write_h264_video(
+            rec_dir,
+            name="eye0",
+            num_frames=duration_s * 200,
+            rate_hz=200,
+            size=(192, 192),
+        )
+
+    class PreviousFrameFetcher:
+        def __init__(self, video_path):
+            self.source = File_Source(
+                SimpleNamespace(), source_path=video_path, timing=None, fill_gaps=True
+            )
+            self.current_frame = self.source.get_frame()
+
+        def closest_frame_to_ts(self, ts):
+            idx = pm.find_closest(self.source.timestamps, ts)
+            if idx != self.current_frame.index:
+                if idx != self.source.get_frame_index() + 1:
+                    self.source.seek_to_frame(int(idx))
+                try:
+                    self.current_frame = self.source.get_frame()
+                except EndofVideoError:
+                    pass
+            return self.current_frame
+
+    for label, fetcher_cls in (
+        ("previous", PreviousFrameFetcher),
+        ("prefetching", FrameFetcher),
+    ):
+        world = File_Source(
+            SimpleNamespace(),
+            source_path=world_path,
+            timing=None,
+            frame_cache_bytes=0,
+        )
+        fetcher = fetcher_cls(eye_path)
+        writer = MPEG_Writer(os.path.join(rec_dir, "export.mp4"), start_time_synced=0)
+        start = time.perf_counter()
+        while True:
+            try:
+                frame = world.get_frame()
+            except EndofVideoError:
+                break
+            eye_bgr = fetcher.closest_frame_to_ts(frame.timestamp).bgr
+            frame.img[: eye_bgr.shape[0], : eye_bgr.shape[1]] = eye_bgr
+            writer.write_video_frame(frame)
+        writer.close()
+        duration = time.perf_counter() - start
+        world.cleanup()
+        fetcher.source.cleanup()
+        fps = world.get_frame_index() / duration
+        print(f"{label:12s} {duration:6.2f} s, {fps:6.1f} fps")
@@ -0,0 +1,94 @@
+"""
+(*)~---------------------------------------------------------------------------
+Pupil - eye tracking platform
+Copyright (C) 2012-2020 Pupil Labs
+
+Distributed under the terms of the GNU
+Lesser General Public License (LGPL v3.0).
+See COPYING and COPYING.LESSER for license details.
+---------------------------------------------------------------------------~(*)
+"""
+
+import logging
+
+from pyglui import ui
+
+import tasklib
+from observable import Observable
+from plugin import Plugin
+from tasklib.manager import PluginTaskManager
+from video_capture.proxy import PROXY_HEIGHT, generate_proxy
+
+logger = logging.getLogger(__name__)
+
+
+class Video_Proxy(Observable, Plugin):
+    """Generates a low-resolution proxy of the world video for fast scrubbing.
+
+    While the seek bar is dragged, the world video is shown from the proxy. Its
+    frames are all keyframes, so every frame is decoded without seeking to a
+    preceding keyframe. Full resolution frames are shown as soon as the seek bar is
+    released.
+    """
+
+    icon_chr = chr(0xE04B)
+    icon_font = "pupil_icons"
+
+    def __init__(self, g_pool):
+        super().__init__(g_pool)
+        self._task_manager = PluginTaskManager(plugin=self)
+        self._task = None
+        self.status = "Not generated in this session"
+
+    @classmethod
+    def parse_pretty_class_name(cls) -> str:
+        return "Scrubbing Proxy"
+
+    def init_ui(self):
+        self.add_menu()
+        self.menu.label = "Scrubbing Proxy"
+        self.menu.append(
+            ui.Info_Text(
+                f"Generate a {PROXY_HEIGHT}p copy of the world video that is shown"
+                " while dragging the seek bar. It is stored in the offline_data folder"
+                " of the recording and reused in later sessions."
+            )
+        )
+        self.menu.append(ui.Button("Generate proxy", self.start_generation))
+        self.menu.append(
+            ui.Text_Input("status", self, label="Status", setter=lambda _: None)
+        )
+
+    def deinit_ui(self):
+        self.remove_menu()
+
+    def start_generation(self):
+        if self._task is not None and self._task.running:
+            logger.warning("Proxy generation is already running")
+            return
+
+        def on_yield(result):
+            self.status = "{} ({:.0f}%)".format(*result)
+
+        def on_completed(_):
+            logger.info("Proxy generation completed")
+            self.notify_all(
+                {
+                    "subject": "file_source.proxy_available",
+                    "source_path": self.g_pool.capture.source_path,
+                }
+            )
+
+        def on_canceled_or_killed():
+            self.status = "Canceled"
+
+        self._task = self._task_manager.create_background_task(
+            name="proxy generation",
+            routine_or_generator_function=generate_proxy,
+            args=(self.g_pool.capture.source_path,),
+        )
+        self._task.add_observer("on_yield", on_yield)
+        self._task.add_observer("on_completed", on_completed)
+        self._task.add_observer("on_canceled_or_killed", on_canceled_or_killed)
+        self._task.add_observer("on_exception", tasklib.raise_exception)
+        self.status = "Queued"
@@ -0,0 +1,154 @@
+"""
+(*)~---------------------------------------------------------------------------
+Pupil - eye tracking platform
+Copyright (C) 2012-2020 Pupil Labs
+
+Distributed under the terms of the GNU
+Lesser General Public License (LGPL v3.0).
+See COPYING and COPYING.LESSER for license details.
+---------------------------------------------------------------------------~(*)
+"""
+
+import collections
+import enum
+import logging
+import threading
+import time
+import typing as T
+
+logger = logging.getLogger(__name__)
+
+
+@enum.unique
+class BackpressurePolicy(enum.Enum):
+    """What to do with a new write task when the queue is full."""
+
+    BLOCK = "block"  # wait until the writer thread has caught up
+    DROP_OLDEST = "drop_oldest"  # drop the oldest droppable task in the queue
+    DROP_NEWEST = "drop_newest"  # drop the new task
+
+
+_Task = collections.namedtuple("_Task", ["fn", "args", "droppable"])
+
+
+class Writer_Thread:
+    """Executes write tasks in submission order on a dedicated thread.
+
+    Tasks are fed through a queue that is bounded by `max_queue_size`. When the
+    queue is full, `policy` decides whether `submit()` blocks or drops a task.
+    Non-droppable tasks (e.g. notifications) are never dropped and never block.
+
+    Tasks return the number of bytes they have written. Exceptions raised by tasks
+    are collected and can be fetched with `pop_errors()`.
+    """
+
+    def __init__(
+        self,
+        max_queue_size: int = 600,
+        policy: BackpressurePolicy = BackpressurePolicy.BLOCK,
+        name: str = "Writer_Thread",
+    ):
+        self.max_queue_size = max_queue_size
+        self.policy = BackpressurePolicy(policy)
+        self._queue = collections.deque()
+        self._num_droppable = 0
+        self._condition = threading.Condition()
+        self._should_stop = False
+        self._errors = []
+
+        self.num_written = 0
+        self.num_dropped = 0
+        self.bytes_written = 0
+        self._last_stats = (time.monotonic(), 0)
+
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def submit(self, fn: T.Callable[..., int], *args, droppable=True) -> bool:
+        """Queues `fn(*args)` to be run on the writer thread.
+
+        Returns False if the task (or no task) was dropped.
+        """
+        task = _Task(fn, args, droppable)
+        with self._condition:
+            if self._should_stop:
+                raise RuntimeError("Writer thread was stopped already")
+            if droppable and self._num_droppable >= self.max_queue_size:
+                if self.policy is BackpressurePolicy.DROP_NEWEST:
+                    self.num_dropped += 1
+                    return False
+                elif self.policy is BackpressurePolicy.DROP_OLDEST:
+                    self._drop_oldest()
+                else:
+                    self._condition.wait_for(
+                        lambda: self._num_droppable < self.max_queue_size
+                    )
+            self._queue.append(task)
+            if droppable:
+                self._num_droppable += 1
+            self._condition.notify_all()
+        return True
+
+    def _drop_oldest(self):
+        for queued in self._queue:
+            if queued.droppable:
+                self._queue.remove(queued)
+                self._num_droppable -= 1
+                self.num_dropped += 1
+                return
+
+    def _run(self):
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._queue or self._should_stop)
+                if not self._queue:
+                    return  # stopped and drained
+                task = self._queue.popleft()
+                if task.droppable:
+                    self._num_droppable -= 1
+                self._condition.notify_all()
+
+            try:
+                bytes_written = task.fn(*task.args)
+            except Exception as err:
+                logger.debug(f"Write task failed: {err!r}")
+                bytes_written = 0
+                with self._condition:
+                    self._errors.append(err)
+
+            with self._condition:
+                self.num_written += 1
+                self.bytes_written += bytes_written or 0
+
+    def stop(self):
+        """Runs all queued tasks and stops the thread. Blocks until it is done."""
+        with self._condition:
+            self._should_stop = True
+            self._condition.notify_all()
+        self._thread.join()
+
+    def pop_errors(self) -> T.List[Exception]:
+        with self._condition:
+            errors, self._errors = self._errors, []
+        return errors
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._queue)
+
+    def stats(self) -> T.Dict[str, float]:
+        """Current queue depth, counters, and write throughput since the last call."""
+        now = time.monotonic()
+        with self._condition:
+            bytes_written = self.bytes_written
+            stats = {
+                "queue_depth": len(self._queue),
+                "written": self.num_written,
+                "dropped": self.num_dropped,
+            }
+        last_time, last_bytes = self._last_stats
+        self._last_stats = now, bytes_written
+        elapsed = now - last_time
+        bytes_per_s = (bytes_written - last_bytes) / elapsed if elapsed else 0.0
+        stats["bytes_per_s"] = bytes_per_s
+        return stats
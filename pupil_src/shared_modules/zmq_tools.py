@@ -17,6 +17,7 @@ See the pupil helpers for example scripts that interface remotely:
 https://github.com/pupil-labs/pupil-helpers/tree/master/pupil_remote
 """
 
+import collections
 import logging
 import msgpack as serializer
 import zmq
@@ -26,6 +27,19 @@ from zmq.utils.monitor import recv_monitor_message
 
 assert zmq.__version__ > "15.1"
 
+# Topic of messages that carry several messages, see `Msg_Streamer.send_many()`
+BATCH_TOPIC = "batch."
+
+
+def unroll_batch(frames):
+    """Split a multipart message into the messages it carries.
+
+    Returns the message itself if it is not a batch.
+    """
+    if frames[0] != BATCH_TOPIC.encode():
+        return [frames]
+    return [frames[idx : idx + 2] for idx in range(1, len(frames), 2)]
+
 
 class ZMQ_handler(logging.Handler):
     """
@@ -87,14 +101,17 @@ class Msg_Receiver(ZMQ_Socket):
         else:
             self.socket.connect(url)
 
+        self._topics = set()
         for t in topics:
             self.subscribe(t)
 
     def subscribe(self, topic):
         self.socket.subscribe(topic)
+        self._topics.add(topic)
 
     def unsubscribe(self, topic):
         self.socket.unsubscribe(topic)
+        self._topics.discard(topic)
 
     def recv(self):
         """Recv a message with topic, payload.
@@ -110,6 +127,53 @@ class Msg_Receiver(ZMQ_Socket):
         payload = self.deserialize_payload(*remaining_frames)
         return topic, payload
 
+    def recv_many(self):
+        """Recv a message and return a list of topic, payload tuples.
+
+        Like `recv()`, but unrolls batches sent with `Msg_Streamer.send_many()`.
+        Subscribe to `BATCH_TOPIC` to receive them. Batched messages that do not
+        match any other subscribed topic are skipped.
+        """
+        frames = self.socket.recv_multipart()
+        return [
+            (topic, self.deserialize_payload(*remaining_frames))
+            for topic, remaining_frames in self._unroll(frames)
+        ]
+
+    def recv_batch(self, max_items=None, timeout=0):
+        """Recv all messages that are available immediately.
+
+        Waits up to `timeout` ms for the first message and stops after `max_items`
+        messages. Batches are unrolled like in `recv_many()`.
+
+        Returns a list of topic, payload tuples. Payloads are `Deferred_Payload`s,
+        which are only deserialized when accessed.
+        """
+        messages = []
+        if not self.socket.poll(timeout):
+            return messages
+        while max_items is None or len(messages) < max_items:
+            try:
+                frames = self.socket.recv_multipart(flags=zmq.NOBLOCK)
+            except zmq.Again:
+                break
+            messages.extend(
+                (topic, Deferred_Payload(topic, frames, self.deserialize_payload))
+                for topic, frames in self._unroll(frames)
+            )
+        return messages
+
+    def _unroll(self, frames):
+        is_batch = frames[0] == BATCH_TOPIC.encode()
+        # pair sockets do not filter by topic
+        topics = getattr(self, "_topics", ("",))
+        topics = tuple(t for t in topics if t != BATCH_TOPIC)
+        for topic, *remaining_frames in unroll_batch(frames):
+            topic = topic.decode("utf-8")
+            if is_batch and not topic.startswith(topics):
+                continue
+            yield topic, remaining_frames
+
     def recv_topic(self):
         return self.socket.recv_string()
 
@@ -128,6 +192,59 @@ class Msg_Receiver(ZMQ_Socket):
         return self.socket.get(zmq.EVENTS) & zmq.POLLIN
 
 
+class Deferred_Payload(object):
+    """Received payload that is deserialized on first access.
+
+    Reading `serialized` or forwarding it with `Msg_Streamer.send()` does not
+    deserialize it. `deserialize()` returns the payload dict like `recv()`.
+    """
+
+    __slots__ = ("topic", "_frames", "_deserialize", "_data")
+
+    def __init__(self, topic, frames, deserialize):
+        self.topic = topic
+        self._frames = frames
+        self._deserialize = deserialize
+        self._data = None
+
+    def deserialize(self):
+        if self._data is None:
+            self._data = self._deserialize(*self._frames)
+        return self._data
+
+    @property
+    def serialized(self):
+        return self._frames[0]
+
+    @property
+    def frames(self):
+        return self._frames
+
+    def __getitem__(self, key):
+        return self.deserialize()[key]
+
+    def get(self, key, default=None):
+        return self.deserialize().get(key, default)
+
+    def __contains__(self, key):
+        return key in self.deserialize()
+
+    def __iter__(self):
+        return iter(self.deserialize())
+
+    def keys(self):
+        return self.deserialize().keys()
+
+    def values(self):
+        return self.deserialize().values()
+
+    def items(self):
+        return self.deserialize().items()
+
+    def __repr__(self):
+        return "Deferred_Payload({})".format(repr(self.deserialize()))
+
+
 class Msg_Streamer(ZMQ_Socket):
     """
     Send messages on fast and efficient but without garatees.
@@ -141,7 +258,7 @@ class Msg_Streamer(ZMQ_Socket):
 
         self.socket.connect(url)
 
-    def send(self, payload, deprecated=()):
+    def send(self, payload, deprecated=(), copy=True, owner=None):
         """Send a message with topic, payload
 `
         Topic is a unicode string. It will be sent as utf-8 encoded byte array.
@@ -152,8 +269,19 @@ class Msg_Streamer(ZMQ_Socket):
         everything else need to be serializable
         the contents of the iterable in '__raw_data__'
         require exposing the pyhton memoryview interface.
+
+        With `copy=False` the raw contents are sent without copying them. They and
+        their `owner`, e.g. the frame that owns pooled image buffers, are kept alive
+        until ZMQ has sent them. Do not modify the raw contents after sending.
+        Returns a `zmq.MessageTracker` of the raw contents in this case.
+
+        `Deferred_Payload`s are forwarded without serializing them again.
         """
         assert deprecated is (), "Depracted use of send()"
+        if isinstance(payload, Deferred_Payload):
+            # forward as received
+            self.socket.send_multipart([payload.topic.encode(), *payload.frames])
+            return
         assert "topic" in payload, "`topic` field required in {}".format(payload)
 
         if "__raw_data__" not in payload:
@@ -168,10 +296,76 @@ class Msg_Streamer(ZMQ_Socket):
             self.socket.send_string(payload["topic"], flags=zmq.SNDMORE)
             serialized_payload = serializer.packb(payload, use_bin_type=True)
             self.socket.send(serialized_payload, flags=zmq.SNDMORE)
+            if not copy:
+                return self._send_without_copy(extra_frames, owner)
             for frame in extra_frames[:-1]:
                 self.socket.send(frame, flags=zmq.SNDMORE, copy=True)
             self.socket.send(extra_frames[-1], copy=True)
 
+    def send_many(self, payloads):
+        """Send several messages with a single multipart message.
+
+        Serializes all payloads like `send()` and sends them as one message with
+        topic `BATCH_TOPIC`, followed by a topic and a payload frame per message.
+        This saves a send call per message on busy loops. Subscribers need to
+        subscribe to `BATCH_TOPIC` and use `Msg_Receiver.recv_many()`. Messages
+        pushed to the IPC backbone are unrolled before publishing, so that all
+        subscribers receive them as if sent with `send()`.
+
+        Payloads with '__raw_data__' are sent with `send()`, in order.
+        `Deferred_Payload`s are forwarded without serializing them again.
+        """
+        frames = [BATCH_TOPIC.encode()]
+        for payload in payloads:
+            if isinstance(payload, Deferred_Payload) and len(payload.frames) == 1:
+                frames.append(payload.topic.encode())
+                frames.append(payload.serialized)
+                continue
+            if isinstance(payload, Deferred_Payload) or "__raw_data__" in payload:
+                self._send_batch(frames)
+                frames = [BATCH_TOPIC.encode()]
+                self.send(payload)
+                continue
+            assert "topic" in payload, "`topic` field required in {}".format(payload)
+            # serialize first, like in send()
+            serialized_payload = serializer.packb(payload, use_bin_type=True)
+            frames.append(payload["topic"].encode())
+            frames.append(serialized_payload)
+        self._send_batch(frames)
+
+    def _send_batch(self, frames):
+        if len(frames) == 3:
+            # not worth unrolling
+            self.socket.send_multipart(frames[1:])
+        elif len(frames) > 3:
+            self.socket.send_multipart(frames)
+
+    def _send_without_copy(self, extra_frames, owner):
+        trackers = [
+            self.socket.send(frame, flags=zmq.SNDMORE, copy=False, track=True)
+            for frame in extra_frames[:-1]
+        ]
+        trackers.append(self.socket.send(extra_frames[-1], copy=False, track=True))
+        tracker = zmq.MessageTracker(*trackers)
+
+        # ZMQ references the buffers, but buffers from pools are reused as soon as
+        # their owner is gone
+        try:
+            in_flight = self._in_flight
+        except AttributeError:
+            in_flight = self._in_flight = collections.deque()
+        while in_flight and in_flight[0][0].done:
+            in_flight.popleft()
+        if not tracker.done:
+            in_flight.append((tracker, owner))
+        return tracker
+
+    @property
+    def num_in_flight(self):
+        """Number of zero-copy messages that ZMQ has not sent yet."""
+        in_flight = getattr(self, "_in_flight", ())
+        return sum(not tracker.done for tracker, _ in in_flight)
+
 
 class Msg_Dispatcher(Msg_Streamer):
     """
@@ -238,3 +432,284 @@ class Msg_Pair_Client(Msg_Pair_Base):
             self.socket.disable_monitor()
         else:
             self.socket.connect(url)
+
+
+def _bench_backbone(xsub_port, xpub_port):
+    ctx = zmq.Context()
+    xsub = ctx.socket(zmq.XSUB)
+    xsub.bind(f"tcp://127.0.0.1:{xsub_port}")
+    xpub = ctx.socket(zmq.XPUB)
+    xpub.bind(f"tcp://127.0.0.1:{xpub_port}")
+    zmq.proxy(xsub, xpub)
+
+
+def _bench_subscriber(url, hwm, results):
+    import time
+
+    ctx = zmq.Context()
+    sub = Msg_Receiver(ctx, url, topics=("frame.",), hwm=hwm)
+    results.put("ready")
+    num_received = 0
+    start = None
+    while sub.socket.poll(5000):
+        topic, payload = sub.recv()
+        if topic == "frame.end":
+            break
+        if start is None:
+            start = time.perf_counter()
+        num_received += 1
+    results.put((num_received, time.perf_counter() - start))
+
+
+def bench_frame_publishing(
+    num_frames=300, subscriber_counts=(1, 4), fps=30, hwm=30
+):
+    """Publishes 1080p BGR frames over a local IPC backbone, with and without copy.
+
+    The backbone proxy and the subscribers run in their own processes, like in
+    Capture. Frames are published at `fps`, like by a camera. Reports the CPU time
+    of the publishing process per frame, and how many frames were received, at
+    which rate, by the slowest subscriber.
+    """
+    import multiprocessing as mp
+    import time
+
+    import numpy as np
+
+    mp_context = mp.get_context("spawn")
+    ctx = zmq.Context()
+    ports = []
+    for _ in range(2):
+        probe = ctx.socket(zmq.PUB)
+        ports.append(probe.bind_to_random_port("tcp://127.0.0.1"))
+        probe.close()
+    backbone = mp_context.Process(target=_bench_backbone, args=ports, daemon=True)
+    backbone.start()
+    pub = Msg_Streamer(ctx, f"tcp://127.0.0.1:{ports[0]}", hwm=hwm)
+    # rotating buffers, like frames from a capture
+    images = [np.full((1080, 1920, 3), idx, dtype=np.uint8) for idx in range(4)]
+
+    for num_subscribers in subscriber_counts:
+        for label, copy in (("copy", True), ("zero-copy", False)):
+            results = mp_context.Queue()
+            subscribers = [
+                mp_context.Process(
+                    target=_bench_subscriber,
+                    args=(f"tcp://127.0.0.1:{ports[1]}", hwm, results),
+                )
+                for _ in range(num_subscribers)
+            ]
+            for subscriber in subscribers:
+                subscriber.start()
+            for _ in subscribers:
+                results.get()
+            time.sleep(0.5)  # subscriptions reach the publisher
+
+            cpu_start = time.process_time()
+            start = time.perf_counter()
+            for idx in range(num_frames):
+                delay = start + idx / fps - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                image = images[idx % len(images)]
+                payload = {
+                    "topic": "frame.world",
+                    "width": 1920,
+                    "height": 1080,
+                    "index": idx,
+                    "timestamp": float(idx),
+                    "format": "bgr",
+                    "__raw_data__": [image],
+                }
+                pub.send(payload, copy=copy)
+            cpu_ms = (time.process_time() - cpu_start) / num_frames * 1000
+            for _ in range(3):
+                pub.send({"topic": "frame.end"})
+                time.sleep(0.1)
+
+            received = [results.get() for _ in subscribers]
+            for subscriber in subscribers:
+                subscriber.join()
+            received_fps = min(num / elapsed for num, elapsed in received if num)
+            num_received = min(num for num, _ in received)
+            print(
+                f"{num_subscribers} subscriber(s), {label:9s}:"
+                f" {cpu_ms:5.2f} ms publisher CPU per frame,"
+                f" received {num_received}/{num_frames} at {received_fps:5.1f} fps"
+            )
+    backbone.terminate()
+
+
+def _bench_pull_pub(pull, pub_url):
+    pub = pull.context.socket(zmq.PUB)
+    pub.connect(pub_url)
+    while True:
+        m = pull.recv_multipart()
+        if m[0] == b"stop":
+            break
+        for msg in unroll_batch(m):
+            pub.send_multipart(msg)
+    pub.close()
+
+
+def bench_event_publishing(num_iterations=3000, fps=30, pupil_rate=200, gaze_rate=200):
+    """Pushes world loop events to a local IPC backbone, one by one and batched.
+
+    Every iteration sends the pupil data of two eyes, gaze, surfaces and fixations
+    that accumulate during one world frame. Reports the latency and the CPU time
+    of sending per iteration, and whether a subscriber received all messages.
+    """
+    import statistics
+    import threading
+    import time
+
+    def make_events(idx):
+        ts = idx / fps
+        pupil = [
+            {
+                "topic": f"pupil.{eye_id}.3d",
+                "id": eye_id,
+                "timestamp": ts + n / pupil_rate,
+                "confidence": 0.9,
+                "norm_pos": [0.5, 0.5],
+                "diameter": 40.0,
+                "ellipse": {"center": [96.0, 96.0], "axes": [40.0, 30.0], "angle": 45},
+            }
+            for eye_id in (0, 1)
+            for n in range(pupil_rate // fps)
+        ]
+        gaze = [
+            {
+                "topic": "gaze.3d.01.",
+                "timestamp": ts + n / gaze_rate,
+                "confidence": 0.9,
+                "norm_pos": [0.5, 0.5],
+                "base_data": pupil[n : n + 2],
+            }
+            for n in range(gaze_rate // fps)
+        ]
+        surfaces = [
+            {"topic": "surfaces.screen", "timestamp": ts, "gaze_on_surfaces": []}
+        ]
+        fixations = [{"topic": "fixations", "timestamp": ts, "duration": 200.0}]
+        return {
+            "pupil": pupil,
+            "gaze": gaze,
+            "surfaces": surfaces,
+            "fixations": fixations,
+        }
+
+    events = [make_events(idx) for idx in range(fps)]
+    num_messages = num_iterations * sum(len(data) for data in events[0].values())
+
+    ctx = zmq.Context()
+    sub = ctx.socket(zmq.SUB)
+    sub_url = f"tcp://127.0.0.1:{sub.bind_to_random_port('tcp://127.0.0.1')}"
+    sub.subscribe("")
+    pull = ctx.socket(zmq.PULL)
+    push_url = f"tcp://127.0.0.1:{pull.bind_to_random_port('tcp://127.0.0.1')}"
+    bridge = threading.Thread(target=_bench_pull_pub, args=(pull, sub_url))
+    bridge.start()
+    push = Msg_Dispatcher(ctx, push_url)
+    # the bridge drops messages until it has connected to the subscriber
+    while not sub.poll(100):
+        push.send({"topic": "warmup"})
+    while sub.poll(100):
+        sub.recv_multipart()
+
+    for label, batched in (("single", False), ("batched", True)):
+        latencies = []
+        cpu_start = time.thread_time()
+        for idx in range(num_iterations):
+            start = time.perf_counter()
+            iteration_events = events[idx % fps]
+            if batched:
+                push.send_many(d for data in iteration_events.values() for d in data)
+            else:
+                for data in iteration_events.values():
+                    for d in data:
+                        push.send(d)
+            latencies.append(time.perf_counter() - start)
+        cpu_us = (time.thread_time() - cpu_start) / num_iterations * 1e6
+
+        num_received = 0
+        while sub.poll(1000):
+            sub.recv_multipart()
+            num_received += 1
+        latencies.sort()
+        print(
+            f"{label:7s}: {statistics.mean(latencies) * 1e6:6.1f} us mean,"
+            f" {latencies[int(len(latencies) * 0.99)] * 1e6:6.1f} us p99 latency,"
+            f" {cpu_us:6.1f} us CPU per iteration,"
+            f" received {num_received}/{num_messages} messages"
+        )
+
+    push.socket.send(b"stop")
+    bridge.join()
+
+
+def bench_batch_receive(num_messages=100_000, batch_size=1000):
+    """Drains pupil data from a synthetic publisher with `recv()` and `recv_batch()`.
+
+    Reports the received messages per second when receiving one by one, when
+    receiving batches and deserializing every payload, and when receiving batches
+    and forwarding the payloads without deserializing them.
+    """
+    import time
+
+    payload = {
+        "topic": "pupil.0.3d",
+        "id": 0,
+        "timestamp": 0.0,
+        "confidence": 0.9,
+        "norm_pos": [0.5, 0.5],
+        "diameter": 40.0,
+        "ellipse": {"center": [96.0, 96.0], "axes": [40.0, 30.0], "angle": 45},
+        "circle_3d": {"center": [0.0, 0.0, 50.0], "normal": [0.0, 0.0, -1.0]},
+    }
+    frames = [b"pupil.0.3d", serializer.packb(payload, use_bin_type=True)]
+
+    ctx = zmq.Context()
+    pub = ctx.socket(zmq.PUB)
+    pub.set_hwm(num_messages)
+    pub_url = f"tcp://127.0.0.1:{pub.bind_to_random_port('tcp://127.0.0.1')}"
+    sink = ctx.socket(zmq.PULL)
+    sink_url = f"tcp://127.0.0.1:{sink.bind_to_random_port('tcp://127.0.0.1')}"
+    forward = Msg_Dispatcher(ctx, sink_url)
+
+    def receive_single(sub):
+        for _ in range(num_messages):
+            topic, datum = sub.recv()
+
+    def receive_batches(sub):
+        num_received = 0
+        while num_received < num_messages:
+            for topic, datum in sub.recv_batch(batch_size, timeout=1000):
+                datum.deserialize()
+                num_received += 1
+
+    def forward_batches(sub):
+        num_received = 0
+        while num_received < num_messages:
+            batch = sub.recv_batch(batch_size, timeout=1000)
+            forward.send_many(datum for topic, datum in batch)
+            num_received += len(batch)
+
+    for label, receive in (
+        ("recv()", receive_single),
+        ("recv_batch() + deserialize", receive_batches),
+        ("recv_batch() + forward", forward_batches),
+    ):
+        sub = Msg_Receiver(ctx, pub_url, topics=("pupil",), hwm=num_messages)
+        time.sleep(0.5)  # subscription reaches the publisher
+        for _ in range(num_messages):
+            pub.send_multipart(frames)
+        time.sleep(1.0)  # messages are queued at the subscriber
+
+        start = time.perf_counter()
+        receive(sub)
+        elapsed = time.perf_counter() - start
+        print(f"{label:26s}: {num_messages / elapsed:9.0f} messages/s")
+        while sink.poll(100):
+            sink.recv_multipart()
+        sub.socket.close(linger=0)
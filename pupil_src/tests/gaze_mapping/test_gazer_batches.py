@@ -0,0 +1,125 @@
+"""
+(*)~---------------------------------------------------------------------------
+Pupil - eye tracking platform
+Copyright (C) 2012-2020 Pupil Labs
+
+Distributed under the terms of the GNU
+Lesser General Public License (LGPL v3.0).
+See COPYING and COPYING.LESSER for license details.
+---------------------------------------------------------------------------~(*)
+"""
+import types
+
+import numpy as np
+import pytest
+
+from camera_models import Dummy_Camera
+from gaze_mapping import Gazer2D, Gazer3D
+
+RESOLUTION = (1280, 720)
+
+
+def _eye_camera_to_world(x):
+    matrix = np.diag([-1.0, 1.0, -1.0, 1.0])
+    matrix[:3, 3] = x, 15.0, -20.0
+    return matrix.tolist()
+
+
+def _model_2d(rng, num_features):
+    return {
+        "coef_": rng.normal(scale=0.1, size=(2, num_features)).tolist(),
+        "intercept_": [0.5, 0.5],
+    }
+
+
+@pytest.fixture
+def g_pool():
+    return types.SimpleNamespace(
+        capture=types.SimpleNamespace(
+            frame_size=RESOLUTION, intrinsics=Dummy_Camera(RESOLUTION, "test")
+        )
+    )
+
+
+@pytest.fixture
+def pupil_data():
+    rng = np.random.default_rng(0)
+    data = []
+    for idx in range(300):
+        for eye_id in (0, 1):
+            normal = rng.normal(scale=0.2, size=3) + (0.0, 0.0, -1.0)
+            data.append(
+                {
+                    "topic": f"pupil.{eye_id}",
+                    "id": eye_id,
+                    "timestamp": (idx + 0.3 * eye_id) / 200,
+                    "confidence": 0.5 if idx % 7 == 0 else 0.95,
+                    "norm_pos": rng.uniform(size=2).tolist(),
+                    "sphere": {"center": [0.0, 0.0, 35.0]},
+                    "circle_3d": {"normal": (normal / np.linalg.norm(normal)).tolist()},
+                }
+            )
+    return data
+
+
+def _params(gazer_class):
+    if gazer_class is Gazer2D:
+        rng = np.random.default_rng(1)
+        return {
+            "left_model": _model_2d(rng, 6),
+            "right_model": _model_2d(rng, 6),
+            "binocular_model": _model_2d(rng, 12),
+        }
+    return {
+        "left_model": {
+            "eye_camera_to_world_matrix": _eye_camera_to_world(-30.0),
+            "gaze_distance": 500.0,
+        },
+        "right_model": {
+            "eye_camera_to_world_matrix": _eye_camera_to_world(30.0),
+            "gaze_distance": 500.0,
+        },
+        "binocular_model": {
+            "eye_camera_to_world_matrix0": _eye_camera_to_world(30.0),
+            "eye_camera_to_world_matrix1": _eye_camera_to_world(-30.0),
+        },
+    }
+
+
+@pytest.mark.parametrize("gazer_class, method", [(Gazer2D, "2d"), (Gazer3D, "3d")])
+def test_batched_mapping_equals_mapping_one_by_one(
+    g_pool, pupil_data, gazer_class, method
+):
+    for datum in pupil_data:
+        datum["method"] = method
+
+    gazer = gazer_class(g_pool, params=_params(gazer_class))
+    expected = [
+        gaze
+        for datum in pupil_data
+        for gaze in gazer.map_pupil_to_gaze([datum], sort_by_creation_time=False)
+    ]
+    gazer = gazer_class(g_pool, params=_params(gazer_class))
+    batched = [
+        gaze
+        for idx in range(0, len(pupil_data), 64)
+        for gaze in gazer.map_pupil_to_gaze(
+            pupil_data[idx : idx + 64], sort_by_creation_time=False
+        )
+    ]
+
+    assert {g["topic"] for g in expected} == {
+        f"gaze.{method}.01.",
+        f"gaze.{method}.0.",
+        f"gaze.{method}.1.",
+    }
+    assert len(batched) == len(expected)
+    for gaze, expected_gaze in zip(batched, expected):
+        assert gaze["topic"] == expected_gaze["topic"]
+        assert gaze["timestamp"] == expected_gaze["timestamp"]
+        assert gaze["base_data"] == expected_gaze["base_data"]
+        np.testing.assert_allclose(gaze["norm_pos"], expected_gaze["norm_pos"])
+        if method == "3d":
+            np.testing.assert_allclose(
+                gaze["gaze_point_3d"], expected_gaze["gaze_point_3d"]
+            )
@@ -0,0 +1,281 @@
+"""
+(*)~---------------------------------------------------------------------------
+Pupil - eye tracking platform
+Copyright (C) 2012-2020 Pupil Labs
+
+Distributed under the terms of the GNU
+Lesser General Public License (LGPL v3.0).
+See COPYING and COPYING.LESSER for license details.
+---------------------------------------------------------------------------~(*)
+"""
+import os
+
+import numpy as np
+
+import file_methods as fm
+
+
+def _pupil_datum(timestamp, eye_id=0, **kwargs):
+    datum = {
+        "topic": f"pupil.{eye_id}.3d",
+        "timestamp": timestamp,
+        "confidence": 0.9,
+        "norm_pos": (0.25, 0.75),
+        "diameter": 40.0,
+        "diameter_3d": 4.0,
+        "model_id": 3,
+        "model_confidence": 1.0,
+        "id": eye_id,
+        "method": "3d c++",
+    }
+    datum.update(kwargs)
+    return datum
+
+
+def test_pldata_writer_creates_columns(tmpdir):
+    data = [_pupil_datum(ts, eye_id=ts % 2) for ts in range(10)]
+    data.append({"topic": "notify.test", "timestamp": 10.0, "subject": "test"})
+    with fm.PLData_Writer(tmpdir, "pupil") as writer:
+        writer.extend(data)
+
+    # non-pupil datum at the end is not covered by the columns
+    assert fm.load_pldata_columns(tmpdir, "pupil") is None
+
+    with fm.PLData_Writer(tmpdir, "pupil") as writer:
+        writer.extend(data[:-1])
+
+    columns = fm.load_pldata_columns(tmpdir, "pupil")
+    pldata = fm.load_pldata_file(tmpdir, "pupil")
+    assert len(columns) == len(pldata.data) == 10
+    assert np.array_equal(columns["index"], np.arange(10))
+    assert np.array_equal(columns["timestamp"], pldata.timestamps)
+    assert np.array_equal(columns["id"], [d["id"] for d in pldata.data])
+    assert np.allclose(columns["norm_pos"], [d["norm_pos"] for d in pldata.data])
+
+
+def test_pldata_columns_missing_values(tmpdir):
+    with fm.PLData_Writer(tmpdir, "pupil") as writer:
+        writer.append(_pupil_datum(0.0, diameter_3d=None))
+        datum = _pupil_datum(1.0)
+        del datum["model_id"]
+        writer.append_serialized(1.0, datum["topic"], fm.msgpack.packb(datum))
+
+    columns = fm.load_pldata_columns(tmpdir, "pupil")
+    assert np.isnan(columns["diameter_3d"][0])
+    assert columns["diameter_3d"][1] == 4.0
+    assert list(columns["model_id"]) == [3, -1]
+
+
+def test_build_pldata_columns(tmpdir):
+    with fm.PLData_Writer(tmpdir, "gaze") as writer:
+        for ts in range(5):
+            writer.append(
+                {"topic": "gaze.3d.0.", "timestamp": ts, "norm_pos": (ts, ts)}
+            )
+    columns_path = os.path.join(tmpdir, "gaze" + fm.PLDATA_COLUMNS_SUFFIX)
+    expected = fm.load_pldata_columns(tmpdir, "gaze")
+    os.remove(columns_path)
+    assert fm.load_pldata_columns(tmpdir, "gaze") is None
+
+    fm.build_pldata_columns(tmpdir, "gaze")
+    actual = fm.load_pldata_columns(tmpdir, "gaze")
+    assert actual.dtype == expected.dtype
+    assert np.array_equal(actual["timestamp"], expected["timestamp"])
+    assert np.array_equal(actual["norm_pos"], expected["norm_pos"])
+    assert np.isnan(actual["gaze_point_3d"]).all()
+
+
+def test_outdated_pldata_columns_are_ignored(tmpdir):
+    with fm.PLData_Writer(tmpdir, "pupil") as writer:
+        writer.append(_pupil_datum(0.0))
+    columns_path = os.path.join(tmpdir, "pupil" + fm.PLDATA_COLUMNS_SUFFIX)
+    pldata_path = os.path.join(tmpdir, "pupil.pldata")
+    mtime = os.path.getmtime(pldata_path)
+    os.utime(columns_path, (mtime - 10, mtime - 10))
+    assert fm.load_pldata_columns(tmpdir, "pupil") is None
+
+
+def test_pldata_index_and_lazy_loading(tmpdir):
+    data = [_pupil_datum(float(ts)) for ts in range(20)]
+    with fm.PLData_Writer(tmpdir, "pupil") as writer:
+        writer.extend(data)
+
+    index_path = os.path.join(tmpdir, "pupil" + fm.PLDATA_INDEX_SUFFIX)
+    written_index = np.fromfile(index_path, dtype=fm.PLDATA_INDEX_DTYPE)
+    os.remove(index_path)
+    # recordings without index build it on first load
+    assert np.array_equal(fm.load_pldata_index(tmpdir, "pupil"), written_index)
+    assert os.path.exists(index_path)
+
+    eager = fm.load_pldata_file(tmpdir, "pupil")
+    lazy = fm.load_pldata_file_lazy(tmpdir, "pupil")
+    assert len(lazy.data) == len(eager.data)
+    assert list(lazy.topics) == list(eager.topics)
+    assert np.array_equal(lazy.timestamps, eager.timestamps)
+    assert lazy.data[3]["timestamp"] == 3.0
+    assert [d["timestamp"] for d in lazy.data[5:8]] == [5.0, 6.0, 7.0]
+    subset = lazy.data.subset([10, 2])
+    assert [d["timestamp"] for d in subset] == [10.0, 2.0]
+
+
+def test_lazy_loading_missing_file(tmpdir):
+    pldata = fm.load_pldata_file_lazy(tmpdir, "pupil")
+    assert len(pldata.data) == len(pldata.timestamps) == len(pldata.topics) == 0
+
+
+def test_pldata_writer_flushes_timestamps_in_chunks(tmpdir):
+    writer = fm.PLData_Writer(tmpdir, "pupil", chunk_size=4, flush_interval_s=60)
+    writer.extend(_pupil_datum(float(ts)) for ts in range(10))
+    ts_raw_path = os.path.join(tmpdir, "pupil" + fm.PLDATA_TIMESTAMPS_RAW_SUFFIX)
+    flushed = np.fromfile(ts_raw_path, dtype=fm.PLDATA_TIMESTAMPS_RAW_DTYPE)
+    assert list(flushed) == list(range(8))
+
+    writer.close()
+    assert not os.path.exists(ts_raw_path)
+    assert list(fm.load_pldata_file(tmpdir, "pupil").timestamps) == list(range(10))
+    assert not fm.recover_pldata_timestamps(tmpdir, "pupil")
+
+
+def test_recover_pldata_timestamps(tmpdir):
+    writer = fm.PLData_Writer(tmpdir, "pupil", chunk_size=4, flush_interval_s=60)
+    writer.extend(_pupil_datum(float(ts)) for ts in range(10))
+    writer.flush()
+    # simulate crash while writing the next datum
+    writer.file_handle.write(fm.msgpack.packb(("pupil.0.3d", b"incomplete"))[:-3])
+    writer.file_handle.flush()
+
+    assert fm.recover_pldata_timestamps(tmpdir, "pupil")
+    ts_raw_path = os.path.join(tmpdir, "pupil" + fm.PLDATA_TIMESTAMPS_RAW_SUFFIX)
+    assert not os.path.exists(ts_raw_path)
+    pldata = fm.load_pldata_file(tmpdir, "pupil")
+    assert list(pldata.timestamps) == list(range(10))
+    assert len(pldata.data) == 10
+    assert len(fm.load_pldata_index(tmpdir, "pupil")) == 10
+    assert not fm.recover_pldata_timestamps(tmpdir, "pupil")
+
+
+def test_recover_pldata_timestamps_with_garbage_tail(tmpdir):
+    for tail in (bytes(4096), b"\xc1" * 16, fm.msgpack.packb(("pupil", b"\xc1"))):
+        writer = fm.PLData_Writer(tmpdir, "pupil")
+        writer.extend(_pupil_datum(float(ts)) for ts in range(10))
+        writer.flush()
+        # simulate power loss that leaves garbage at the end of the file
+        writer.file_handle.write(tail)
+        writer.file_handle.flush()
+
+        assert fm.recover_pldata_timestamps(tmpdir, "pupil")
+        assert os.path.getsize(os.path.join(tmpdir, "pupil.pldata")) == writer.offset
+        pldata = fm.load_pldata_file(tmpdir, "pupil")
+        assert list(pldata.timestamps) == list(range(10))
+        assert len(pldata.data) == 10
+        assert len(fm.load_pldata_index(tmpdir, "pupil")) == 10
+        writer.file_handle.close()
+
+
+def test_recover_pldata_timestamps_keeps_data_after_corrupt_data(tmpdir):
+    writer = fm.PLData_Writer(tmpdir, "pupil")
+    writer.extend(_pupil_datum(float(ts)) for ts in range(5))
+    writer.flush()
+    writer.file_handle.write(b"\xc1" * 16 + fm.msgpack.packb(("pupil", b"\xc1")))
+    writer.file_handle.write(bytes(64))
+    writer.extend(_pupil_datum(float(ts)) for ts in range(5, 10))
+    writer.flush()
+
+    assert fm.recover_pldata_timestamps(tmpdir, "pupil")
+    pldata = fm.load_pldata_file(tmpdir, "pupil")
+    assert list(pldata.timestamps) == list(range(10))
+    assert [datum["timestamp"] for datum in pldata.data] == list(range(10))
+    lazy = fm.load_pldata_file_lazy(tmpdir, "pupil")
+    assert [datum["timestamp"] for datum in lazy.data] == list(range(10))
+    writer.file_handle.close()
+
+
+def test_recover_pldata_timestamps_only_after_crash(tmpdir):
+    with fm.PLData_Writer(tmpdir, "pupil") as writer:
+        writer.extend(_pupil_datum(float(ts)) for ts in range(10))
+    ts_path = os.path.join(tmpdir, "pupil_timestamps.npy")
+    os.remove(ts_path)
+
+    assert not fm.recover_pldata_timestamps(tmpdir, "pupil")
+    assert not os.path.exists(ts_path)
+
+
+def test_recover_pldata_timestamps_on_read_only_media(tmpdir, monkeypatch):
+    writer = fm.PLData_Writer(tmpdir, "pupil")
+    writer.extend(_pupil_datum(float(ts)) for ts in range(10))
+    writer.flush()
+    writer.file_handle.write(bytes(16))
+    writer.file_handle.flush()
+
+    def truncate(path, length):
+        raise PermissionError(f"Read-only file system: '{path}'")
+
+    monkeypatch.setattr(fm.os, "truncate", truncate)
+    assert not fm.recover_pldata_timestamps(tmpdir, "pupil")
+    writer.file_handle.close()
+
+
+def test_merge_pldata_parts(tmpdir):
+    for part_idx in range(3):
+        name = fm.pldata_part_name("pupil", part_idx)
+        with fm.PLData_Writer(tmpdir, name) as writer:
+            first = part_idx * 5
+            writer.extend(_pupil_datum(float(ts)) for ts in range(first, first + 5))
+    with fm.PLData_Writer(tmpdir, "sensor_100") as writer:
+        writer.append(_pupil_datum(0.0))
+    assert fm.find_pldata_parts(tmpdir) == {
+        "pupil": ["pupil.part001", "pupil.part002"]
+    }
+
+    fm.merge_pldata_parts(tmpdir, "pupil", ["pupil.part001", "pupil.part002"])
+    assert fm.find_pldata_parts(tmpdir) == {}
+    pldata = fm.load_pldata_file(tmpdir, "pupil")
+    assert list(pldata.timestamps) == list(range(15))
+    assert [datum["timestamp"] for datum in pldata.data] == list(range(15))
+    lazy = fm.load_pldata_file_lazy(tmpdir, "pupil")
+    assert [datum["timestamp"] for datum in lazy.data] == list(range(15))
+
+
+def test_merge_pldata_parts_merged_before_crash(tmpdir):
+    with fm.PLData_Writer(tmpdir, "pupil") as writer:
+        writer.extend(_pupil_datum(float(ts)) for ts in range(5))
+    with fm.PLData_Writer(tmpdir, "pupil.part001") as writer:
+        writer.extend(_pupil_datum(float(ts)) for ts in range(5, 10))
+    fm.merge_pldata_parts(tmpdir, "pupil", ["pupil.part001"])
+    # crash before the part was removed
+    with fm.PLData_Writer(tmpdir, "pupil.part001") as writer:
+        writer.extend(_pupil_datum(float(ts)) for ts in range(5, 10))
+
+    fm.merge_pldata_parts(tmpdir, "pupil", ["pupil.part001"])
+    assert list(fm.load_pldata_file(tmpdir, "pupil").timestamps) == list(range(10))
+    assert not os.path.exists(os.path.join(tmpdir, "pupil.part001.pldata"))
+
+
+def test_deserialization_cache_evicts_least_recently_used():
+    data = [fm.Serialized_Dict(python_dict={"idx": idx}) for idx in range(4)]
+    size = len(data[0].serialized)
+    with fm.Serialized_Dict.cache_scope("test lru", max_bytes=3 * size) as cache:
+        cache.clear()
+        for datum in data[:3]:
+            datum["idx"]
+        data[0]["idx"]  # most recently used now
+        data[3]["idx"]  # evicts data[1]
+        assert data[0]._data is not None
+        assert data[1]._data is None
+        assert data[1]["idx"] == 1  # purged entries stay usable
+        stats = cache.stats()
+    assert stats["entries"] == 3
+    assert stats["bytes"] == 3 * size
+    assert stats["evictions"] == 2
+    assert stats["hits"] == 1
+
+
+def test_deserialization_cache_scopes_are_isolated():
+    datum = fm.Serialized_Dict(python_dict={"idx": 0})
+    with fm.Serialized_Dict.cache_scope("test outer", max_bytes=0) as outer:
+        with fm.Serialized_Dict.cache_scope("test inner") as inner:
+            datum["idx"]
+        assert inner.stats()["entries"] == 1
+        assert outer.stats()["entries"] == 0
+    names = [stats["name"] for stats in fm.Serialized_Dict.cache_stats()]
+    assert "test outer" in names and "test inner" in names
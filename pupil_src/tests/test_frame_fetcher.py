@@ -0,0 +1,53 @@
+"""
+(*)~---------------------------------------------------------------------------
+Pupil - eye tracking platform
+Copyright (C) 2012-2020 Pupil Labs
+
+Distributed under the terms of the GNU
+Lesser General Public License (LGPL v3.0).
+See COPYING and COPYING.LESSER for license details.
+---------------------------------------------------------------------------~(*)
+"""
+
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from video_capture.file_backend import File_Source, _bench_write_h264_video
+from video_overlay.workers.frame_fetcher import FrameFetcher
+
+
+@pytest.fixture
+def eye_video(tmp_path):
+    return _bench_write_h264_video(
+        str(tmp_path),
+        name="eye0",
+        num_frames=120,
+        gop_size=50,
+        rate_hz=200,
+        size=(64, 48),
+    )
+
+
+@pytest.fixture
+def expected_gray(eye_video):
+    src = File_Source(SimpleNamespace(), source_path=eye_video, timing=None)
+    return [src.get_frame().gray.copy() for _ in range(120)]
+
+
+def test_decodes_ahead_while_requests_are_monotonic(
+    monkeypatch, eye_video, expected_gray
+):
+    monkeypatch.setattr(FrameFetcher, "DECODE_AHEAD", True)
+    fetcher = FrameFetcher(eye_video)
+    world_ts = np.arange(0, 0.6, 1 / 30)
+    for ts in world_ts:
+        frame = fetcher.closest_frame_to_ts(ts)
+        assert np.array_equal(frame.gray, expected_gray[int(round(ts * 200))])
+    assert fetcher.source.buffering
+
+    frame = fetcher.frame_for_idx(3)
+    assert not fetcher.source.buffering
+    assert np.array_equal(frame.gray, expected_gray[3])
+    fetcher.source.cleanup()
@@ -0,0 +1,187 @@
+"""
+(*)~---------------------------------------------------------------------------
+Pupil - eye tracking platform
+Copyright (C) 2012-2020 Pupil Labs
+
+Distributed under the terms of the GNU
+Lesser General Public License (LGPL v3.0).
+See COPYING and COPYING.LESSER for license details.
+---------------------------------------------------------------------------~(*)
+"""
+
+import threading
+import time
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from frame_server import (
+    DEFAULT_RING_BYTES,
+    Frame_Consumer,
+    Frame_Server,
+    Frame_Server_Error,
+    _Frame_Ring,
+)
+from video_capture.file_backend import File_Source, _bench_write_h264_video
+
+
+@pytest.fixture
+def h264_data(tmp_path):
+    return _bench_write_h264_video(
+        str(tmp_path), num_frames=60, gop_size=25, size=(64, 48)
+    )
+
+
+@pytest.fixture
+def frame_server(h264_data):
+    server = Frame_Server(h264_data, (64, 48), 60, num_slots=4)
+    yield server
+    server.shutdown()
+
+
+@pytest.fixture
+def expected_gray(h264_data):
+    src = File_Source(SimpleNamespace(), source_path=h264_data, timing=None)
+    return [src.get_frame().gray.copy() for _ in range(60)]
+
+
+def _consume(handle, received, delay_every=0):
+    for frame in Frame_Consumer(handle):
+        received.append((frame.index, frame.gray.copy()))
+        if delay_every and frame.index % delay_every == 0:
+            threading.Event().wait(0.01)
+
+
+def test_consumers_share_one_decoding_pass(frame_server, expected_gray):
+    handles = [frame_server.register_consumer() for _ in range(3)]
+    received = [[] for _ in handles]
+    threads = [
+        threading.Thread(target=_consume, args=(handle, frames, delay_every))
+        for handle, frames, delay_every in zip(handles, received, (0, 7, 13))
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=30)
+
+    for frames in received:
+        assert [index for index, _ in frames] == list(range(60))
+        for index, gray in frames:
+            assert np.array_equal(gray, expected_gray[index])
+    # 3 consumers, but every frame was decoded once
+    assert frame_server._ring.header["frames_written"] == 60
+
+
+def test_consumer_frame_index_range(frame_server, expected_gray):
+    received = []
+    _consume(frame_server.register_consumer(frame_index_range=(10, 19)), received)
+    assert [index for index, _ in received] == list(range(10, 20))
+    assert np.array_equal(received[0][1], expected_gray[10])
+
+
+def test_late_consumer_joins_the_running_pass(frame_server):
+    early = Frame_Consumer(frame_server.register_consumer())
+    frames = iter(early)
+    for _ in range(30):
+        next(frames)
+
+    late = []
+    thread = threading.Thread(
+        target=_consume, args=(frame_server.register_consumer(), late)
+    )
+    thread.start()
+    for _ in frames:
+        pass
+    thread.join(timeout=30)
+
+    late_indices = [index for index, _ in late]
+    assert sorted(late_indices) == list(range(60))
+    assert late_indices[0] != 0
+
+    in_order = []
+    _consume(frame_server.register_consumer(from_start=True), in_order)
+    assert [index for index, _ in in_order] == list(range(60))
+
+
+
+def test_consumer_from_start_does_not_wait_for_the_running_pass(frame_server):
+    running = iter(Frame_Consumer(frame_server.register_consumer()))
+    next(running)
+    # it would only get frames after the pass, it should decode on its own instead
+    assert frame_server.register_consumer(from_start=True) is None
+    running.close()
+
+def test_released_consumer_does_not_block_the_server(frame_server):
+    blocked = Frame_Consumer(frame_server.register_consumer())
+    next(iter(blocked))  # holds on to a slot, the ring has 4
+    frame_server.release_consumer(blocked._handle)
+
+    received = []
+    _consume(frame_server.register_consumer(), received)
+    assert len(received) == 60
+
+
+def test_ring_size_is_bounded_by_byte_budget(h264_data):
+    for frame_size in ((1920, 1080), (1280, 720)):
+        server = Frame_Server(h264_data, frame_size, 60)
+        assert _Frame_Ring.size(server.num_slots, *frame_size) < DEFAULT_RING_BYTES
+    assert Frame_Server(h264_data, (64, 48), 60).num_slots == 60
+
+
+def test_ring_is_removed_on_shutdown(frame_server):
+    handle = frame_server.register_consumer()
+    frame_server.shutdown()
+    with pytest.raises(FileNotFoundError):
+        Frame_Consumer(handle)
+
+
+def test_consumer_notices_killed_server(frame_server):
+    blocked = Frame_Consumer(frame_server.register_consumer())
+    frames = iter(blocked)
+    next(frames)
+    frame_server._process.kill()
+
+    start = time.monotonic()
+    with pytest.raises(Frame_Server_Error):
+        for _ in frames:
+            pass
+    assert time.monotonic() - start < 10
+
+
+def test_surface_marker_cache_filler_uses_shared_frames(frame_server, h264_data):
+    import multiprocessing
+
+    from surface_tracker.background_tasks import video_processing_generator
+
+    visited = [None] * 60
+    visited[5] = ["already detected"]
+    seek_idx = multiprocessing.Value("i", -1)
+    results = dict(
+        video_processing_generator(
+            h264_data,
+            lambda frame: frame.gray.mean(),
+            seek_idx,
+            visited,
+            frame_consumer=frame_server.register_consumer(),
+        )
+    )
+    assert sorted(results) == [idx for idx in range(60) if idx != 5]
+    assert frame_server._ring.header["frames_written"] == 60
+
+
+def test_surface_marker_cache_filler_keeps_pending_seek(frame_server, h264_data):
+    import multiprocessing
+
+    from surface_tracker.background_tasks import video_processing_generator
+
+    seek_idx = multiprocessing.Value("i", 30)
+    results = video_processing_generator(
+        h264_data,
+        lambda frame: frame.gray.mean(),
+        seek_idx,
+        [None] * 60,
+        frame_consumer=frame_server.register_consumer(),
+    )
+    assert [frame_idx for frame_idx, _ in results][:3] == [30, 31, 32]
+    assert seek_idx.value == -1
@@ -0,0 +1,218 @@
+"""
+(*)~---------------------------------------------------------------------------
+Pupil - eye tracking platform
+Copyright (C) 2012-2020 Pupil Labs
+
+Distributed under the terms of the GNU
+Lesser General Public License (LGPL v3.0).
+See COPYING and COPYING.LESSER for license details.
+---------------------------------------------------------------------------~(*)
+"""
+import numpy as np
+import pytest
+
+import file_methods as fm
+import player_methods as pm
+
+
+def _pupil_data(num_data):
+    for idx in range(num_data):
+        eye_id = idx % 2
+        yield {
+            "topic": f"pupil.{eye_id}.{'3d' if idx % 3 else '2d'}",
+            "timestamp": float(num_data - idx),
+            "confidence": idx / num_data,
+            "diameter_3d": float(idx),
+            "id": eye_id,
+        }
+
+
+def test_bisector_column_fallback():
+    data = [{"timestamp": ts, "confidence": ts / 10} for ts in (3.0, 1.0, 2.0)]
+    bisector = pm.Bisector(data, [d["timestamp"] for d in data])
+    assert bisector.columns is None
+    assert np.allclose(bisector.column("confidence"), [0.1, 0.2, 0.3])
+    assert np.allclose(bisector.column("confidence", [0, 2]), [0.1, 0.3])
+
+
+def test_pupil_data_bisector_columns(tmpdir):
+    with fm.PLData_Writer(tmpdir, "pupil") as writer:
+        writer.extend(_pupil_data(30))
+
+    pupil_data = pm.PupilDataBisector.load_from_file(tmpdir, "pupil")
+    for key in ((0, "3d"), (1, "2d"), (..., "3d"), (..., ...)):
+        bisector = pupil_data[key]
+        assert bisector.columns is not None
+        assert np.array_equal(bisector.column("timestamp"), bisector.timestamps)
+        expected = [datum["diameter_3d"] for datum in bisector.data]
+        assert np.array_equal(bisector.column("diameter_3d"), expected)
+        expected = [datum["id"] for datum in bisector.data]
+        assert np.array_equal(bisector.column("id"), expected)
+
+
+def test_lazy_pupil_data_bisector(tmpdir):
+    with fm.PLData_Writer(tmpdir, "pupil") as writer:
+        writer.extend(_pupil_data(30))
+
+    eager = pm.PupilDataBisector.load_from_file(tmpdir, "pupil")
+    lazy = pm.PupilDataBisector.load_from_file(tmpdir, "pupil", lazy=True)
+    assert isinstance(lazy[0, "3d"].data, fm.Lazy_PLData_Sequence)
+    for key in ((0, "3d"), (1, "2d"), (..., ...)):
+        assert np.array_equal(lazy[key].timestamps, eager[key].timestamps)
+        assert [d["timestamp"] for d in lazy[key]] == list(eager[key].timestamps)
+
+    window = (5.0, 12.0)
+    expected = [d["timestamp"] for d in eager.by_ts_window(window)]
+    assert [d["timestamp"] for d in lazy.by_ts_window(window)] == expected
+    assert lazy.by_ts(7.0)["timestamp"] == 7.0
+
+
+def _legacy_correlate_data(data, timestamps):
+    # previous pure-Python implementation of pm.correlate_data
+    timestamps = list(timestamps)
+    data_by_frame = [[] for i in timestamps]
+    frame_idx = 0
+    data_index = 0
+    data.sort(key=lambda d: d["timestamp"])
+    while True:
+        try:
+            datum = data[data_index]
+            ts = (timestamps[frame_idx] + timestamps[frame_idx + 1]) / 2.0
+        except IndexError:
+            break
+        if datum["timestamp"] <= ts:
+            data_by_frame[frame_idx].append(datum)
+            data_index += 1
+        else:
+            frame_idx += 1
+    return data_by_frame
+
+
+CORRELATION_CASES = {
+    "regular": ([0.1, 0.4, 0.6, 1.2, 1.9], [0.0, 1.0, 2.0]),
+    # data at frame timestamps, at midpoints, and duplicated
+    "ties": ([0.5, 0.5, 1.0, 1.0, 1.5, 0.0, 2.0], [0.0, 1.0, 2.0]),
+    "out_of_range": ([-5.0, -0.1, 0.2, 2.5, 10.0], [0.0, 1.0, 2.0]),
+    "empty_frames": ([0.1, 0.2, 5.0], [0.0, 1.0, 2.0, 3.0, 4.0, 5.0]),
+    "no_data": ([], [0.0, 1.0, 2.0]),
+    "single_frame": ([0.1, 3.0], [1.0]),
+    "no_frames": ([0.1, 3.0], []),
+}
+
+
+@pytest.mark.parametrize("data_ts, timestamps", CORRELATION_CASES.values())
+def test_correlate_data_matches_legacy(data_ts, timestamps):
+    data = [{"timestamp": ts, "id": idx} for idx, ts in enumerate(data_ts)]
+    expected = _legacy_correlate_data(list(data), timestamps)
+    assert pm.correlate_data(data, timestamps) == expected
+
+
+@pytest.mark.parametrize("data_ts, timestamps", CORRELATION_CASES.values())
+def test_correlate_data_indices_matches_by_ts_window(data_ts, timestamps):
+    offsets, indices = pm.correlate_data_indices(data_ts, timestamps)
+    assert len(offsets) == len(timestamps) + 1
+
+    data = [{"timestamp": ts, "id": idx} for idx, ts in enumerate(data_ts)]
+    order = sorted(range(len(data)), key=lambda idx: data_ts[idx])
+    bisector = pm.Bisector(
+        [data[idx] for idx in order], [data_ts[idx] for idx in order]
+    )
+    frame_idc = pm.correlated_frame_indices(offsets, indices)
+    for frame_idx in range(len(timestamps)):
+        window = pm.enclosing_window(timestamps, frame_idx)
+        expected = [datum["id"] for datum in bisector.by_ts_window(window)]
+        correlated = indices[offsets[frame_idx] : offsets[frame_idx + 1]]
+        assert list(correlated) == expected
+        assert all(frame_idc[idx] == frame_idx for idx in correlated)
+
+
+def test_merge_sorted_timestamps_is_stable():
+    runs = [np.array([0.0, 1.0, 1.0, 3.0]), np.array([]), np.array([1.0, 2.0, 4.0])]
+    runs.append(np.array([-1.0, 1.0]))
+    merged_ts, order = pm.merge_sorted_timestamps(runs)
+    concatenated = np.concatenate(runs)
+    expected_order = np.argsort(concatenated, kind="stable")
+    assert list(order) == list(expected_order)
+    assert list(merged_ts) == list(concatenated[expected_order])
+
+
+def test_pupil_data_bisector_window_is_merged_slice():
+    data = list(_pupil_data(100))
+    pldata = fm.PLData(
+        data, [d["timestamp"] for d in data], [d["topic"] for d in data]
+    )
+    bisector = pm.PupilDataBisector(pldata)
+    window = bisector.by_ts_window((20.0, 41.0))
+    assert list(window.timestamps) == list(np.arange(20.0, 41.0))
+    assert [d["timestamp"] for d in window] == list(np.arange(20.0, 41.0))
+    assert bisector[..., ...] is bisector[..., ...]
+    eye0 = bisector[0, ...]
+    assert all(d["id"] == 0 for d in eye0)
+    assert np.all(np.diff(eye0.timestamps) > 0)
+
+
+class _Reference_Mutable_Bisector(pm.Bisector):
+    # previous implementation based on np.insert
+    def insert(self, timestamp, datum):
+        insert_idx = np.searchsorted(self.data_ts, timestamp)
+        self.data_ts = np.insert(self.data_ts, insert_idx, timestamp)
+        self.data = np.insert(self.data, insert_idx, datum)
+
+
+def test_mutable_bisector_matches_reference():
+    rng = np.random.default_rng(0)
+    initial_ts = [0.0, 5.0, 10.0]
+    initial = [{"id": f"init{idx}"} for idx in range(3)]
+    bisector = pm.Mutable_Bisector(initial, initial_ts)
+    bisector.BUFFER_SIZE = 4
+    reference = _Reference_Mutable_Bisector(initial, initial_ts)
+
+    windows = [(-1.0, 20.0), (2.0, 5.0), (5.0, 5.5), (11.0, 12.0)]
+    for idx in range(300):
+        ts = float(rng.integers(0, 12))  # many ties
+        bisector.insert(ts, {"id": idx})
+        reference.insert(ts, {"id": idx})
+        if idx % 7 == 0:
+            for window in windows:
+                assert list(bisector.by_ts_window(window)) == list(
+                    reference.by_ts_window(window)
+                )
+            assert bisector.by_ts(ts) == reference.by_ts(ts)
+            assert len(bisector) == len(reference)
+
+    bisector.extend([3.0, 1.0], [{"id": "a"}, {"id": "b"}])
+    reference.insert(3.0, {"id": "a"})
+    reference.insert(1.0, {"id": "b"})
+    with pytest.raises(ValueError):
+        bisector.by_ts(0.5)
+    assert list(bisector) == list(reference)
+    assert list(bisector.timestamps) == list(reference.timestamps)
+    assert len(bisector._runs) == 0
+
+
+def test_empty_mutable_bisector():
+    bisector = pm.Mutable_Bisector()
+    assert not bisector
+    assert len(bisector.by_ts_window((0.0, 1.0))) == 0
+    bisector.insert(0.5, {"id": 0})
+    assert bisector
+    assert list(bisector.by_ts_window((0.0, 1.0))) == [{"id": 0}]
+
+
+def test_group_indices_by_pupil_topic():
+    data = [
+        {"topic": "pupil.0", "method": "3d c++"},
+        {"topic": "pupil.1.2d"},
+        {"topic": "pupil.0.3d"},
+        {"topic": "pupil.0", "method": "2d c++"},
+        {"topic": "pupil.0", "method": "3d c++"},
+    ]
+    pldata = fm.PLData(data, list(range(5)), [d["topic"] for d in data])
+    grouped = pm.PupilDataBisector._group_indices_by_pupil_topic(pldata)
+    assert {topic: list(idc) for topic, idc in grouped.items()} == {
+        "pupil.0.3d": [0, 2, 4],
+        "pupil.0.2d": [3],
+        "pupil.1.2d": [1],
+    }
+    with pytest.raises(ValueError):
+        pm.PupilTopic.create("pupil.2.3d", {})
@@ -0,0 +1,83 @@
+"""
+(*)~---------------------------------------------------------------------------
+Pupil - eye tracking platform
+Copyright (C) 2012-2020 Pupil Labs
+
+Distributed under the terms of the GNU
+Lesser General Public License (LGPL v3.0).
+See COPYING and COPYING.LESSER for license details.
+---------------------------------------------------------------------------~(*)
+"""
+import pytest
+
+import file_methods as fm
+from pldata_loader import Loader_Mode, PLData_Loader, find_pldata_topics
+
+
+@pytest.fixture
+def recording(tmpdir):
+    with fm.PLData_Writer(tmpdir, "notify") as writer:
+        for idx in range(20):
+            writer.append({"topic": f"notify.test.{idx % 3}", "timestamp": idx})
+    with fm.PLData_Writer(tmpdir, "gaze") as writer:
+        for idx in range(5):
+            writer.append({"topic": "gaze.3d.01.", "timestamp": idx, "idx": idx})
+    return str(tmpdir)
+
+
+@pytest.mark.parametrize("mode", list(Loader_Mode))
+def test_loader_matches_load_pldata_file(recording, mode):
+    loader = PLData_Loader(recording, preload_topics=("notify",), mode=mode)
+    try:
+        for topic in find_pldata_topics(recording):
+            expected = fm.load_pldata_file(recording, topic)
+            loaded = loader.load(topic)
+            assert list(loaded.topics) == list(expected.topics)
+            assert list(loaded.timestamps) == list(expected.timestamps)
+            assert [d.serialized for d in loaded.data] == [
+                d.serialized for d in expected.data
+            ]
+        assert loader.submit("notify") is loader.submit("notify")
+        assert len(loader.load("missing").data) == 0
+        assert len(loader.submit_gaze_positions().result()) == 5
+    finally:
+        loader.shutdown()
+
+
+@pytest.mark.parametrize("mode", list(Loader_Mode))
+def test_loader_reloads_invalidated_topic(recording, mode):
+    loader = PLData_Loader(recording, preload_topics=("annotation",), mode=mode)
+    try:
+        assert len(loader.load("annotation").data) == 0
+        assert len(loader.load("annotation", lazy=True).data) == 0
+        with fm.PLData_Writer(recording, "annotation") as writer:
+            for idx in range(3):
+                writer.append({"topic": "annotation", "timestamp": idx, "idx": idx})
+
+        assert len(loader.load("annotation").data) == 0
+        loader.invalidate("annotation")
+        for lazy in (False, True):
+            reloaded = loader.load("annotation", lazy=lazy)
+            assert list(reloaded.timestamps) == [0, 1, 2]
+            assert [d["idx"] for d in reloaded.data] == [0, 1, 2]
+        assert len(loader.load("notify").data) == 20
+    finally:
+        loader.shutdown()
+
+
+@pytest.mark.parametrize("mode", list(Loader_Mode))
+def test_loader_matches_load_pldata_file_for_other_payloads(recording, mode):
+    fm.PLData_Writer(recording, "empty").close()
+    with fm.PLData_Writer(recording, "raw") as writer:
+        # a payload that is not msgpack bin data
+        writer.append_serialized(0.0, "raw", "not bin")
+
+    loader = PLData_Loader(recording, mode=mode)
+    try:
+        assert len(loader.load("empty").data) == 0
+        with pytest.raises(ValueError):
+            fm.load_pldata_file(recording, "raw")
+        with pytest.raises(ValueError):
+            loader.load("raw")
+    finally:
+        loader.shutdown()
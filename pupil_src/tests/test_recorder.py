@@ -0,0 +1,109 @@
+"""
+(*)~---------------------------------------------------------------------------
+Pupil - eye tracking platform
+Copyright (C) 2012-2020 Pupil Labs
+
+Distributed under the terms of the GNU
+Lesser General Public License (LGPL v3.0).
+See COPYING and COPYING.LESSER for license details.
+---------------------------------------------------------------------------~(*)
+"""
+
+import os
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+import file_methods as fm
+import recorder
+from pupil_recording.update import (
+    _merge_all_pldata_parts,
+    _recover_all_pldata_timestamps,
+)
+from video_capture.file_backend import File_Source
+
+NUM_FRAMES = 90
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(recorder, "time", lambda: now[0])
+    monkeypatch.setattr(recorder, "available_gb", lambda path: 100.0)
+    return now
+
+
+@pytest.fixture
+def g_pool(tmp_path):
+    return SimpleNamespace(
+        app="capture",
+        user_dir=str(tmp_path / "capture_settings"),
+        version=SimpleNamespace(vstring="2.0.0"),
+        get_timestamp=lambda: 0.0,
+        ipc_pub=SimpleNamespace(notify=lambda notification: None),
+        capture=SimpleNamespace(
+            jpeg_support=False,
+            _recent_frame=None,
+            intrinsics=SimpleNamespace(save=lambda *args, **kwargs: None),
+        ),
+    )
+
+
+def _record(g_pool, clock, **kwargs):
+    rec = recorder.Recorder(g_pool, session_name="parts", **kwargs)
+    rec.menu = SimpleNamespace(read_only=False)
+    rec.button = SimpleNamespace(status_text="")
+    rec.start()
+    image = np.zeros((48, 64, 3), dtype=np.uint8)
+    for idx in range(NUM_FRAMES):
+        ts = idx / 30
+        frame = SimpleNamespace(
+            timestamp=ts, index=idx, width=64, height=48, yuv_buffer=None, img=image
+        )
+        gaze = [{"topic": "gaze.3d.0.", "timestamp": ts, "idx": idx}]
+        rec.recent_events({"frame": frame, "gaze": gaze})
+        clock[0] += 1.0  # one frame per second, 30 frames per part
+    rec.stop()
+    return rec.rec_path
+
+
+def test_recording_is_split_into_parts(g_pool, clock):
+    rec_dir = _record(g_pool, clock, part_duration_min=0.5)
+
+    for name in ("world", "world_001", "world_002"):
+        assert len(np.load(os.path.join(rec_dir, name + "_timestamps.npy"))) == 30
+    assert not os.path.exists(os.path.join(rec_dir, "world_003.mp4"))
+    assert fm.find_pldata_parts(rec_dir)["gaze"] == ["gaze.part001", "gaze.part002"]
+    assert len(fm.load_pldata_file(rec_dir, "gaze.part001").data) == 30
+
+
+def test_player_joins_recording_parts(g_pool, clock):
+    rec_dir = _record(g_pool, clock, part_duration_min=0.5)
+    _recover_all_pldata_timestamps(rec_dir)
+    _merge_all_pldata_parts(rec_dir)
+
+    gaze = fm.load_pldata_file(rec_dir, "gaze")
+    assert [datum["idx"] for datum in gaze.data] == list(range(NUM_FRAMES))
+    assert np.array_equal(gaze.timestamps, np.arange(NUM_FRAMES) / 30)
+    assert fm.find_pldata_parts(rec_dir) == {}
+
+    source = File_Source(
+        SimpleNamespace(),
+        source_path=os.path.join(rec_dir, "world.mp4"),
+        timing=None,
+        fill_gaps=True,
+    )
+    lookup = source.videoset.lookup
+    assert np.array_equal(lookup.container_idx, np.repeat([0, 1, 2], 30))
+    assert np.array_equal(lookup.container_frame_idx, np.tile(np.arange(30), 3))
+    for idx in (29, 30, 61, 89):
+        source.seek_to_frame(idx)
+        assert source.get_frame().timestamp == pytest.approx(idx / 30)
+    source.cleanup()
+
+
+def test_recording_without_part_limits_is_not_split(g_pool, clock):
+    rec_dir = _record(g_pool, clock)
+    assert len(np.load(os.path.join(rec_dir, "world_timestamps.npy"))) == NUM_FRAMES
+    assert fm.find_pldata_parts(rec_dir) == {}
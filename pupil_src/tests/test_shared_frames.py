@@ -0,0 +1,137 @@
+"""
+(*)~---------------------------------------------------------------------------
+Pupil - eye tracking platform
+Copyright (C) 2012-2020 Pupil Labs
+
+Distributed under the terms of the GNU
+Lesser General Public License (LGPL v3.0).
+See COPYING and COPYING.LESSER for license details.
+---------------------------------------------------------------------------~(*)
+"""
+
+import time
+
+import numpy as np
+import pytest
+import zmq
+
+import shared_frames
+import zmq_tools
+
+pytestmark = pytest.mark.skipif(
+    not shared_frames.is_available(), reason="Shared memory requires Python 3.8"
+)
+
+
+@pytest.fixture
+def ring_and_reader():
+    ring = shared_frames.Shared_Frame_Ring(num_slots=3)
+    reader = shared_frames.Shared_Frame_Reader()
+    yield ring, reader
+    reader.close()
+    ring.close()
+
+
+def test_read_written_frames(ring_and_reader):
+    ring, reader = ring_and_reader
+    image = np.arange(48 * 64 * 3, dtype=np.uint8).reshape(48, 64, 3)
+    jpeg = b"\xff\xd8 jpeg data \xff\xd9"
+
+    image_descriptor = ring.write(image, 7, 1.5, "bgr")
+    jpeg_descriptor = ring.write(jpeg, 8, 1.6, "jpeg")
+
+    header, data = reader.read(image_descriptor)
+    assert header == {"index": 7, "timestamp": 1.5, "format": "bgr"}
+    np.testing.assert_array_equal(data, image)
+    header, data = reader.read(jpeg_descriptor)
+    assert header == {"index": 8, "timestamp": 1.6, "format": "jpeg"}
+    assert data.tobytes() == jpeg
+
+
+def test_overwritten_frames_are_dropped(ring_and_reader):
+    ring, reader = ring_and_reader
+    image = np.zeros((4, 4), dtype=np.uint8)
+    descriptors = [ring.write(image + idx, idx, 0.0, "gray") for idx in range(4)]
+
+    # the ring has three slots
+    assert reader.read(descriptors[0]) is None
+    header, data = reader.read(descriptors[3])
+    assert header["index"] == 3
+    assert (data == 3).all()
+
+
+def test_larger_frames_reallocate_the_ring(ring_and_reader):
+    ring, reader = ring_and_reader
+    small = ring.write(np.zeros((4, 4), dtype=np.uint8), 0, 0.0, "gray")
+    large = ring.write(np.ones((40, 40), dtype=np.uint8), 1, 0.1, "gray")
+
+    assert large["name"] != small["name"]
+    assert reader.read(small) is None
+    header, data = reader.read(large)
+    assert data.shape == (40, 40)
+
+
+@pytest.mark.parametrize(
+    "url, is_local",
+    [
+        ("tcp://127.0.0.1:50020", True),
+        ("tcp://localhost:50020", True),
+        ("ipc:///tmp/pupil", True),
+        ("tcp://192.168.1.20:50020", False),
+    ],
+)
+def test_is_local_url(url, is_local):
+    assert shared_frames._is_local_url(url) == is_local
+
+
+def _wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def test_publisher_copies_frames_only_while_requested():
+    ctx = zmq.Context()
+    sub = ctx.socket(zmq.SUB)
+    url = f"tcp://127.0.0.1:{sub.bind_to_random_port('tcp://127.0.0.1')}"
+    streamer = zmq_tools.Msg_Streamer(ctx, url)
+    publisher = shared_frames.Shared_Frame_Publisher(ctx, url, streamer)
+    reader = shared_frames.Shared_Frame_Reader()
+
+    def send(index):
+        image = np.full((4, 4), index, dtype=np.uint8)
+        payload = {"topic": "frame.world", "index": index, "timestamp": 0.0}
+        publisher.send(dict(payload, format="gray", __raw_data__=[image]))
+
+    try:
+        send(0)
+        assert not publisher._rings
+
+        sub.subscribe("shm.frame.world")
+
+        def received_descriptor():
+            send(1)
+            return sub.poll(10)
+
+        _wait_for(received_descriptor)
+        topic, payload = sub.recv_multipart()
+        assert topic == b"shm.frame.world"
+        descriptor = zmq_tools.serializer.unpackb(payload, raw=False)["shared_memory"]
+        header, data = reader.read(descriptor)
+        assert header["index"] == 1
+        assert (data == 1).all()
+
+        sub.unsubscribe("shm.frame.world")
+
+        def rings_closed():
+            send(2)
+            return not publisher._rings
+
+        _wait_for(rings_closed)
+    finally:
+        reader.close()
+        publisher.cleanup()
+        streamer.socket.close(linger=0)
+        sub.close(linger=0)
+        ctx.term()
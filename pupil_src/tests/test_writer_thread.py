@@ -0,0 +1,100 @@
+"""
+(*)~---------------------------------------------------------------------------
+Pupil - eye tracking platform
+Copyright (C) 2012-2020 Pupil Labs
+
+Distributed under the terms of the GNU
+Lesser General Public License (LGPL v3.0).
+See COPYING and COPYING.LESSER for license details.
+---------------------------------------------------------------------------~(*)
+"""
+import threading
+
+import pytest
+
+from writer_thread import BackpressurePolicy, Writer_Thread
+
+
+def _blocked_writer(policy, max_queue_size=3):
+    """Returns a writer thread that blocks in its first task until released"""
+    release = threading.Event()
+    started = threading.Event()
+    written = []
+
+    def blocking_task():
+        started.set()
+        release.wait()
+        return 0
+
+    def task(item):
+        written.append(item)
+        return 10
+
+    writer = Writer_Thread(max_queue_size=max_queue_size, policy=policy)
+    writer.submit(blocking_task)
+    started.wait()
+    return writer, task, written, release
+
+
+def test_writer_thread_writes_in_order():
+    writer = Writer_Thread()
+    written = []
+    for item in range(100):
+        writer.submit(lambda item: written.append(item) or 1, item)
+    writer.stop()
+    assert written == list(range(100))
+    stats = writer.stats()
+    assert stats["written"] == 100
+    assert stats["dropped"] == stats["queue_depth"] == 0
+
+
+def test_writer_thread_drop_newest():
+    writer, task, written, release = _blocked_writer(BackpressurePolicy.DROP_NEWEST)
+    accepted = [writer.submit(task, item) for item in range(5)]
+    assert accepted == [True, True, True, False, False]
+    # non-droppable tasks are never dropped
+    assert writer.submit(task, "note", droppable=False)
+    release.set()
+    writer.stop()
+    assert written == [0, 1, 2, "note"]
+    assert writer.stats()["dropped"] == 2
+
+
+def test_writer_thread_drop_oldest():
+    writer, task, written, release = _blocked_writer(BackpressurePolicy.DROP_OLDEST)
+    writer.submit(task, "note", droppable=False)
+    for item in range(5):
+        assert writer.submit(task, item)
+    release.set()
+    writer.stop()
+    assert written == ["note", 2, 3, 4]
+    assert writer.stats()["dropped"] == 2
+
+
+def test_writer_thread_block():
+    writer, task, written, release = _blocked_writer(BackpressurePolicy.BLOCK)
+    for item in range(3):
+        writer.submit(task, item)
+    submitter = threading.Thread(target=writer.submit, args=(task, 3))
+    submitter.start()
+    submitter.join(timeout=0.1)
+    assert submitter.is_alive(), "Submitting to a full queue should block"
+    release.set()
+    submitter.join()
+    writer.stop()
+    assert written == [0, 1, 2, 3]
+    assert writer.stats()["bytes_per_s"] > 0
+
+
+def test_writer_thread_errors():
+    def failing_task():
+        raise ValueError("write failed")
+
+    writer = Writer_Thread()
+    writer.submit(failing_task)
+    writer.stop()
+    errors = writer.pop_errors()
+    assert len(errors) == 1 and isinstance(errors[0], ValueError)
+    assert writer.pop_errors() == []
+    with pytest.raises(RuntimeError):
+        writer.submit(failing_task)
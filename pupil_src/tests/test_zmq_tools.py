@@ -0,0 +1,162 @@
+"""
+(*)~---------------------------------------------------------------------------
+Pupil - eye tracking platform
+Copyright (C) 2012-2020 Pupil Labs
+
+Distributed under the terms of the GNU
+Lesser General Public License (LGPL v3.0).
+See COPYING and COPYING.LESSER for license details.
+---------------------------------------------------------------------------~(*)
+"""
+
+import weakref
+
+import msgpack
+import numpy as np
+import pytest
+import zmq
+
+import zmq_tools
+
+
+class _Owner:
+    pass
+
+
+@pytest.fixture
+def sub_and_pub():
+    ctx = zmq.Context()
+    sub = ctx.socket(zmq.SUB)
+    sub.bind("inproc://test_zmq_tools")
+    sub.subscribe("")
+    pub = zmq_tools.Msg_Streamer(ctx, "inproc://test_zmq_tools")
+    # the publisher drops messages until it has processed the subscription
+    while not sub.poll(100):
+        pub.send({"topic": "warmup"})
+    while sub.poll(100):
+        sub.recv_multipart()
+    yield sub, pub
+    pub.socket.close(linger=0)
+    sub.close(linger=0)
+    ctx.term()
+
+
+def test_send_raw_data_without_copy(sub_and_pub):
+    sub, pub = sub_and_pub
+    image = np.arange(48 * 64 * 3, dtype=np.uint8).reshape(48, 64, 3)
+    owner = _Owner()
+    owner_ref = weakref.ref(owner)
+
+    tracker = pub.send(
+        {"topic": "frame.world", "__raw_data__": [image]}, copy=False, owner=owner
+    )
+    del owner
+    assert sub.poll(5000)
+    topic, _, raw = sub.recv_multipart()
+    assert topic == b"frame.world"
+    assert raw == image.tobytes()
+
+    tracker.wait(timeout=5)
+    assert pub.num_in_flight == 0
+    # the owner is released with the next send
+    pub.send({"topic": "frame.world", "__raw_data__": [image]}, copy=False)
+    assert owner_ref() is None
+
+
+def test_unroll_batch():
+    single = [b"pupil.0", b"payload"]
+    assert zmq_tools.unroll_batch(single) == [single]
+    batch = [b"batch.", b"pupil.0", b"payload0", b"gaze", b"payload1"]
+    assert zmq_tools.unroll_batch(batch) == [
+        [b"pupil.0", b"payload0"],
+        [b"gaze", b"payload1"],
+    ]
+
+
+def test_send_many(sub_and_pub):
+    sub, pub = sub_and_pub
+    payloads = [
+        {"topic": "pupil.0", "timestamp": 0.0},
+        {"topic": "gaze.3d.0.", "timestamp": 0.1},
+        {"topic": "pupil.1", "timestamp": 0.2},
+    ]
+
+    pub.send_many(iter(payloads))
+    assert sub.poll(5000)
+    frames = sub.recv_multipart()
+    assert frames[0] == zmq_tools.BATCH_TOPIC.encode()
+    messages = zmq_tools.unroll_batch(frames)
+    assert [topic.decode() for topic, _ in messages] == [
+        payload["topic"] for payload in payloads
+    ]
+    assert [msgpack.unpackb(payload, raw=False) for _, payload in messages] == payloads
+
+
+def test_recv_many_filters_batched_topics():
+    ctx = zmq.Context()
+    pub = ctx.socket(zmq.PUB)
+    pub.bind("inproc://test_recv_many")
+    sub = zmq_tools.Msg_Receiver(
+        ctx,
+        "inproc://test_recv_many",
+        topics=(zmq_tools.BATCH_TOPIC, "pupil."),
+        block_until_connected=False,
+    )
+    payloads = [
+        {"topic": "pupil.0", "timestamp": 0.0},
+        {"topic": "gaze.3d.0.", "timestamp": 0.1},
+        {"topic": "pupil.1", "timestamp": 0.2},
+    ]
+    frames = [zmq_tools.BATCH_TOPIC.encode()]
+    for payload in payloads:
+        frames += [payload["topic"].encode(), msgpack.packb(payload, use_bin_type=True)]
+    # the publisher drops messages until it has processed the subscription
+    while not sub.socket.poll(100):
+        pub.send_multipart(frames)
+    messages = sub.recv_many()
+    assert messages == [
+        ("pupil.0", payloads[0]),
+        ("pupil.1", payloads[2]),
+    ]
+    sub.socket.close(linger=0)
+    pub.close(linger=0)
+    ctx.term()
+
+
+def test_recv_batch_defers_deserialization():
+    ctx = zmq.Context()
+    pub = ctx.socket(zmq.PUB)
+    pub.bind("inproc://test_recv_batch")
+    sub = zmq_tools.Msg_Receiver(
+        ctx,
+        "inproc://test_recv_batch",
+        topics=("pupil.",),
+        block_until_connected=False,
+    )
+    payloads = [
+        {"topic": f"pupil.{idx % 2}", "timestamp": float(idx)} for idx in range(5)
+    ]
+    # the publisher drops messages until it has processed the subscription
+    while not sub.socket.poll(100):
+        pub.send_multipart([b"pupil.warmup", msgpack.packb({})])
+    while sub.socket.poll(100):
+        sub.recv()
+    for payload in payloads:
+        pub.send_multipart(
+            [payload["topic"].encode(), msgpack.packb(payload, use_bin_type=True)]
+        )
+
+    assert sub.socket.poll(5000)
+    messages = sub.recv_batch(max_items=3)
+    assert [topic for topic, _ in messages] == ["pupil.0", "pupil.1", "pupil.0"]
+    assert all(payload._data is None for _, payload in messages)
+    assert messages[1][1]["timestamp"] == 1.0
+    assert messages[1][1].deserialize() == payloads[1]
+    assert msgpack.unpackb(messages[2][1].serialized, raw=False) == payloads[2]
+
+    messages = sub.recv_batch(timeout=1000)
+    assert [payload["timestamp"] for _, payload in messages] == [3.0, 4.0]
+    assert sub.recv_batch() == []
+    sub.socket.close(linger=0)
+    pub.close(linger=0)
+    ctx.term()
@@ -10,6 +10,7 @@ See COPYING and COPYING.LESSER for license details.
 """
 
 import os
+import shutil
 
 broken_data = os.path.join(
     os.path.dirname(
@@ -20,3 +21,15 @@ multiple_data = os.path.join(
 single_data = os.path.join(
     os.path.dirname(
         os.path.abspath(__file__)), 'data/single/eye0.mp4')
+
+
+def copy_data(data_path, tmp_path):
+    """Copies the recording of `data_path` to `tmp_path` and returns the new path.
+
+    Lookup tables and caches are written next to the videos. This keeps them out of
+    the test data.
+    """
+    data_dir = os.path.dirname(data_path)
+    directory = os.path.join(str(tmp_path), os.path.basename(data_dir))
+    shutil.copytree(data_dir, directory)
+    return os.path.join(directory, os.path.basename(data_path))
@@ -13,41 +13,57 @@ import logging
 from multiprocessing import cpu_count
 from types import SimpleNamespace
 
+import cv2
+import numpy as np
 import pytest
 
 import av
-from ..common import broken_data, multiple_data, single_data
+from ..common import broken_data, copy_data, multiple_data, single_data
 from video_capture.base_backend import NoMoreVideoError
-from video_capture.file_backend import Decoder, File_Source, OnDemandDecoder
+from video_capture.file_backend import (
+    BufferedDecoder,
+    Decoded_Frame_Cache,
+    Decoder,
+    File_Source,
+    Frame,
+    Frame_Buffer_Pool,
+    OnDemandDecoder,
+    _bench_write_h264_video,
+)
+from video_capture.utils import VideoSet
 
 
 @pytest.fixture
-def single_fill_gaps():
+def single_fill_gaps(tmp_path):
     """Returns single data"""
-    return File_Source(SimpleNamespace(), source_path=single_data, fill_gaps=True)
+    source_path = copy_data(single_data, tmp_path)
+    return File_Source(SimpleNamespace(), source_path=source_path, fill_gaps=True)
 
 
 @pytest.fixture
-def multiple_fill_gaps():
+def multiple_fill_gaps(tmp_path):
     """Returns multiple data"""
-    return File_Source(SimpleNamespace(), source_path=multiple_data, fill_gaps=True)
+    source_path = copy_data(multiple_data, tmp_path)
+    return File_Source(SimpleNamespace(), source_path=source_path, fill_gaps=True)
 
 
 @pytest.fixture
-def broken_fill_gaps():
+def broken_fill_gaps(tmp_path):
     """Returns broken data"""
-    return File_Source(SimpleNamespace(), source_path=broken_data)
+    source_path = copy_data(broken_data, tmp_path)
+    return File_Source(SimpleNamespace(), source_path=source_path)
 
 
-def test_file_source_recent_events():
+def test_file_source_recent_events(tmp_path):
     """
     recent_events setup correct or not
     """
+    source_path = copy_data(single_data, tmp_path)
     file_source = File_Source(
-        SimpleNamespace(), source_path=single_data, timing="external"
+        SimpleNamespace(), source_path=source_path, timing="external"
     )
     assert file_source.recent_events == file_source.recent_events_external_timing
-    file_source = File_Source(SimpleNamespace(), source_path=single_data, timing=None)
+    file_source = File_Source(SimpleNamespace(), source_path=source_path, timing=None)
     assert file_source.recent_events == file_source.recent_events_own_timing
 
 
@@ -63,3 +79,191 @@ def test_get_rec_set_name(single_fill_gaps):
     assert ("/foo", "eye0_timestamp") == single_fill_gaps.get_rec_set_name(
         "/foo/eye0_timestamp.npy"
     )
+
+
+
+@pytest.fixture
+def h264_data(tmp_path):
+    """Returns synthetic H.264 data with multiple GOPs"""
+    return _bench_write_h264_video(
+        str(tmp_path), num_frames=60, gop_size=25, size=(64, 48)
+    )
+
+
+def test_stepping_backwards_is_served_from_frame_cache(h264_data):
+    uncached = File_Source(
+        SimpleNamespace(), source_path=h264_data, timing=None, frame_cache_bytes=0
+    )
+    expected = []
+    for idx in range(uncached.get_frame_count()):
+        uncached.seek_to_frame(idx)
+        expected.append(uncached.get_frame().gray.copy())
+    assert uncached.frame_cache_stats()["entries"] == 0
+
+    file_source = File_Source(SimpleNamespace(), source_path=h264_data, timing=None)
+    frame_count = file_source.get_frame_count()
+    for idx in range(frame_count):
+        assert np.array_equal(file_source.get_frame().gray, expected[idx])
+    misses = file_source.frame_cache_stats()["misses"]
+
+    for idx in reversed(range(frame_count)):
+        file_source.seek_to_frame(idx)
+        frame = file_source.get_frame()
+        assert frame.index == idx
+        assert np.array_equal(frame.gray, expected[idx])
+    stats = file_source.frame_cache_stats()
+    assert stats["misses"] == misses
+    assert stats["hits"] == frame_count
+
+
+def test_frames_decoded_while_seeking_are_cached(h264_data):
+    file_source = File_Source(SimpleNamespace(), source_path=h264_data, timing=None)
+    file_source.seek_to_frame(40)
+    assert file_source.get_frame().index == 40
+    # decoding started at the keyframe of frame 40
+    for idx in range(25, 41):
+        file_source.seek_to_frame(idx)
+        assert file_source.get_frame().index == idx
+    assert file_source.frame_cache_stats()["misses"] == 1
+
+
+def test_decoded_frame_cache_is_bounded_by_bytes(h264_data):
+    file_source = File_Source(SimpleNamespace(), source_path=h264_data, timing=None)
+    av_frame = file_source.get_frame()._av_frame
+    frame_bytes = sum(plane.buffer_size for plane in av_frame.planes)
+    cache = Decoded_Frame_Cache(max_bytes=2 * frame_bytes)
+    for idx in range(3):
+        cache.put(idx, av_frame)
+    assert 0 not in cache
+    assert cache.get(1) is av_frame
+    cache.put(3, av_frame)
+    assert 1 in cache and 2 not in cache
+    assert cache.stats()["evictions"] == 2
+
+
+def test_keyframe_index_is_persisted_with_lookup(h264_data):
+    file_source = File_Source(SimpleNamespace(), source_path=h264_data, timing=None)
+    assert np.flatnonzero(file_source.videoset.keyframes).tolist() == [0, 25, 50]
+    videoset = VideoSet(*file_source.get_rec_set_name(h264_data), fill_gaps=False)
+    videoset.load_lookup()
+    assert np.array_equal(videoset.keyframes, file_source.videoset.keyframes)
+
+
+def test_seek_cost_chooses_between_decoding_forward_and_seeking(h264_data):
+    file_source = File_Source(
+        SimpleNamespace(), source_path=h264_data, timing=None, frame_cache_bytes=0
+    )
+    file_source.seek_to_frame(20)
+    assert file_source.get_frame().index == 20
+    assert file_source.seek_cost(22) == 2  # decode forward
+    assert file_source.seek_cost(30) == 6  # seek to keyframe 25
+    assert file_source.seek_cost(10) == 11  # seek to keyframe 0
+
+    file_source.seek_to_frame(22)
+    assert file_source.get_frame().index == 22
+    file_source.seek_to_frame(30)
+    frame = file_source.get_frame()
+    assert frame.index == 30
+    assert frame.timestamp == file_source.timestamps[30]
+
+    file_source = File_Source(SimpleNamespace(), source_path=h264_data, timing=None)
+    file_source.seek_to_frame(30)
+    file_source.get_frame()
+    assert file_source.seek_cost(27) == 0  # cached
+
+
+def test_buffered_decoding_matches_on_demand_decoding(h264_data):
+    on_demand = File_Source(
+        SimpleNamespace(), source_path=h264_data, timing=None, frame_cache_bytes=0
+    )
+    buffered = File_Source(
+        SimpleNamespace(),
+        source_path=h264_data,
+        timing=None,
+        buffered_decoding=True,
+        frame_cache_bytes=0,
+    )
+    assert isinstance(buffered.video_stream, BufferedDecoder)
+    for seek_idx in (None, 40, 5, 26):
+        for file_source in (on_demand, buffered):
+            if seek_idx is not None:
+                file_source.seek_to_frame(seek_idx)
+        for _ in range(10):
+            expected = on_demand.get_frame()
+            frame = buffered.get_frame()
+            assert frame.index == expected.index
+            assert np.array_equal(frame.gray, expected.gray)
+
+    # the thread may already have reached the end of the video
+    decoder_thread = buffered.video_stream._thread
+    buffered.cleanup()
+    assert not decoder_thread.is_alive()
+
+
+
+def test_buffered_decoder_raises_errors_of_the_decoding_thread():
+    class Failing_Container:
+        def demux(self, video_stream):
+            raise RuntimeError("demuxing failed")
+            yield
+
+    decoder = BufferedDecoder(Failing_Container(), video_stream=None)
+    with pytest.raises(RuntimeError, match="demuxing failed"):
+        next(decoder.get_frame_iterator())
+    decoder.cleanup()
+
+def _yuv420_frame(width, height):
+    image = np.random.default_rng(0).integers(0, 256, (height, width, 3), np.uint8)
+    image = cv2.GaussianBlur(image, (9, 9), 3)  # smooth chroma
+    av_frame = av.VideoFrame.from_ndarray(image, format="bgr24")
+    return Frame(0.0, av_frame.reformat(format="yuv420p"), 0)
+
+
+def test_gray_is_a_view_on_the_luma_plane():
+    frame = _yuv420_frame(64, 48)
+    luma = frame._av_frame.planes[0]
+    assert luma.line_size == 64
+    assert frame.gray.shape == (48, 64)
+    assert frame.gray.flags.c_contiguous
+    assert np.shares_memory(frame.gray, np.frombuffer(luma, np.uint8))
+
+    # padded lines are copied, such that gray stays contiguous
+    frame = _yuv420_frame(60, 48)
+    assert frame._av_frame.planes[0].line_size > 60
+    padded = np.frombuffer(frame._av_frame.planes[0], np.uint8)
+    padded = padded.reshape(-1, frame._av_frame.planes[0].line_size)
+    assert frame.gray.flags.c_contiguous
+    assert np.array_equal(frame.gray, padded[:48, :60])
+
+
+
+def test_gray_of_other_formats_is_the_first_plane():
+    image = np.random.default_rng(0).integers(0, 256, (48, 60), np.uint8)
+    frame = Frame(0.0, av.VideoFrame.from_ndarray(image, format="gray"), 0)
+    assert np.array_equal(frame.gray, image)
+
+def test_bgr_from_yuv420_matches_libswscale():
+    frame = _yuv420_frame(64, 48)
+    expected = frame._av_frame.reformat(format="bgr24")
+    expected = np.frombuffer(expected.planes[0], np.uint8)
+    expected = expected.reshape(48, -1)[:, : 64 * 3].reshape(48, 64, 3)
+    bgr = frame._bgr_from_yuv420()
+    assert bgr.shape == (48, 64, 3)
+    assert np.abs(bgr.astype(int) - expected).mean() < 2
+
+
+def test_frame_buffer_pool_reuses_unreferenced_buffers_only():
+    pool = Frame_Buffer_Pool(max_buffers_per_shape=2)
+    first = pool.get((4, 4))
+    view = first[:2]
+    del first
+    second = pool.get((4, 4))
+    assert not np.shares_memory(second, view)
+    assert pool.allocations == 2
+    del view
+    assert pool.get((4, 4)) is not second
+    assert pool.allocations == 2
+    del second
+    pool.get((4, 4))
+    # both pooled buffers are free, the oldest one is reused
+    assert pool.allocations == 2
@@ -0,0 +1,143 @@
+"""
+(*)~---------------------------------------------------------------------------
+Pupil - eye tracking platform
+Copyright (C) 2012-2020 Pupil Labs
+
+Distributed under the terms of the GNU
+Lesser General Public License (LGPL v3.0).
+See COPYING and COPYING.LESSER for license details.
+---------------------------------------------------------------------------~(*)
+"""
+
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from video_capture.acquisition import Acquisition_Thread
+
+
+class Fake_Timed_Capture:
+    """Delivers frames with the given timestamps at their time, like a camera.
+
+    Timestamps are relative to the first call of `get_frame()`. Raises TimeoutError
+    like a camera without frames, and `errors[idx]` instead of frame `idx`.
+    """
+
+    def __init__(self, timestamps, errors=None):
+        self.timestamps = list(timestamps)
+        self.errors = dict(errors or {})
+        self.next_idx = 0
+        self.start = None
+
+    def get_frame(self, timeout):
+        if self.start is None:
+            self.start = time.monotonic()
+        if self.next_idx >= len(self.timestamps):
+            time.sleep(timeout)
+            raise TimeoutError
+        idx = self.next_idx
+        ts = self.timestamps[idx]
+        delay = self.start + ts - time.monotonic()
+        if delay > timeout:
+            time.sleep(timeout)
+            raise TimeoutError
+        time.sleep(max(delay, 0))
+        self.next_idx += 1
+        if idx in self.errors:
+            raise self.errors.pop(idx)
+        return SimpleNamespace(timestamp=ts, index=idx)
+
+
+def _wait_for(condition, timeout=5.0):
+    end = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < end, "timed out"
+        time.sleep(0.001)
+
+
+@pytest.fixture
+def acquisition_of():
+    threads = []
+
+    def start(capture, **kwargs):
+        acquisition = Acquisition_Thread(capture.get_frame, **kwargs)
+        acquisition.start()
+        threads.append(acquisition)
+        return acquisition
+
+    yield start
+    for acquisition in threads:
+        acquisition.stop()
+
+
+def test_slow_main_loop_gets_latest_frame(acquisition_of):
+    capture = Fake_Timed_Capture([(idx + 1) / 200 for idx in range(100)])
+    acquisition = acquisition_of(capture, ring_size=4)
+
+    consumed = []
+    while capture.next_idx < 100:
+        frame = acquisition.latest(timeout=0.05)
+        if frame is not None:
+            consumed.append(frame.index)
+        time.sleep(0.03)  # long running plugin, 6 frames at 200 Hz
+    _wait_for(lambda: acquisition.stats()["grabbed"] == 100)
+    consumed.append(acquisition.latest().index)
+
+    assert consumed == sorted(consumed)
+    assert consumed[-1] == 99
+    stats = acquisition.stats()
+    assert stats["consumed"] == len(consumed)
+    dropped = stats["dropped_skipped"] + stats["dropped_overflow"]
+    assert stats["consumed"] + dropped == 100
+    assert stats["dropped_overflow"] > 0
+
+
+def test_burst_is_drained_in_order(acquisition_of):
+    capture = Fake_Timed_Capture([idx / 1000 for idx in range(1, 7)])
+    acquisition = acquisition_of(capture, ring_size=4)
+    _wait_for(lambda: acquisition.stats()["grabbed"] == 6)
+
+    assert [frame.index for frame in acquisition.drain()] == [2, 3, 4, 5]
+    assert acquisition.drain() == []
+    assert acquisition.latest() is None
+    assert acquisition.stats()["dropped_overflow"] == 2
+
+
+def test_invalid_timestamps_are_dropped(acquisition_of):
+    capture = Fake_Timed_Capture([0.0, 0.01, 0.02, 0.015, 0.03])
+    acquisition = acquisition_of(capture)
+    _wait_for(lambda: capture.next_idx == 5)
+    _wait_for(lambda: acquisition.stats()["grabbed"] == 3)
+
+    assert [frame.timestamp for frame in acquisition.drain()] == [0.01, 0.02, 0.03]
+    stats = acquisition.stats()
+    assert stats["dropped_invalid_timestamp"] == 1
+    assert stats["dropped_non_monotonic"] == 1
+
+
+def test_grabbing_stops_on_error_until_resumed(acquisition_of):
+    error = RuntimeError("disconnected")
+    capture = Fake_Timed_Capture([0.01, 0.02, 0.03], errors={1: error})
+    acquisition = acquisition_of(capture)
+    _wait_for(lambda: acquisition.error is not None)
+
+    assert acquisition.error is error
+    assert acquisition.latest(timeout=1.0).index == 0
+    assert acquisition.latest(timeout=1.0) is None  # returns without waiting
+    assert capture.next_idx == 2
+
+    acquisition.resume()
+    assert acquisition.latest(timeout=1.0).index == 2
+
+
+def test_paused_waits_for_the_current_grab(acquisition_of):
+    capture = Fake_Timed_Capture([0.05, 0.1])
+    acquisition = acquisition_of(capture)
+    _wait_for(lambda: capture.start is not None)
+
+    with acquisition.paused():
+        num_grabbed = capture.next_idx
+        time.sleep(0.1)
+        assert capture.next_idx == num_grabbed
+    _wait_for(lambda: capture.next_idx == 2)
@@ -0,0 +1,91 @@
+"""
+(*)~---------------------------------------------------------------------------
+Pupil - eye tracking platform
+Copyright (C) 2012-2020 Pupil Labs
+
+Distributed under the terms of the GNU
+Lesser General Public License (LGPL v3.0).
+See COPYING and COPYING.LESSER for license details.
+---------------------------------------------------------------------------~(*)
+"""
+
+import os
+from types import SimpleNamespace
+
+import cv2
+import numpy as np
+import pytest
+
+from video_capture.file_backend import File_Source, _bench_write_h264_video
+from video_capture.proxy import generate_proxy, proxy_paths_by_container
+
+
+@pytest.fixture
+def h264_data(tmp_path):
+    return _bench_write_h264_video(
+        str(tmp_path), num_frames=60, gop_size=25, size=(320, 240)
+    )
+
+
+def _seek_control(file_source, dragging):
+    timestamps = file_source.timestamps
+    seek_control = SimpleNamespace(dragging=dragging, play=False)
+    seek_control.ts_idx_from_playback_time = lambda pbt: int(
+        np.searchsorted(timestamps, pbt)
+    )
+    seek_control.end_of_seek = lambda: None
+    return seek_control
+
+
+def test_proxy_frames_are_equivalent_to_full_resolution_frames(h264_data):
+    progress = [progress for _, progress in generate_proxy(h264_data, height=120)]
+    assert progress[-1] == 100.0
+
+    g_pool = SimpleNamespace()
+    file_source = File_Source(g_pool, source_path=h264_data, timing="external")
+    assert proxy_paths_by_container(file_source.videoset).keys() == {0}
+
+    for frame_idx in np.random.default_rng(0).permutation(60)[:20]:
+        proxy_frame = file_source._get_proxy_frame(frame_idx)
+        file_source.seek_to_frame(frame_idx)
+        frame = file_source.get_frame()
+        assert proxy_frame.index == frame.index == frame_idx
+        assert proxy_frame.timestamp == frame.timestamp
+        assert (proxy_frame.width, proxy_frame.height) == (frame.width, frame.height)
+        # the proxy is blurry, but it must show the same frame
+        blurred = cv2.resize(cv2.resize(frame.gray, (160, 120)), (320, 240))
+        assert np.abs(proxy_frame.gray.astype(int) - blurred).mean() < 8
+
+
+def test_proxy_is_used_while_dragging_the_seek_bar(h264_data):
+    for _ in generate_proxy(h264_data, height=120):
+        pass
+    g_pool = SimpleNamespace()
+    file_source = File_Source(g_pool, source_path=h264_data, timing="external")
+    g_pool.seek_control = _seek_control(file_source, dragging=True)
+
+    for frame_idx in (40, 10, 30):
+        g_pool.seek_control.current_playback_time = file_source.timestamps[frame_idx]
+        events = {}
+        file_source.recent_events(events)
+        assert events["frame"].index == frame_idx
+        assert file_source._recent_frame_is_proxy
+    assert file_source.frame_cache_stats()["entries"] == 0
+
+    g_pool.seek_control.dragging = False
+    events = {}
+    file_source.recent_events(events)
+    assert events["frame"].index == 30
+    assert not file_source._recent_frame_is_proxy
+
+
+def test_outdated_proxy_is_ignored(h264_data):
+    for _ in generate_proxy(h264_data, height=120):
+        pass
+    rec_dir = os.path.dirname(h264_data)
+    os.remove(os.path.join(rec_dir, "world_lookup.npy"))
+    _bench_write_h264_video(rec_dir, num_frames=80, gop_size=25, size=(320, 240))
+    file_source = File_Source(
+        SimpleNamespace(), source_path=h264_data, timing="external"
+    )
+    assert file_source._proxy is None
@@ -0,0 +1,70 @@
+"""
+(*)~---------------------------------------------------------------------------
+Pupil - eye tracking platform
+Copyright (C) 2012-2020 Pupil Labs
+
+Distributed under the terms of the GNU
+Lesser General Public License (LGPL v3.0).
+See COPYING and COPYING.LESSER for license details.
+---------------------------------------------------------------------------~(*)
+"""
+
+import os
+
+import av
+import numpy as np
+import pytest
+
+from video_capture.utils import Video, VideoSet, _bench_write_video_set
+
+
+@pytest.fixture
+def rec_dir(tmp_path):
+    _bench_write_video_set(str(tmp_path), "eye0", duration_s=3, rate_hz=30, num_parts=2)
+    return str(tmp_path)
+
+
+def test_load_pts_from_index_matches_demuxing(rec_dir):
+    for file_name in ("eye0.mp4", "eye0_001.mp4"):
+        path = os.path.join(rec_dir, file_name)
+        video = Video(path)
+        container = video.load_container()
+        from_index = video._pts_from_index(container, container.streams.video[0])
+        packets = list(av.open(path).demux(video=0))[:-1]
+        demuxed = [packet.pts for packet in packets]
+        keyframes = [packet.is_keyframe for packet in packets]
+        if from_index is not None:
+            assert from_index[0].tolist() == demuxed
+            assert from_index[1].tolist() == keyframes
+        assert video.load_pts(container).tolist() == demuxed
+        assert video.keyframes.tolist() == keyframes
+
+
+def test_unchanged_parts_are_not_demuxed_again(rec_dir, monkeypatch):
+    videoset = VideoSet(rec_dir, "eye0", fill_gaps=True)
+    videoset.build_lookup()
+    lookup = videoset.lookup.copy()
+    assert os.path.exists(videoset.pts_cache_loc)
+
+    demuxed_paths = []
+    load_container = Video.load_container
+
+    def recording_load_container(self):
+        demuxed_paths.append(self.path)
+        return load_container(self)
+
+    monkeypatch.setattr(Video, "load_container", recording_load_container)
+
+    os.remove(videoset.lookup_loc)
+    videoset = VideoSet(rec_dir, "eye0", fill_gaps=True)
+    videoset.build_lookup()
+    assert demuxed_paths == []
+    assert np.array_equal(videoset.lookup, lookup)
+
+    changed_path = os.path.join(rec_dir, "eye0_001.mp4")
+    stat = os.stat(changed_path)
+    os.utime(changed_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    videoset = VideoSet(rec_dir, "eye0", fill_gaps=True)
+    videoset.build_lookup()
+    assert demuxed_paths == [changed_path]
+    assert np.array_equal(videoset.lookup, lookup)